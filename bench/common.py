@@ -0,0 +1,27 @@
+"""
+বেঞ্চমার্ক স্ক্রিপ্টগুলোর কমন সেটআপ: প্রয়োজনীয় env ভ্যারিয়েবলের ডিফল্ট বসানো, mongomock থাকলে সেটি ব্যবহার
+(mongo_uri দিলে সেই লোকাল mongod), তারপর info মডিউল ইমপোর্ট।
+"""
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_app(mongo_uri=None):
+    for name in ("BOT_TOKEN", "TMDB_API_KEY", "ADMIN_CHANNEL_ID", "BOT_USERNAME", "ADMIN_USERNAME", "ADMIN_PASSWORD"):
+        os.environ.setdefault(name, "bench")
+    if mongo_uri:
+        os.environ["MONGO_URI"] = mongo_uri
+    else:
+        os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+        try:
+            import mongomock
+            import pymongo
+            pymongo.MongoClient = mongomock.MongoClient
+        except ImportError:
+            pass
+
+    sys.path.insert(0, os.path.dirname(BENCH_DIR))
+    import info
+    return info
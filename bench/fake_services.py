@@ -0,0 +1,86 @@
+"""
+বেঞ্চমার্কের জন্য লোকাল TMDb এবং Telegram স্ট্যান্ড-ইন। দুটোই থ্রেডেড http.server, র‍্যান্ডম পোর্টে চলে;
+info ইমপোর্টের আগে TMDB_API_BASE / TELEGRAM_API_BASE এগুলোর দিকে সেট করতে হয়।
+প্রতিটি সার্ভার কতগুলো রিকোয়েস্ট পেয়েছে তা গুনে রাখে।
+"""
+import json
+import re
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _stable_id(text):
+    return zlib.crc32(text.lower().encode("utf-8")) % 900000 + 100000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body, status=200):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _count(self):
+        with self.server.lock:
+            self.server.requests += 1
+
+
+class TMDbHandler(_Handler):
+    def do_GET(self):
+        self._count()
+        url = urlparse(self.path)
+        path = url.path[2:] if url.path.startswith("/3/") else url.path
+        query = parse_qs(url.query).get("query", [""])[0]
+        if path.startswith("/search/"):
+            return self._reply({"results": [{"id": _stable_id(query)}]} if query else {"results": []})
+        match = re.fullmatch(r"/(movie|tv)/(\d+)(/videos)?", path)
+        if not match:
+            return self._reply({"status_message": "not found"}, 404)
+        kind, tmdb_id, videos = match.groups()
+        if videos:
+            return self._reply({"results": [{"type": "Trailer", "site": "YouTube", "key": f"yt{tmdb_id}"}]})
+        name_key = "title" if kind == "movie" else "name"
+        date_key = "release_date" if kind == "movie" else "first_air_date"
+        return self._reply({
+            "id": int(tmdb_id), name_key: f"Title {tmdb_id}", "poster_path": f"/p{tmdb_id}.jpg",
+            "overview": "A synthetic overview for benchmarking.", date_key: "2023-05-01",
+            "genres": [{"name": "Action"}, {"name": "Drama"}], "vote_average": 7.1,
+        })
+
+
+class TelegramHandler(_Handler):
+    def _handle(self):
+        self._count()
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with self.server.lock:
+            self.server.message_id += 1
+            message_id = self.server.message_id
+        return self._reply({"ok": True, "result": {"message_id": message_id}})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+def _serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.message_id = 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_fake_services():
+    """(tmdb, telegram) সার্ভার চালু করে; বেস URL দুটো server.base_url এ থাকে।"""
+    tmdb, telegram = _serve(TMDbHandler), _serve(TelegramHandler)
+    tmdb.base_url = f"http://127.0.0.1:{tmdb.server_address[1]}/3"
+    telegram.base_url = f"http://127.0.0.1:{telegram.server_address[1]}"
+    return tmdb, telegram
@@ -0,0 +1,84 @@
+"""
+ফাইলনেম পার্সার বেঞ্চমার্ক: filenames.json কর্পাসের উপর প্রতিটি ফিল্ডের নির্ভুলতা এবং প্রতি সেকেন্ডে কতগুলো পার্স হয়
+(cold = LRU ক্যাশ খালি, warm = একই ফাইলনেম আবার)।
+
+    python bench/parser_bench.py [--rounds 200] [--corpus bench/filenames.json] [--min-accuracy 0.95] [--verbose]
+
+নির্ভুলতা --min-accuracy এর নিচে নামলে exit code 1, তাই CI-তেও চালানো যায়।
+নতুন রিলিজ ফরম্যাট পেলে কর্পাসে {"filename": ..., "expected": {...}} যোগ করুন।
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from common import BENCH_DIR, load_app
+
+info = load_app()
+
+FIELDS = ("type", "title", "year", "season", "episode", "languages")
+
+
+def accuracy(corpus, verbose=False):
+    hits = {field: 0 for field in FIELDS}
+    totals = {field: 0 for field in FIELDS}
+    exact = 0
+    for entry, parsed in zip(corpus, info.parse_many([e["filename"] for e in corpus])):
+        expected = entry["expected"]
+        misses = []
+        for field in FIELDS:
+            if field not in expected:
+                continue
+            totals[field] += 1
+            if parsed.get(field) == expected[field]:
+                hits[field] += 1
+            else:
+                misses.append(f"{field}: expected {expected[field]!r}, got {parsed.get(field)!r}")
+        if misses:
+            if verbose:
+                print(f"  MISS {entry['filename']}\n    " + "\n    ".join(misses))
+        else:
+            exact += 1
+    return {field: hits[field] / totals[field] for field in FIELDS if totals[field]}, exact / len(corpus)
+
+
+def throughput(filenames, rounds, warm):
+    info._parse_filename.cache_clear()
+    if warm:
+        info.parse_many(filenames)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        if not warm:
+            info._parse_filename.cache_clear()
+        info.parse_many(filenames)
+    return rounds * len(filenames) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(BENCH_DIR, "filenames.json"))
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--min-accuracy", type=float, default=0.95)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+    filenames = [e["filename"] for e in corpus]
+
+    per_field, exact = accuracy(corpus, args.verbose)
+    print(f"corpus: {len(corpus)} filenames")
+    for field, score in per_field.items():
+        print(f"  {field:<10}{score:>8.1%}")
+    print(f"  {'exact':<10}{exact:>8.1%}")
+    print(f"cold: {throughput(filenames, args.rounds, warm=False):>12,.0f} parses/sec")
+    print(f"warm: {throughput(filenames, args.rounds, warm=True):>12,.0f} parses/sec")
+
+    if exact < args.min_accuracy:
+        print(f"FAIL: exact-match accuracy {exact:.1%} < {args.min_accuracy:.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
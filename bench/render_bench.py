@@ -0,0 +1,72 @@
+"""
+পেজ রেন্ডারিং বেঞ্চমার্ক: প্রতি রিকোয়েস্টে টেমপ্লেট কম্পাইল (আগের render_template_string পদ্ধতি)
+বনাম প্রি-কম্পাইলড রেজিস্ট্রি + কার্ড ফ্র্যাগমেন্ট ক্যাশ।
+
+    python bench/render_bench.py [--iterations 200] [--cards 60]
+
+ডাটাবেস লাগে না; mongomock ইনস্টল থাকলে সেটি ব্যবহার হয়, না থাকলে MONGO_URI-তে থাকা ডাটাবেস।
+"""
+import argparse
+import time
+
+from common import load_app
+
+info = load_app()
+from bson.objectid import ObjectId  # noqa: E402
+from flask import render_template, render_template_string  # noqa: E402
+
+
+def make_docs(count):
+    return [{
+        "_id": str(ObjectId()), "title": f"Bench Title {i}", "type": "movie" if i % 2 else "series",
+        "poster": f"https://image.tmdb.org/t/p/w500/poster{i}.jpg", "poster_badge": "HD" if i % 3 == 0 else None,
+        "overview": "An overview sentence. " * 8, "watch_link": "https://example.com/embed", "is_coming_soon": False,
+    } for i in range(count)]
+
+
+def page_contexts(card_count):
+    docs = make_docs(card_count)
+    cards = info.to_cards(docs)
+    shelf = cards[:info.HOME_SHELF_LIMIT]
+    detail = {**docs[0], "_id": ObjectId(docs[0]["_id"]), "genres": ["Action", "Drama"], "languages": ["Hindi"],
+              "release_date": "2024-01-01", "vote_average": 7.4, "type": "series",
+              "episodes": [{"season": 1, "episode_number": n, "message_id": n} for n in range(1, 41)]}
+    return {
+        "home": ("index.html", info.index_html, dict(
+            trending_movies=shelf, latest_movies=shelf, latest_series=shelf, coming_soon_movies=shelf,
+            recently_added=shelf[:info.HOME_HERO_LIMIT], recently_added_full=shelf,
+            all_badges=[{"value": b, "count": 12} for b in ("HD", "New", "Dual Audio")], is_full_page_list=False, query="")),
+        "full_list": ("index.html", info.index_html, dict(
+            movies=cards[:info.FULL_LIST_PAGE_SIZE], query="Genre: Action", is_full_page_list=True, next_cursor=cards[-1]._id)),
+        "detail": ("detail.html", info.detail_html, dict(movie=detail, trailer_key="abc", related_movies=cards[:12])),
+        "genres": ("genres.html", info.genres_html, dict(genres=["Action", "Comedy", "Drama", "Horror"], title="Browse by Genre")),
+    }
+
+
+def timed(render, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--cards", type=int, default=60)
+    args = parser.parse_args()
+
+    info.ads_cache.get = lambda: {}
+    print(f"{'page':<12}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    with info.app.test_request_context("/"):
+        for page, (name, source, context) in page_contexts(args.cards).items():
+            def before():
+                info._card_cache.clear()
+                render_template_string(source, **context)
+            before_ms = timed(before, args.iterations)
+            after_ms = timed(lambda: render_template(name, **context), args.iterations)
+            print(f"{page:<12}{before_ms:>14.3f}{after_ms:>14.3f}{before_ms / after_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+রুট-লেভেল বেঞ্চমার্ক: সিনথেটিক ক্যাটালগ সিড করে Flask test client দিয়ে প্রতিটি রুট বারবার কল করে,
+p50/p95/p99 ল্যাটেন্সি এবং প্রতি রিকোয়েস্টে মঙ্গো কমান্ডের সংখ্যা দেখায়। TMDb ও Telegram লোকাল ফেক সার্ভারে যায়।
+ডিপেন্ডেন্সি: pip install -r bench/requirements.txt (mongomock এর সাথে মেলে এমন pymongo ভার্সনসহ)।
+
+    python bench/routes_bench.py [--titles 2000] [--episodes 400] [--iterations 50]
+    python bench/routes_bench.py --mongo-uri mongodb://localhost:27017     # mongomock এর বদলে লোকাল mongod
+    python bench/routes_bench.py --update-baseline                         # বর্তমান ফলাফল বেসলাইন হিসেবে সংরক্ষণ
+
+সংরক্ষিত বেসলাইনের চেয়ে কোনো রুটের p95 --tolerance এর বেশি বাড়লে, বা প্রতি রিকোয়েস্টে মঙ্গো কমান্ড বাড়লে exit code 1।
+info.py এর রাউটপ্রতি কোয়েরি বাজেট (QUERY_BUDGETS) কড়াভাবে প্রয়োগ হয়; বাজেট পার হওয়া রিকোয়েস্ট এরর গোনা হয়।
+বেসলাইন শুধু একই কনফিগারেশনের (backend, ক্যাটালগ সাইজ) সাথে তুলনা হয়; ল্যাটেন্সি মেশিনভেদে আলাদা,
+তাই অন্য মেশিনে আগে --update-baseline চালিয়ে নিন। লোকাল mongod এ movie_db_bench ডাটাবেস মুছে নতুন করে সিড হয়।
+"""
+import argparse
+import base64
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from common import BENCH_DIR
+from fake_services import start_fake_services
+
+GENRES = ["Action", "Drama", "Comedy", "Thriller", "Horror", "Romance", "Sci-Fi", "Animation", "Crime", "Family"]
+LANGUAGES = ["Hindi", "English", "Bengali", "Tamil", "Telugu", "Malayalam"]
+BADGES = ["HD", "New", "Dual Audio", "4K", None, None, None]
+WORDS = ["Dark", "Night", "River", "Storm", "City", "Last", "Kingdom", "Shadow", "Fire", "Silent", "Love", "Escape",
+         "Return", "Blood", "Golden", "Hunter", "Empire", "Secret", "Lost", "Wild"]
+ADMIN_CHANNEL_ID = "-1001234567890"
+
+
+class CommandCounter:
+    """শুধু বেঞ্চমার্ক থ্রেডের মঙ্গো কমান্ড গোনে; ব্যাকগ্রাউন্ড থ্রেড (ইনডেক্স রিফ্রেশ ইত্যাদি) বাদ।
+    mongomock কমান্ড ইভেন্ট পাঠায় না, তাই record_span সেট থাকলে প্রতিটি কল রিকোয়েস্ট ট্রেসেও যায়
+    (info.record_span), যাতে রাউটের কোয়েরি বাজেট mongomock এও প্রয়োগ হয়।"""
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.count = 0
+        self.record_span = None
+        self._local = threading.local()
+
+    def hit(self):
+        if threading.get_ident() == self.thread:
+            self.count += 1
+
+    # pymongo.monitoring.CommandListener ইন্টারফেস (লোকাল mongod)
+    def started(self, event):
+        if event.command_name not in ("getMore", "endSessions", "killCursors"):
+            self.hit()
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def wrap(self, method):
+        # mongomock এর মেথডগুলো একে অপরকে কল করে; শুধু বাইরের কলটি গোনা হয়
+        @functools.wraps(method)
+        def counted(*args, **kwargs):
+            depth = getattr(self._local, "depth", 0)
+            if depth == 0:
+                self.hit()
+            self._local.depth = depth + 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._local.depth = depth
+                if depth == 0 and self.record_span:
+                    self.record_span("mongo", f"{method.__name__} {args[0].name}", time.perf_counter() - start)
+        return counted
+
+
+def install_counter(counter, mongo_uri):
+    if mongo_uri:
+        from pymongo import monitoring
+        monitoring.register(counter)
+        return "mongod"
+    import mongomock
+    for name in ("find", "find_one", "aggregate", "count_documents", "estimated_document_count", "distinct",
+                 "insert_one", "insert_many", "update_one", "update_many", "replace_one", "delete_one", "delete_many",
+                 "find_one_and_update", "bulk_write"):
+        setattr(mongomock.collection.Collection, name, counter.wrap(getattr(mongomock.collection.Collection, name)))
+    return "mongomock"
+
+
+def make_title(rng, i):
+    return f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+
+
+def synthetic_catalog(rng, titles, big_series, episodes):
+    now = datetime.utcnow()
+    docs = []
+    for i in range(titles):
+        is_series = i % 10 < 3
+        doc = {
+            "title": make_title(rng, i), "type": "series" if is_series else "movie", "tmdb_id": 500000 + i,
+            "poster": f"https://image.tmdb.org/t/p/w500/bench{i}.jpg", "overview": "Synthetic overview text. " * 10,
+            "release_date": f"{rng.randint(1990, 2025)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+            "vote_average": round(rng.uniform(4, 9), 1), "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "languages": rng.sample(LANGUAGES, rng.randint(1, 2)), "poster_badge": rng.choice(BADGES),
+            "is_trending": rng.random() < 0.08, "is_coming_soon": rng.random() < 0.05,
+            "trailer_key": f"yt{i}", "trailer_checked_at": now, "watch_link": "https://example.com/embed",
+            "links": [], "files": [], "episodes": [],
+        }
+        if is_series:
+            count = episodes if i // 10 < big_series else rng.randint(6, 24)
+            doc["episodes"] = [{"season": n // 50 + 1, "episode_number": n % 50 + 1, "message_id": 10 * i + n,
+                                "title": f"Episode {n + 1}", "quality": "720p"} for n in range(count)]
+        else:
+            doc["files"] = [{"quality": q, "message_id": 10 * i + k} for k, q in enumerate(("480p", "720p", "1080p"))]
+        docs.append(doc)
+    return docs
+
+
+def seed(info, args):
+    rng = random.Random(args.seed)
+    for collection in (info.movies, info.feedback, info.ingest_queue, info.tmdb_cache):
+        collection.delete_many({})
+    docs = synthetic_catalog(rng, args.titles, args.big_series, args.episodes)
+    for start in range(0, len(docs), 500):
+        info.movies.insert_many(docs[start:start + 500])
+    info.feedback.insert_many([{"name": f"User {i}", "message": "Please add more titles.", "timestamp": datetime.utcnow() - timedelta(minutes=i)}
+                               for i in range(args.feedback)])
+    info.rebuild_search_index()
+    info.rebuild_related_index()
+    info.rebuild_facets()
+    # প্রথম রিকোয়েস্টে স্ন্যাপশট সরাসরি তৈরি হলে সেটি হোমের কোয়েরি বাজেট ছাড়িয়ে যায়
+    info.refresh_home_snapshot()
+    return docs
+
+
+def scenarios(info, docs, rng):
+    movie_ids = [str(d["_id"]) for d in docs if d["type"] == "movie"]
+    big_series = sorted((d for d in docs if d["type"] == "series"), key=lambda d: len(d["episodes"]), reverse=True)
+    series_ids = [str(d["_id"]) for d in big_series[:5]]
+    queries = [" ".join(d["title"].split()[:2]) for d in rng.sample(docs, 20)] + ["shadw", "kingdm nigt"]
+    update_ids = iter(range(10_000_000, 20_000_000))
+    auth = {"Authorization": "Basic " + base64.b64encode(b"bench:bench").decode()}
+
+    def channel_post():
+        d = rng.choice(docs)
+        if d["type"] == "series":
+            name = f"{d['title'].replace(' ', '.')}.S01E{rng.randint(1, 60):02d}.720p.WEB-DL.Hindi.mkv"
+        else:
+            name = f"{d['title'].replace(' ', '.')}.2021.1080p.WEB-DL.Hindi.English.mkv"
+        return {"update_id": next(update_ids), "channel_post": {
+            "message_id": rng.randint(1, 10 ** 6), "chat": {"id": int(ADMIN_CHANNEL_ID)}, "document": {"file_name": name}}}
+
+    def start_message():
+        d = rng.choice(docs)
+        payload = f"{d['_id']}_1_{rng.randint(1, 5)}" if d["type"] == "series" else f"{d['_id']}_720p"
+        return {"update_id": next(update_ids), "message": {"chat": {"id": 424242}, "text": f"/start {payload}"}}
+
+    get = lambda path, **kw: ("GET", path, kw)  # noqa: E731
+    # আগের ভিজিটের ETag নিয়ে আবার আসা ব্রাউজার/ক্রলার: 304 পাওয়ার কথা
+    primer = info.app.test_client()
+    etags = {path: primer.get(path).headers.get("ETag") for path in ["/"] + [f"/movie/{i}" for i in series_ids]}
+    revisit = lambda path: get(path, headers={"If-None-Match": etags[path]})  # noqa: E731
+    return {
+        "/": lambda: get("/"),
+        "/movie/<id> (movie)": lambda: get(f"/movie/{rng.choice(movie_ids)}"),
+        "/movie/<id> (big series)": lambda: get(f"/movie/{rng.choice(series_ids)}"),
+        "/ (revisit, 304)": lambda: revisit("/"),
+        "/movie/<id> (revisit, 304)": lambda: revisit(f"/movie/{rng.choice(series_ids)}"),
+        "/movies_only": lambda: get("/movies_only"),
+        "/webseries": lambda: get("/webseries"),
+        "/trending_movies": lambda: get("/trending_movies"),
+        "/coming_soon": lambda: get("/coming_soon"),
+        "/recently_added": lambda: get("/recently_added"),
+        "/genre/<name>": lambda: get(f"/genre/{rng.choice(GENRES)}"),
+        "/badge/<name>": lambda: get("/badge/HD"),
+        "/genres": lambda: get("/genres"),
+        "/?q= (search)": lambda: get("/", query_string={"q": rng.choice(queries)}),
+        "/api/v1/titles": lambda: get("/api/v1/titles", query_string={"list": "recent"}),
+        "/api/v1/titles/<id>": lambda: get(f"/api/v1/titles/{rng.choice(series_ids)}"),
+        "/api/v1/titles/<id>/episodes": lambda: get(f"/api/v1/titles/{rng.choice(series_ids)}/episodes"),
+        "/api/v1/shelves": lambda: get("/api/v1/shelves"),
+        "/admin": lambda: get("/admin", headers=auth),
+        "/admin?q= (search)": lambda: get("/admin", headers=auth, query_string={"q": rng.choice(queries)}),
+        "/webhook": lambda: ("POST", "/webhook", {"json": channel_post()}),
+        # /webhook শুধু কিউতে রাখে; আসল কাজ ওয়ার্কারের process_update ও লেখায়, তাই সেটিও আলাদা মাপা হয়
+        "ingest: channel_post": lambda: ("CALL", functools.partial(ingest, info), channel_post()),
+        "ingest: /start": lambda: ("CALL", info.process_update, start_message()),
+    }
+
+
+def ingest(info, update):
+    """ওয়ার্কারের মতো: process_update এর IngestWrite সাথে সাথে apply_ingest_writes দিয়ে লেখা হয়
+    (মঙ্গো আপসার্ট + on_content_changed)।"""
+    outcome = info.process_update(update)
+    if isinstance(outcome, info.IngestWrite):
+        info.apply_ingest_writes([outcome])
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def measure(info, counter, make_request, iterations, warmup):
+    client = info.app.test_client()
+    timings, errors = [], 0
+    commands_before = 0
+    for i in range(warmup + iterations):
+        kind, target, kwargs = make_request()
+        if i == warmup:
+            commands_before = counter.count
+        start = time.perf_counter()
+        if kind == "CALL":
+            target(kwargs)
+        else:
+            response = client.open(target, method=kind, **kwargs)
+            if response.status_code >= 400:
+                errors += 1
+        elapsed = (time.perf_counter() - start) * 1000
+        if i >= warmup:
+            timings.append(elapsed)
+    timings.sort()
+    return {
+        "p50": round(percentile(timings, 50), 3), "p95": round(percentile(timings, 95), 3),
+        "p99": round(percentile(timings, 99), 3),
+        "commands": round((counter.count - commands_before) / iterations, 2), "errors": errors,
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    regressions = []
+    for route, current in results.items():
+        base = baseline.get(route)
+        if not base:
+            continue
+        if current["p95"] > base["p95"] * (1 + tolerance) and current["p95"] - base["p95"] > min_delta_ms:
+            regressions.append(f"{route}: p95 {base['p95']:.2f} -> {current['p95']:.2f} ms")
+        if current["commands"] > base["commands"] + 0.5:
+            regressions.append(f"{route}: mongo commands/request {base['commands']} -> {current['commands']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=2000)
+    parser.add_argument("--big-series", type=int, default=5, help="কতগুলো সিরিজে --episodes সংখ্যক এপিসোড থাকবে")
+    parser.add_argument("--episodes", type=int, default=400)
+    parser.add_argument("--feedback", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--route", action="append", help="শুধু এই রুট(গুলো) চালাবে, যেমন --route /admin")
+    parser.add_argument("--mongo-uri", help="mongomock এর বদলে এই mongod ব্যবহার হবে (movie_db_bench ডাটাবেস)")
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "routes_baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="p95 এ কতটা বৃদ্ধি সহনীয় (0.3 = 30%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="এর চেয়ে কম বৃদ্ধি রিগ্রেশন ধরা হয় না")
+    args = parser.parse_args()
+
+    tmdb, telegram = start_fake_services()
+    os.environ["TMDB_API_BASE"] = tmdb.base_url
+    os.environ["TELEGRAM_API_BASE"] = telegram.base_url
+    os.environ["ADMIN_CHANNEL_ID"] = ADMIN_CHANNEL_ID
+    os.environ["ADMIN_USERNAME"] = os.environ["ADMIN_PASSWORD"] = "bench"
+    os.environ["MONGO_DB_NAME"] = "movie_db_bench"
+    # কিউ ওয়ার্কাররা বেঞ্চমার্কের মাঝে মঙ্গো ব্যবহার করলে ফলাফল এলোমেলো হয়
+    os.environ["INGEST_WORKERS"] = "0"
+    # রাউটের মঙ্গো কমান্ড QUERY_BUDGETS পার হলে রিকোয়েস্ট 500 হয় এবং এরর হিসেবে গোনা হয়
+    os.environ.setdefault("QUERY_BUDGET_STRICT", "1")
+
+    counter = CommandCounter()
+    backend = install_counter(counter, args.mongo_uri)
+    from common import load_app
+    info = load_app(args.mongo_uri)
+    if backend == "mongomock":
+        counter.record_span = info.record_span
+
+    docs = seed(info, args)
+    episode_total = sum(len(d["episodes"]) for d in docs)
+    print(f"backend: {backend}, titles: {len(docs)}, episodes: {episode_total}, iterations: {args.iterations}")
+
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"{'route':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mongo/req':>11}{'errors':>8}")
+    for route, make_request in scenarios(info, docs, rng).items():
+        if args.route and route not in args.route:
+            continue
+        stats = measure(info, counter, make_request, args.iterations, args.warmup)
+        results[route] = stats
+        print(f"{route:<28}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}{stats['commands']:>11}{stats['errors']:>8}")
+    print(f"fake TMDb requests: {tmdb.requests}, fake Telegram requests: {telegram.requests}")
+
+    config = {"backend": backend, "titles": args.titles, "big_series": args.big_series, "episodes": args.episodes}
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "routes": results}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("no baseline found; run with --update-baseline to create one")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print(f"baseline config {baseline.get('config')} differs from this run; skipping comparison")
+        return
+    regressions = compare(results, baseline["routes"], args.tolerance, args.min_delta_ms)
+    failed = [route for route, stats in results.items() if stats["errors"]]
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    for route in failed:
+        print(f"ERRORS {route}: {results[route]['errors']} responses >= 400")
+    if regressions or failed:
+        sys.exit(1)
+    print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
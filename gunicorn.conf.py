@@ -0,0 +1,25 @@
+"""
+gunicorn কনফিগ; `gunicorn info:app` চালালে ওয়ার্কিং ডিরেক্টরি থেকে এটি নিজেই পড়া হয়।
+
+ডিফল্ট ওয়ার্কার gevent: requests, pymongo এবং threading মাঙ্কি-প্যাচ হয়ে কোঅপারেটিভ হয়ে যায়, তাই TMDb বা
+টেলিগ্রামের উত্তরের অপেক্ষায় থাকা একটি রিকোয়েস্ট পুরো ওয়ার্কার আটকে রাখে না; প্রতিটি প্রসেস
+GUNICORN_WORKER_CONNECTIONS পর্যন্ত রিকোয়েস্ট একসাথে চালায়। info.py এর ব্যাকগ্রাউন্ড থ্রেডগুলো (ইনজেস্ট, টেলিগ্রাম সেন্ডার,
+ডিলিশন, প্রি-রেন্ডার) তখন গ্রিনলেট হিসেবে চলে, কোডে কোনো পরিবর্তন লাগে না।
+gevent ইনস্টল না থাকলে GUNICORN_WORKER_CLASS=gthread দিয়ে থ্রেডেড ওয়ার্কারে চালানো যায়।
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+# /metrics এর কাউন্টার ও হিস্টোগ্রাম প্রতিটি প্রসেসের মেমোরিতে থাকে; একাধিক ওয়ার্কার হলে প্রতিটি স্ক্র্যাপ এলোমেলো একটি
+# ওয়ার্কারে যায় এবং rate() ভেঙে যায়। তাই কন্টেইনার প্রতি একটি প্রসেস, আর স্কেল করা হয় কন্টেইনার বাড়িয়ে।
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+# gevent: প্রতি ওয়ার্কারে একসাথে কতগুলো রিকোয়েস্ট; gthread: প্রতি ওয়ার্কারে থ্রেড সংখ্যা
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 500))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+# অ্যাপ মাস্টারে আগে লোড হলে pymongo/requests প্যাচের আগেই ইমপোর্ট হয়ে যায়, এবং মঙ্গো কানেকশন fork এর পরে শেয়ার হয়
+preload_app = False
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")
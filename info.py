@@ -1,13 +1,45 @@
 import os
 import sys
 import re
+import time
+import hashlib
+import gzip
+import json
+import socket
+import unicodedata
+import threading
+import queue
+import contextvars
+import shutil
 import requests
-from flask import Flask, render_template_string, request, redirect, url_for, Response, jsonify
-from pymongo import MongoClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import Flask, render_template, request, redirect, url_for, Response, jsonify, make_response, g
+from flask import request_started, request_finished
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import HTTPException
+from urllib.parse import quote
+from pymongo import MongoClient, IndexModel, UpdateOne, DeleteOne, ASCENDING, DESCENDING, ReturnDocument
+from pymongo import monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 from bson.objectid import ObjectId
-from functools import wraps
-from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
+from bson.errors import InvalidId
+from functools import wraps, lru_cache
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, defaultdict, namedtuple
+from jinja2 import DictLoader
+from markupsafe import Markup
+from datetime import datetime, timedelta, timezone
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import gevent
+    from gevent import monkey as gevent_monkey
+except ImportError:
+    gevent = None
 
 # ======================================================================
 # --- আপনার ব্যক্তিগত ও অ্যাডমিন তথ্য (এনভায়রনমেন্ট থেকে লোড হবে) ---
@@ -36,9 +68,34 @@ if missing_vars:
 # ======================================================================
 
 # --- অ্যাপ্লিকেশন সেটআপ ---
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
+# বেঞ্চমার্ক/লোকাল টেস্টে ফেক সার্ভারে পাঠানোর জন্য বেস URL বদলানো যায়
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org")
+TELEGRAM_API_URL = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}"
+# লিজের মালিক এবং মেট্রিক্সের worker লেবেল
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
 app = Flask(__name__)
 
+# --- gevent ওয়ার্কারে CPU-ভারী কাজ ---
+# গ্রিনলেট শুধু I/O তে সুইচ করে, তাই লম্বা CPU লুপ (সার্চ/রিলেটেড রিবিল্ড) চলার সময় প্রসেসের সব রিকোয়েস্ট আটকে থাকে।
+# এসব লুপ cooperative() দিয়ে চলে: প্রতি CPU_SLICE সেকেন্ড কাজের পর একটি ছোট ঘুম। gevent.sleep(0) শুধু তৈরি থাকা
+# কলব্যাক চালায়, টাইমার বা সকেট নয়, তাই শূন্যের বদলে আধা মিলিসেকেন্ড। থ্রেডেড ওয়ার্কারে এটি GIL ছেড়ে দেয়।
+CPU_SLICE = 0.005
+
+def cooperative(iterable):
+    slice_started = time.perf_counter()
+    for item in iterable:
+        yield item
+        if time.perf_counter() - slice_started >= CPU_SLICE:
+            time.sleep(0.0005)
+            slice_started = time.perf_counter()
+
+def run_off_hub(func, *args, **kwargs):
+    """একটানা C কল (brotli q11, gzip -9) gevent এ hub এর আসল থ্রেডপুলে চালায়; এগুলো GIL ছেড়ে দেয়, ফলে
+    অপেক্ষার সময় অন্য গ্রিনলেট চলে। gevent ছাড়া সরাসরি কল।"""
+    if gevent and gevent_monkey.is_module_patched("threading"):
+        return gevent.get_hub().threadpool.apply(func, args, kwargs)
+    return func(*args, **kwargs)
+
 # --- অ্যাডমিন অথেন্টিকেশন ফাংশন ---
 def check_auth(username, password):
     return username == ADMIN_USERNAME and password == ADMIN_PASSWORD
@@ -55,42 +112,679 @@ def requires_auth(f):
         return f(*args, **kwargs)
     return decorated
 
+# ======================================================================
+# --- Metrics (/metrics) ---
+# ======================================================================
+# Prometheus টেক্সট ফরম্যাটে মেট্রিক্স, কোনো বাড়তি লাইব্রেরি ছাড়া। কাউন্টার ও হিস্টোগ্রাম প্রতিটি প্রসেসের মেমোরিতে থাকে
+# এবং প্রতিটি সিরিজে worker লেবেল থাকে; gunicorn এ একাধিক ওয়ার্কার থাকলে একটি স্ক্র্যাপ একটি প্রসেসকেই দেখে, তাই
+# কন্টেইনার প্রতি একটি gevent প্রসেস (WEB_CONCURRENCY=1) চালিয়ে প্রতিটিকে আলাদা টার্গেট হিসেবে স্ক্র্যাপ করা সবচেয়ে নির্ভুল।
+# কিউ ব্যাকলগের গেজগুলো স্ক্র্যাপের সময় মঙ্গোডিবি থেকে পড়া হয়।
+METRICS_PREFIX = "moviezhub_"
+# সেট থাকলে /metrics এ "Authorization: Bearer <token>" লাগবে
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+METRICS = []
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(names, values):
+    pairs = [("worker", WORKER_ID)] + list(zip(names, values))
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs)
+
+class Metric:
+    def __init__(self, name, help_text, kind, labelnames=()):
+        self.name, self.help, self.kind, self.labelnames = METRICS_PREFIX + name, help_text, kind, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{{{_label_text(self.labelnames, key)}}} {value}"]
+
+class Counter(Metric):
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, "counter", labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Histogram(Metric):
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, "histogram", labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # [প্রতিটি বাকেটের (নন-কিউমুলেটিভ) সংখ্যা..., +Inf, sum]
+            state = self._values.get(key)
+            if state is None: state = self._values[key] = [0] * (len(self.buckets) + 2)
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            state[index] += 1
+            state[-1] += value
+
+    def _samples(self, key, state):
+        labels, lines, cumulative = _label_text(self.labelnames, key), [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), state):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{self.name}_sum{{{labels}}} {state[-1]}")
+        lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+class Gauge(Metric):
+    """মান স্ক্র্যাপের সময় collect() থেকে আসে: [(লেবেল ভ্যালুর tuple, মান), ...]।"""
+    def __init__(self, name, help_text, labelnames=(), collect=None):
+        super().__init__(name, help_text, "gauge", labelnames)
+        self.collect = collect
+
+    def render(self):
+        try: self._values = dict(self.collect())
+        except Exception as e:
+            print(f"Metrics: error collecting {self.name}: {e}")
+            self._values = {}
+        return super().render()
+
+_scrape_results = contextvars.ContextVar("scrape_results", default=None)
+
+def scrape_once(func):
+    """একটি স্ক্র্যাপের মধ্যে func একবারই চলে, যাতে একাধিক গেজ একই মঙ্গো কোয়েরির ফল ভাগ করে নেয়।
+    স্ক্র্যাপের বাইরে (যেমন /admin/ingest_status) সাধারণ কল।"""
+    @wraps(func)
+    def cached():
+        results = _scrape_results.get()
+        if results is None: return func()
+        if func not in results: results[func] = func()
+        return results[func]
+    return cached
+
+def render_metrics():
+    token = _scrape_results.set({})
+    try:
+        return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+    finally:
+        _scrape_results.reset(token)
+
+http_request_seconds = Histogram("http_request_duration_seconds", "Request latency by Flask endpoint.", ("endpoint", "method"))
+http_requests_total = Counter("http_requests_total", "Requests by Flask endpoint and status.", ("endpoint", "method", "status"))
+mongo_command_seconds = Histogram("mongo_command_duration_seconds", "MongoDB command latency.", ("collection", "command"), MONGO_LATENCY_BUCKETS)
+mongo_command_errors = Counter("mongo_command_errors_total", "Failed MongoDB commands.", ("collection", "command"))
+tmdb_request_seconds = Histogram("tmdb_request_duration_seconds", "TMDb API call latency.", ("route",))
+tmdb_errors_total = Counter("tmdb_errors_total", "Failed TMDb API calls.", ("route", "reason"))
+telegram_request_seconds = Histogram("telegram_request_duration_seconds", "Telegram Bot API call latency per attempt.", ("method",))
+telegram_errors_total = Counter("telegram_errors_total", "Failed Telegram Bot API attempts.", ("method", "code"))
+webhook_updates_total = Counter("webhook_updates_total", "Updates received on /webhook.", ("reason",))
+ingest_outcomes_total = Counter("ingest_outcomes_total", "Processed webhook updates by outcome.", ("outcome",))
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """প্রতিটি মঙ্গো কমান্ডের সময় কালেকশন ও অপারেশন অনুযায়ী রেকর্ড করে।"""
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        # getMore এর ক্ষেত্রে কমান্ডের মান কার্সর id, কালেকশন আলাদা ফিল্ডে থাকে
+        collection = target if isinstance(target, str) else event.command.get("collection", "-")
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _record(self, event, failed):
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        mongo_command_seconds.observe(event.duration_micros / 1e6, collection=collection, command=event.command_name)
+        if failed: mongo_command_errors.inc(collection=collection, command=event.command_name)
+        # লিসেনার কমান্ড পাঠানো থ্রেডেই চলে, তাই span চলতি রিকোয়েস্টের ট্রেসে যায়
+        record_span("mongo", f"{event.command_name} {collection}{' FAILED' if failed else ''}", event.duration_micros / 1e6)
+
+# --- রিকোয়েস্ট ট্রেসিং ---
+# প্রতিটি রিকোয়েস্টের মঙ্গো কমান্ড আর বাইরের HTTP কল (TMDb, Telegram) সময়সহ span হিসেবে রেকর্ড হয়; রিকোয়েস্টের থ্রেডে
+# চলা কলগুলোই ধরা পড়ে, ব্যাকগ্রাউন্ড থ্রেডের নয়। ডিবাগ মোডে (app.debug বা TRACE_HEADERS=1) রেসপন্সে Server-Timing ও
+# X-Query-Count হেডার যায়। SLOW_REQUEST_MS এর বেশি সময় নিলে পুরো span ট্রি লগে প্রিন্ট হয়।
+# QUERY_BUDGETS এ রাউটপ্রতি মঙ্গো কমান্ডের সীমা: পার হলে লগে সতর্কবার্তা, আর QUERY_BUDGET_STRICT=1 হলে
+# QueryBudgetExceeded (500), যাতে বেঞ্চ/টেস্টে নতুন করে যোগ হওয়া কোয়েরি সাথে সাথে ধরা পড়ে।
+TRACE_HEADERS = os.environ.get("TRACE_HEADERS") == "1"
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 500))
+QUERY_BUDGET_STRICT = os.environ.get("QUERY_BUDGET_STRICT") == "1"
+# কী হলো GET রাউটের endpoint, অন্য মেথডে "POST endpoint"। সংখ্যাগুলো সবচেয়ে খারাপ ক্ষেত্রের মাপা মান: রাউটের নিজের কোয়েরি
+# এবং একই রিকোয়েস্টে পড়ে যাওয়া সব VersionedCache ভার্সন চেক (meta থেকে, প্রতিটি VERSION_CHECK_INTERVAL এ একবার);
+# VERSION_CHECK_INTERVAL=0 দিয়ে বেঞ্চের সিড করা ক্যাটালগে প্রতিটি রাউট চালিয়ে X-Query-Count থেকে নেওয়া।
+QUERY_BUDGETS = {
+    "home": 6, "movie_detail": 7, "watch_movie": 2, "genres_page": 6,
+    "trending_movies": 6, "movies_only": 6, "webseries": 6, "coming_soon": 6, "recently_added_all": 6,
+    "movies_by_genre": 6, "movies_by_badge": 6,
+    "api_titles": 5, "api_title": 2, "api_episodes": 2, "api_shelves": 3, "api_facets": 5, "api_search": 5,
+    "admin": 5, "POST telegram_webhook": 1,
+}
+
+def _parse_query_budgets(text):
+    """যেমন QUERY_BUDGETS="home=2,movie_detail=3"; ভুল লেখা এন্ট্রি বাদ দিয়ে সতর্কবার্তা দেয়, অ্যাপ থামায় না।"""
+    budgets = {}
+    for item in filter(None, (item.strip() for item in text.split(","))):
+        name, _, limit = item.partition("=")
+        try: budgets[name.strip()] = int(limit)
+        except ValueError: print(f"WARNING: Ignoring malformed QUERY_BUDGETS entry '{item}'")
+    return budgets
+
+QUERY_BUDGETS.update(_parse_query_budgets(os.environ.get("QUERY_BUDGETS", "")))
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+class Span:
+    __slots__ = ("kind", "name", "start", "duration", "children")
+
+    def __init__(self, kind, name, start, duration=None):
+        self.kind, self.name, self.start, self.duration, self.children = kind, name, start, duration, []
+
+class RequestTrace:
+    def __init__(self, name):
+        self.root = Span("request", name, time.perf_counter())
+        self._stack = [self.root]
+
+    @contextmanager
+    def span(self, kind, name):
+        span = Span(kind, name, time.perf_counter())
+        self._stack[-1].children.append(span)
+        self._stack.append(span)
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - span.start
+            self._stack.pop()
+
+    def record(self, kind, name, duration):
+        """শেষ হয়ে যাওয়া একটি কল যোগ করে (শুরু = এখন - duration)।"""
+        self._stack[-1].children.append(Span(kind, name, time.perf_counter() - duration, duration))
+
+    def finish(self):
+        self.root.duration = time.perf_counter() - self.root.start
+
+    def walk(self, span=None, depth=0):
+        span = span or self.root
+        yield span, depth
+        for child in span.children:
+            yield from self.walk(child, depth + 1)
+
+    def totals(self):
+        counts, durations = defaultdict(int), defaultdict(float)
+        for span, depth in self.walk():
+            if depth and span.kind in ("mongo", "http"):
+                counts[span.kind] += 1
+                durations[span.kind] += span.duration
+            elif depth:
+                durations[span.kind] += span.duration
+        return counts, durations
+
+    def server_timing(self):
+        counts, durations = self.totals()
+        parts = [f'{kind};dur={durations[kind] * 1000:.1f}' + (f';desc="{counts[kind]} calls"' if counts[kind] else "")
+                 for kind in durations]
+        return ", ".join(parts + [f"total;dur={self.root.duration * 1000:.1f}"])
+
+    def format_tree(self):
+        return "\n".join(f"  {'  ' * depth}+{(span.start - self.root.start) * 1000:7.1f}ms {span.duration * 1000:7.1f}ms "
+                         f"[{span.kind}] {span.name}" for span, depth in self.walk())
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+
+def current_trace():
+    return _current_trace.get()
+
+@contextmanager
+def trace_span(kind, name):
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+    else:
+        with trace.span(kind, name) as span:
+            yield span
+
+def record_span(kind, name, duration):
+    trace = _current_trace.get()
+    if trace is not None: trace.record(kind, name, duration)
+
+def finish_trace(trace, response):
+    trace.finish()
+    counts, _ = trace.totals()
+    if app.debug or TRACE_HEADERS:
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["X-Query-Count"] = str(counts["mongo"])
+    if trace.root.duration * 1000 >= SLOW_REQUEST_MS:
+        print(f"Slow request: {trace.root.name} took {trace.root.duration * 1000:.1f}ms, "
+              f"{counts['mongo']} queries, {counts['http']} HTTP calls\n{trace.format_tree()}")
+    route = request.endpoint if request.method in ("GET", "HEAD") else f"{request.method} {request.endpoint}"
+    budget = QUERY_BUDGETS.get(route)
+    if budget is not None and counts["mongo"] > budget:
+        message = f"{route} ran {counts['mongo']} Mongo commands (budget {budget})\n{trace.format_tree()}"
+        if QUERY_BUDGET_STRICT: raise QueryBudgetExceeded(message)
+        print(f"Query budget exceeded: {message}")
+
+def _request_started(sender, **extra):
+    g.metrics_started_at = time.perf_counter()
+    # প্রি-রেন্ডারের ব্যাকগ্রাউন্ড রেন্ডার আসল ট্রাফিক নয়
+    if not request.environ.get(PRERENDER_BYPASS):
+        _current_trace.set(RequestTrace(f"{request.method} {request.full_path.rstrip('?')}"))
+
+def _request_finished(sender, response, **extra):
+    started_at = g.get("metrics_started_at")
+    if started_at is None or request.environ.get(PRERENDER_BYPASS): return
+    trace = _current_trace.get()
+    if trace is not None:
+        # একই থ্রেডের পরের রিকোয়েস্টে যেন পুরনো ট্রেস না থাকে
+        _current_trace.set(None)
+        # মেট্রিকের আগে: strict মোডে বাজেট ছাড়ালে এখানেই এক্সেপশন ওঠে, আর রিকোয়েস্টটি একবারই (500 হিসেবে) গোনা হয়
+        finish_trace(trace, response)
+    endpoint = request.endpoint or "unmatched"
+    http_request_seconds.observe(time.perf_counter() - started_at, endpoint=endpoint, method=request.method)
+    http_requests_total.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+
+request_started.connect(_request_started, app)
+request_finished.connect(_request_finished, app)
+
+@app.route('/metrics')
+def metrics():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return Response("Unauthorized", 401)
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
 # --- ডাটাবেস কানেকশন ---
+# gevent ওয়ার্কারে (gunicorn.conf.py) একটি প্রসেসে শত শত রিকোয়েস্ট একসাথে চলে; পুল ভরে গেলে বাকিরা অপেক্ষা করে,
+# নতুন কানেকশন খোলে না, তাই MONGO_MAX_POOL_SIZE × ওয়ার্কার সংখ্যা সার্ভারের কানেকশন সীমার মধ্যে রাখতে হবে।
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 100))
 try:
-    client = MongoClient(MONGO_URI)
-    db = client["movie_db"]
+    client = MongoClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE, event_listeners=[MongoCommandMetrics()])
+    db = client[os.environ.get("MONGO_DB_NAME", "movie_db")]
     movies = db["movies"]
     settings = db["settings"]
     feedback = db["feedback"]
+    meta = db["meta"]
+    tmdb_cache = db["tmdb_cache"]
+    ingest_queue = db["ingest_queue"]
+    deletions = db["scheduled_deletions"]
+    facets = db["facets"]
     print("SUCCESS: Successfully connected to MongoDB!")
 except Exception as e:
     print(f"FATAL: Error connecting to MongoDB: {e}. Exiting.")
     sys.exit(1)
 
+# --- ইনডেক্স ম্যানেজমেন্ট ---
+# রাউটগুলো যে ফিল্টার ও সর্ট ব্যবহার করে তার প্রতিটির জন্য ইনডেক্স এখানে ঘোষণা করা হয়।
+# create_indexes() আইডেমপোটেন্ট, তাই প্রতিবার স্টার্টআপে চালানো নিরাপদ।
+INDEXES = {
+    "movies": [
+        IndexModel([("tmdb_id", ASCENDING)], name="tmdb_id_unique", unique=True,
+                   partialFilterExpression={"tmdb_id": {"$exists": True}}),
+        IndexModel([("type", ASCENDING), ("is_coming_soon", ASCENDING), ("_id", DESCENDING)], name="type_coming_soon_recent"),
+        IndexModel([("is_coming_soon", ASCENDING), ("_id", DESCENDING)], name="coming_soon_recent"),
+        IndexModel([("is_trending", ASCENDING), ("is_coming_soon", ASCENDING), ("_id", DESCENDING)], name="trending_recent"),
+        IndexModel([("genres", ASCENDING), ("_id", DESCENDING)], name="genres_recent"),
+        IndexModel([("poster_badge", ASCENDING), ("_id", DESCENDING)], name="poster_badge_recent"),
+        IndexModel([("related_ids", ASCENDING)], name="related_ids"),
+        IndexModel([("languages", ASCENDING)], name="languages"),
+        IndexModel([("trailer_checked_at", ASCENDING)], name="trailer_checked_at"),
+    ],
+    "facets": [
+        IndexModel([("kind", ASCENDING), ("value", ASCENDING)], name="kind_value"),
+    ],
+    "tmdb_cache": [
+        # মেয়াদ শেষ হওয়া TMDb রেসপন্স মঙ্গোডিবি নিজেই মুছে ফেলে
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "ingest_queue": [
+        IndexModel([("status", ASCENDING), ("available_at", ASCENDING)], name="status_available_at"),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease"),
+        # শেষ হওয়া আপডেট এক দিন রাখা হয়, যাতে টেলিগ্রামের রিট্রাই update_id দেখে বাদ দেওয়া যায়
+        IndexModel([("done_at", ASCENDING)], name="done_at_ttl", expireAfterSeconds=86400),
+    ],
+    "scheduled_deletions": [
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease"),
+        IndexModel([("done_at", ASCENDING)], name="done_at_ttl", expireAfterSeconds=86400),
+    ],
+}
+# আর কোনো কোয়েরি ব্যবহার করে না এমন পুরনো ইনডেক্স; চালু ডিপ্লয়মেন্টে এগুলো মুছে ফেলা হয়, নইলে প্রতিটি লেখায় হালনাগাদ হতেই থাকে
+DROPPED_INDEXES = {
+    "feedback": ["timestamp_desc"],
+}
+
+def ensure_indexes():
+    for collection_name, index_models in INDEXES.items():
+        try:
+            db[collection_name].create_indexes(index_models)
+        except Exception as e:
+            # ইনডেক্স তৈরি ব্যর্থ হলেও (যেমন পুরনো ডুপ্লিকেট tmdb_id) অ্যাপ চালু থাকবে
+            print(f"ERROR: Could not create indexes on '{collection_name}': {e}")
+    for collection_name, index_names in DROPPED_INDEXES.items():
+        try:
+            existing = db[collection_name].index_information()
+            for index_name in index_names:
+                if index_name not in existing: continue
+                db[collection_name].drop_index(index_name)
+                print(f"Dropped unused index '{index_name}' on '{collection_name}'.")
+        except Exception as e:
+            print(f"ERROR: Could not drop indexes on '{collection_name}': {e}")
+
+ensure_indexes()
+
+# --- ভার্সনযুক্ত ইন-প্রসেস ক্যাশ ---
+# প্রতিটি ক্যাশের একটি ভার্সন নম্বর meta কালেকশনে থাকে। ডেটা বদলালে bump_version() ডাকা হয়,
+# আর প্রতিটি গুনিকর্ন ওয়ার্কার কয়েক সেকেন্ড পরপর শুধু ভার্সনটি দেখে প্রয়োজন হলে নতুন করে লোড করে।
+VERSION_CHECK_INTERVAL = int(os.environ.get("VERSION_CHECK_INTERVAL", 5))
+
+def bump_version(name):
+    doc = meta.find_one_and_update(
+        {"_id": name}, {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
+
+def get_version(name):
+    return (meta.find_one({"_id": name}, {"version": 1}) or {}).get("version", 0)
+
+class VersionedCache:
+    def __init__(self, name, loader, check_interval=VERSION_CHECK_INTERVAL):
+        self.name, self.loader, self.check_interval = name, loader, check_interval
+        self._value, self._version, self._checked_at, self._loaded = None, None, 0.0, False
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._loaded and time.monotonic() - self._checked_at < self.check_interval:
+            return self._value
+        with self._lock:
+            if self._loaded and time.monotonic() - self._checked_at < self.check_interval:
+                return self._value
+            try:
+                # ভার্সন আগে পড়া হয়, যাতে লোডের মাঝে হওয়া পরিবর্তন পরের চেকে ধরা পড়ে
+                version = get_version(self.name)
+                if not self._loaded or version != self._version:
+                    self._value, self._version, self._loaded = self.loader(), version, True
+            except Exception as e:
+                if not self._loaded: raise
+                print(f"Error refreshing '{self.name}' cache, serving cached copy: {e}")
+            self._checked_at = time.monotonic()
+            return self._value
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+    @property
+    def version(self):
+        self.get()
+        return self._version
+
+ads_cache = VersionedCache("ads", lambda: settings.find_one() or {})
+# যেকোনো কন্টেন্ট লেখা হলে "catalog" ভার্সন বাড়ে; মান হলো শেষ পরিবর্তনের সময় (Last-Modified এর জন্য)
+catalog_cache = VersionedCache("catalog", lambda: (meta.find_one({"_id": "catalog"}, {"updated_at": 1}) or {}).get("updated_at"))
+
 # --- Context Processor: বিজ্ঞাপনের কোড সহজলভ্য করার জন্য ---
 @app.context_processor
 def inject_ads():
-    ad_codes = settings.find_one()
-    return dict(ad_settings=(ad_codes or {}), bot_username=BOT_USERNAME)
-
-# --- মেসেজ অটো-ডিলিট ফাংশন এবং সিডিউলার সেটআপ ---
-def delete_message_after_delay(chat_id, message_id):
-    """নির্দিষ্ট সময় পর টেলিগ্রাম মেসেজ ডিলিট করার ফাংশন।"""
-    print(f"Attempting to delete message {message_id} from chat {chat_id}")
+    return dict(ad_settings=ads_cache.get(), bot_username=BOT_USERNAME)
+
+# --- টেলিগ্রাম Bot API ক্লায়েন্ট ---
+# সব Bot API কল একটি keep-alive সেশন দিয়ে যায়, টাইমআউটসহ। পাঠানোর আগে টোকেন বাকেট থেকে অনুমতি নিতে হয়:
+# একটি গ্লোবাল বাকেট (বট প্রতি ~৩০ মেসেজ/সেকেন্ড) এবং প্রতিটি চ্যাটের জন্য আলাদা বাকেট (~১ মেসেজ/সেকেন্ড)।
+# 429 এলে retry_after অনুযায়ী অপেক্ষা করে আবার চেষ্টা করা হয়। submit() কলটি কিউতে রেখে সাথে সাথে ফেরত আসে।
+TELEGRAM_GLOBAL_RATE = float(os.environ.get("TELEGRAM_GLOBAL_RATE", 25))
+TELEGRAM_CHAT_RATE = float(os.environ.get("TELEGRAM_CHAT_RATE", 1))
+TELEGRAM_CHAT_BURST = 3
+TELEGRAM_MAX_RETRIES = 3
+TELEGRAM_SENDER_THREADS = int(os.environ.get("TELEGRAM_SENDER_THREADS", 4))
+TELEGRAM_SEND_METHODS = frozenset(["sendMessage", "copyMessage", "forwardMessage", "sendDocument", "sendVideo"])
+
+class TelegramError(Exception):
+    def __init__(self, method, description, error_code=None, retry_after=None):
+        super().__init__(f"{method}: {description}")
+        self.description, self.error_code, self.retry_after = description, error_code, retry_after
+
+class TokenBucket:
+    """rate টোকেন/সেকেন্ড হারে ভরে, সর্বোচ্চ capacity টোকেন জমা থাকে। acquire() টোকেন না পাওয়া পর্যন্ত অপেক্ষা করে।"""
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity = rate, capacity
+        self._tokens, self._updated_at, self._paused_until = float(capacity), time.monotonic(), 0.0
+        self._lock = threading.Lock()
+
+    def _wait_time(self):
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                wait = self._wait_time()
+            if not wait: return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # 429 এর retry_after শেষ না হওয়া পর্যন্ত এই বাকেট থেকে কেউ টোকেন পাবে না
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class TelegramClient:
+    def __init__(self, api_url, global_rate=TELEGRAM_GLOBAL_RATE, chat_rate=TELEGRAM_CHAT_RATE, senders=TELEGRAM_SENDER_THREADS):
+        self.api_url = api_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=senders * 2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self._chat_buckets = OrderedDict()
+        self._chat_buckets_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._senders = senders
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id):
+        with self._chat_buckets_lock:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, TELEGRAM_CHAT_BURST)
+                # অনেকদিন চুপ থাকা চ্যাটের বাকেট ভরা অবস্থায় থাকে, তাই পুরনোগুলো ফেলে দিলে ক্ষতি নেই
+                while len(self._chat_buckets) > 10000:
+                    self._chat_buckets.popitem(last=False)
+            else:
+                self._chat_buckets.move_to_end(chat_id)
+            return bucket
+
+    def call(self, method, **payload):
+        """Bot API মেথড কল করে result ফেরত দেয়; ব্যর্থ হলে TelegramError।"""
+        chat_bucket = self._chat_bucket(payload["chat_id"]) if method in TELEGRAM_SEND_METHODS and "chat_id" in payload else None
+        for attempt in range(TELEGRAM_MAX_RETRIES + 1):
+            if chat_bucket: chat_bucket.acquire()
+            self.global_bucket.acquire()
+            started_at = time.perf_counter()
+            try:
+                response = self.session.post(f"{self.api_url}/{method}", json=payload, timeout=(3.05, 15))
+                result = response.json()
+            except (requests.RequestException, ValueError) as e:
+                telegram_request_seconds.observe(time.perf_counter() - started_at, method=method)
+                record_span("http", f"Telegram {method} FAILED", time.perf_counter() - started_at)
+                telegram_errors_total.inc(method=method, code=type(e).__name__)
+                # পাঠানোর মেথড শুধু তখনই আবার চেষ্টা হয় যখন রিকোয়েস্ট টেলিগ্রামে পৌঁছায়নি; রিড টাইমআউটের পর
+                # মেসেজ হয়তো চলে গেছে, তখন আবার পাঠালে ডুপ্লিকেট হয় আর প্রথমটির message_id অটো-ডিলিটে ওঠে না
+                reached_telegram = not isinstance(e, (requests.ConnectionError, requests.ConnectTimeout))
+                if attempt == TELEGRAM_MAX_RETRIES or (method in TELEGRAM_SEND_METHODS and reached_telegram):
+                    raise TelegramError(method, str(e))
+                time.sleep(2 ** attempt)
+                continue
+            telegram_request_seconds.observe(time.perf_counter() - started_at, method=method)
+            record_span("http", f"Telegram {method}", time.perf_counter() - started_at)
+            if result.get("ok"):
+                return result.get("result")
+            telegram_errors_total.inc(method=method, code=result.get("error_code", response.status_code))
+            retry_after = (result.get("parameters") or {}).get("retry_after")
+            error = TelegramError(method, result.get("description"), result.get("error_code", response.status_code), retry_after)
+            if response.status_code == 429 and retry_after and attempt < TELEGRAM_MAX_RETRIES:
+                print(f"Telegram flood limit on {method}, retrying after {retry_after}s")
+                (chat_bucket or self.global_bucket).pause(retry_after)
+                continue
+            if response.status_code >= 500 and attempt < TELEGRAM_MAX_RETRIES:
+                time.sleep(2 ** attempt)
+                continue
+            raise error
+
+    def submit(self, method, callback=None, **payload):
+        """কলটি কিউতে রেখে সাথে সাথে ফেরত আসে। callback(result, error) সেন্ডার থ্রেডে চলে।"""
+        self._ensure_started()
+        self._queue.put((method, payload, callback))
+
+    def send_message(self, chat_id, text, callback=None):
+        self.submit("sendMessage", callback=callback, chat_id=chat_id, text=text)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        if self._started: return
+        with self._start_lock:
+            if self._started: return
+            for i in range(self._senders):
+                threading.Thread(target=self._sender, daemon=True, name=f"telegram-sender-{i}").start()
+            self._started = True
+
+    def _sender(self):
+        while True:
+            method, payload, callback = self._queue.get()
+            result, error = None, None
+            try:
+                result = self.call(method, **payload)
+            except TelegramError as e:
+                error = e
+                print(f"Telegram {method} failed for chat {payload.get('chat_id')}: {e}")
+            if callback:
+                try:
+                    callback(result, error)
+                except Exception as e:
+                    print(f"Error in Telegram {method} callback: {e}")
+
+telegram = TelegramClient(TELEGRAM_API_URL)
+
+# --- মেসেজ অটো-ডিলিট কিউ ---
+# ডেলিভার করা প্রতিটি ফাইলের ডিলিট জব scheduled_deletions কালেকশনে থাকে, তাই রিস্টার্টে হারায় না।
+# প্রতিটি প্রসেসে একটি এক্সিকিউটর থ্রেড চলে, কিন্তু meta-র লিডার লিজ যার কাছে শুধু সে-ই ডিলিট করে।
+# জব নেওয়ার সময় আলাদা লিজ থাকে, ফলে লিডার বদলালেও একই মেসেজ দুবার প্রসেস হয় না।
+DELETE_AFTER = timedelta(minutes=int(os.environ.get("DELETE_AFTER_MINUTES", 30)))
+DELETION_POLL_INTERVAL = 5
+DELETION_LEADER_LEASE = timedelta(seconds=30)
+DELETION_JOB_LEASE = timedelta(minutes=2)
+DELETION_BATCH_SIZE = int(os.environ.get("DELETION_BATCH_SIZE", 50))
+DELETION_RATE = float(os.environ.get("DELETION_RATE", 20))  # প্রতি সেকেন্ডে সর্বোচ্চ deleteMessage কল; 0 হলে কোনো সীমা নেই
+DELETION_MAX_ATTEMPTS = 5
+
+def acquire_leader_lease(name, ttl):
+    """meta তে name লিজটি এই প্রসেসের নামে নেয় বা নবায়ন করে। অন্য কারো বৈধ লিজ থাকলে False।"""
+    now = datetime.utcnow()
     try:
-        url = f"{TELEGRAM_API_URL}/deleteMessage"
-        payload = {'chat_id': chat_id, 'message_id': message_id}
-        response = requests.post(url, json=payload)
-        if response.json().get('ok'):
-            print(f"Successfully deleted message {message_id} from chat {chat_id}")
-        else:
-            print(f"Failed to delete message: {response.text}")
-    except Exception as e:
-        print(f"Error in delete_message_after_delay: {e}")
+        meta.find_one_and_update(
+            {"_id": f"lease:{name}", "$or": [{"owner": WORKER_ID}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": WORKER_ID, "expires_at": now + ttl}}, upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+def schedule_message_deletion(chat_id, message_id, delay=DELETE_AFTER):
+    run_at = datetime.utcnow() + delay
+    # একই মেসেজ আবার শিডিউল হলে নতুন সময়টি থাকে (আগের replace_existing এর মতো)
+    deletions.update_one(
+        {"_id": f"{chat_id}:{message_id}"},
+        {"$set": {"chat_id": chat_id, "message_id": message_id, "run_at": run_at, "status": "pending", "attempts": 0},
+         "$unset": {"lease_expires_at": "", "done_at": "", "error": ""}},
+        upsert=True
+    )
+    return run_at
+
+def claim_due_deletion():
+    now = datetime.utcnow()
+    return deletions.find_one_and_update(
+        {"$or": [
+            {"status": "pending", "run_at": {"$lte": now}},
+            {"status": "processing", "lease_expires_at": {"$lt": now}},
+        ]},
+        {"$set": {"status": "processing", "lease_expires_at": now + DELETION_JOB_LEASE}, "$inc": {"attempts": 1}},
+        sort=[("run_at", ASCENDING)], return_document=ReturnDocument.AFTER
+    )
+
+def delete_telegram_message(chat_id, message_id):
+    """True = মেসেজ মুছে গেছে বা আর নেই; অন্য ত্রুটিতে TelegramError, পরে আবার চেষ্টা হবে।"""
+    try:
+        telegram.call("deleteMessage", chat_id=chat_id, message_id=message_id)
+    except TelegramError as e:
+        # ইউজার নিজে মুছে ফেললে বা ৪৮ ঘণ্টা পার হলে টেলিগ্রাম 400 দেয়; আবার চেষ্টা করে লাভ নেই
+        if e.error_code != 400: raise
+        print(f"Message {message_id} in chat {chat_id} can't be deleted: {e.description}")
+    return True
+
+def run_deletion_batch():
+    done = 0
+    while done < DELETION_BATCH_SIZE:
+        job = claim_due_deletion()
+        if not job: break
+        try:
+            delete_telegram_message(job['chat_id'], job['message_id'])
+            deletions.update_one({"_id": job['_id']}, {"$set": {"status": "done", "done_at": datetime.utcnow()}})
+        except Exception as e:
+            print(f"Error deleting message {job['message_id']} from chat {job['chat_id']} (attempt {job['attempts']}): {e}")
+            if job['attempts'] >= DELETION_MAX_ATTEMPTS:
+                update = {"status": "failed", "error": str(e), "done_at": datetime.utcnow()}
+            else:
+                update = {"status": "pending", "error": str(e), "run_at": datetime.utcnow() + timedelta(seconds=30 * job['attempts'])}
+            deletions.update_one({"_id": job['_id']}, {"$set": update})
+        done += 1
+        if DELETION_RATE > 0: time.sleep(1 / DELETION_RATE)
+    return done
+
+def _deletion_executor():
+    while True:
+        processed = 0
+        try:
+            if acquire_leader_lease("deletion_executor", DELETION_LEADER_LEASE):
+                processed = run_deletion_batch()
+        except Exception as e:
+            print(f"Deletion executor error: {e}")
+        # পুরো ব্যাচ হলে আরও জব বাকি থাকতে পারে, তাই অপেক্ষা ছাড়াই পরের ব্যাচ
+        if processed < DELETION_BATCH_SIZE:
+            time.sleep(DELETION_POLL_INTERVAL)
+
+def deletion_queue_stats():
+    now = datetime.utcnow()
+    return {
+        "pending": deletions.count_documents({"status": "pending"}),
+        "due": deletions.count_documents({"status": "pending", "run_at": {"$lte": now}}),
+        "processing": deletions.count_documents({"status": "processing"}),
+        "failed": deletions.count_documents({"status": "failed"}),
+        "leader": (meta.find_one({"_id": "lease:deletion_executor"}) or {}).get("owner"),
+    }
 
-# সিডিউলার তৈরি এবং চালু করা
-scheduler = BackgroundScheduler(daemon=True)
-scheduler.start()
+threading.Thread(target=_deletion_executor, daemon=True, name="deletion-executor").start()
 
 
 # ======================================================================
@@ -104,103 +798,12 @@ index_html = """
 <meta charset="UTF-8" />
 <meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=no" />
 <title>Moviez Hub - Your Entertainment Hub</title>
-<style>
-  @import url('https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;500;700&display=swap');
-  :root { --netflix-red: #E50914; --netflix-black: #141414; --text-light: #f5f5f5; --text-dark: #a0a0a0; --nav-height: 60px; }
-  * { box-sizing: border-box; margin: 0; padding: 0; }
-  body { font-family: 'Roboto', sans-serif; background-color: var(--netflix-black); color: var(--text-light); overflow-x: hidden; }
-  a { text-decoration: none; color: inherit; }
-  ::-webkit-scrollbar { width: 8px; } ::-webkit-scrollbar-track { background: #222; } ::-webkit-scrollbar-thumb { background: #555; } ::-webkit-scrollbar-thumb:hover { background: var(--netflix-red); }
-  .main-nav { position: fixed; top: 0; left: 0; width: 100%; padding: 15px 50px; display: flex; justify-content: space-between; align-items: center; z-index: 100; transition: background-color 0.3s ease; background: linear-gradient(to bottom, rgba(0,0,0,0.8) 10%, rgba(0,0,0,0)); }
-  .main-nav.scrolled { background-color: var(--netflix-black); }
-  .logo { font-family: 'Bebas Neue', sans-serif; font-size: 32px; color: var(--netflix-red); font-weight: 700; letter-spacing: 1px; }
-  .search-input { background-color: rgba(0,0,0,0.7); border: 1px solid #777; color: var(--text-light); padding: 8px 15px; border-radius: 4px; transition: width 0.3s ease, background-color 0.3s ease; width: 250px; }
-  .search-input:focus { background-color: rgba(0,0,0,0.9); border-color: var(--text-light); outline: none; }
-  .tags-section { padding: 80px 50px 20px 50px; background-color: var(--netflix-black); }
-  .tags-container { display: flex; flex-wrap: wrap; justify-content: center; gap: 10px; }
-  .tag-link { padding: 6px 16px; background-color: rgba(255, 255, 255, 0.1); border: 1px solid #444; border-radius: 50px; font-weight: 500; font-size: 0.85rem; transition: all 0.3s; }
-  .tag-link:hover { background-color: var(--netflix-red); border-color: var(--netflix-red); color: white; }
-  .hero-section { height: 85vh; position: relative; color: white; overflow: hidden; }
-  .hero-slide { position: absolute; top: 0; left: 0; width: 100%; height: 100%; background-size: cover; background-position: center top; display: flex; align-items: flex-end; padding: 50px; opacity: 0; transition: opacity 1.5s ease-in-out; z-index: 1; }
-  .hero-slide.active { opacity: 1; z-index: 2; }
-  .hero-slide::before { content: ''; position: absolute; top: 0; left: 0; right: 0; bottom: 0; background: linear-gradient(to top, var(--netflix-black) 10%, transparent 50%), linear-gradient(to right, rgba(0,0,0,0.8) 0%, transparent 60%); }
-  .hero-content { position: relative; z-index: 3; max-width: 50%; }
-  .hero-title { font-family: 'Bebas Neue', sans-serif; font-size: 5rem; font-weight: 700; margin-bottom: 1rem; line-height: 1; }
-  .hero-overview { font-size: 1.1rem; line-height: 1.5; margin-bottom: 1.5rem; max-width: 600px; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden; }
-  .hero-buttons .btn { padding: 8px 20px; margin-right: 0.8rem; border: none; border-radius: 4px; font-size: 0.9rem; font-weight: 700; cursor: pointer; transition: opacity 0.3s ease; display: inline-flex; align-items: center; gap: 8px; }
-  .btn.btn-primary { background-color: var(--netflix-red); color: white; } .btn.btn-secondary { background-color: rgba(109, 109, 110, 0.7); color: white; } .btn:hover { opacity: 0.8; }
-  main { padding: 0 50px; }
-  .movie-card {
-      width: 100%;
-      cursor: pointer;
-      transition: transform 0.3s ease, box-shadow 0.3s ease;
-      background-color: transparent;
-      display: block;
-      position: relative;
-  }
-  .movie-poster {
-      width: 100%;
-      aspect-ratio: 2 / 3;
-      object-fit: cover;
-      display: block;
-      border-radius: 4px;
-  }
-  .poster-badge {
-      position: absolute; top: 10px; left: 10px; background-color: var(--netflix-red); color: white; padding: 5px 10px; font-size: 12px; font-weight: 700; border-radius: 4px; z-index: 3; box-shadow: 0 2px 5px rgba(0,0,0,0.5);
-  }
-  .card-info-overlay {
-      position: static; background: none; opacity: 1; transform: none; padding: 8px 5px 0 5px; text-align: left;
-  }
-  .card-info-title {
-      font-size: 0.9rem; font-weight: 500; color: var(--text-light); white-space: normal; overflow: hidden; text-overflow: ellipsis; display: -webkit-box; -webkit-line-clamp: 2; -webkit-box-orient: vertical;
-  }
-  @keyframes rgb-glow { 0% { box-shadow: 0 0 12px #e50914, 0 0 4px #e50914; } 33% { box-shadow: 0 0 12px #4158D0, 0 0 4px #4158D0; } 66% { box-shadow: 0 0 12px #C850C0, 0 0 4px #C850C0; } 100% { box-shadow: 0 0 12px #e50914, 0 0 4px #e50914; } }
-  @media (hover: hover) {
-      .movie-card:hover { transform: scale(1.05); z-index: 5; }
-      .movie-card:hover .movie-poster { animation: rgb-glow 2.5s infinite linear; }
-  }
-  .full-page-grid-container { padding-top: 100px; padding-bottom: 50px; }
-  .full-page-grid-title { font-size: 2.5rem; font-weight: 700; margin-bottom: 30px; }
-  .category-grid, .full-page-grid {
-      display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 20px 15px;
-  }
-  .category-section { margin: 40px 0; }
-  .category-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; }
-  .category-title { font-family: 'Roboto', sans-serif; font-weight: 700; font-size: 1.6rem; margin: 0; }
-  .see-all-link { color: var(--text-dark); font-weight: 700; font-size: 0.9rem; }
-  .bottom-nav { display: none; position: fixed; bottom: 0; left: 0; right: 0; height: var(--nav-height); background-color: #181818; border-top: 1px solid #282828; justify-content: space-around; align-items: center; z-index: 200; }
-  .nav-item { display: flex; flex-direction: column; align-items: center; color: var(--text-dark); font-size: 10px; flex-grow: 1; padding: 5px 0; transition: color 0.2s ease; }
-  .nav-item i { font-size: 20px; margin-bottom: 4px; } .nav-item.active { color: var(--text-light); } .nav-item.active i { color: var(--netflix-red); }
-  .ad-container { margin: 40px 0; display: flex; justify-content: center; align-items: center; }
-  .telegram-join-section { background-color: #181818; padding: 40px 20px; text-align: center; margin: 50px -50px -50px -50px; }
-  .telegram-join-section .telegram-icon { font-size: 4rem; color: #2AABEE; margin-bottom: 15px; } .telegram-join-section h2 { font-family: 'Bebas Neue', sans-serif; font-size: 2.5rem; color: var(--text-light); margin-bottom: 10px; }
-  .telegram-join-section p { font-size: 1.1rem; color: var(--text-dark); max-width: 600px; margin: 0 auto 25px auto; }
-  .telegram-join-button { display: inline-flex; align-items: center; gap: 10px; background-color: #2AABEE; color: white; padding: 12px 30px; border-radius: 50px; font-size: 1.1rem; font-weight: 700; transition: all 0.2s ease; }
-  .telegram-join-button:hover { transform: scale(1.05); background-color: #1e96d1; } .telegram-join-button i { font-size: 1.3rem; }
-  @media (max-width: 768px) {
-      body { padding-bottom: var(--nav-height); } .main-nav { padding: 10px 15px; } main { padding: 0 15px; } .logo { font-size: 24px; } .search-input { width: 150px; }
-      .tags-section { padding: 80px 15px 15px 15px; } .tag-link { padding: 6px 15px; font-size: 0.8rem; } .hero-section { height: 60vh; margin: 0 -15px;}
-      .hero-slide { padding: 15px; align-items: center; } .hero-content { max-width: 90%; text-align: center; } .hero-title { font-size: 2.8rem; } .hero-overview { display: none; }
-      .category-section { margin: 25px 0; } .category-title { font-size: 1.2rem; }
-      .category-grid, .full-page-grid { grid-template-columns: repeat(auto-fill, minmax(110px, 1fr)); gap: 15px 10px; }
-      .full-page-grid-container { padding-top: 80px; } .full-page-grid-title { font-size: 1.8rem; }
-      .bottom-nav { display: flex; } .ad-container { margin: 25px 0; }
-      .telegram-join-section { margin: 50px -15px -30px -15px; }
-      .telegram-join-section h2 { font-size: 2rem; } .telegram-join-section p { font-size: 1rem; }
-  }
-</style>
+<link rel="stylesheet" href="{{ asset_url('index.css') }}">
 <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.2.0/css/all.min.css">
 </head>
 <body>
 <header class="main-nav"><a href="{{ url_for('home') }}" class="logo">Moviez Hub</a><form method="GET" action="/" class="search-form"><input type="search" name="q" class="search-input" placeholder="Search..." value="{{ query|default('') }}" /></form></header>
 <main>
-  {% macro render_movie_card(m) %}
-    <a href="{{ url_for('movie_detail', movie_id=m._id) }}" class="movie-card">
-      {% if m.poster_badge %}<div class="poster-badge">{{ m.poster_badge }}</div>{% endif %}
-      <img class="movie-poster" loading="lazy" src="{{ m.poster or 'https://via.placeholder.com/400x600.png?text=No+Image' }}" alt="{{ m.title }}">
-      <div class="card-info-overlay"><h4 class="card-info-title">{{ m.title }}</h4></div>
-    </a>
-  {% endmacro %}
 
   {% if is_full_page_list %}
     <div class="full-page-grid-container">
@@ -210,13 +813,14 @@ index_html = """
         {% else %}
             <div class="full-page-grid">
                 {% for m in movies %}
-                    {{ render_movie_card(m) }}
+                    {{ movie_card(m) }}
                 {% endfor %}
             </div>
+            {% if next_cursor %}<div class="load-more-wrap"><a id="load-more" class="load-more-btn" href="{{ url_for(request.endpoint, after=next_cursor, **request.view_args) }}" data-next="{{ next_cursor }}">Load More</a></div>{% endif %}
         {% endif %}
     </div>
   {% else %}
-    {% if all_badges %}<div class="tags-section"><div class="tags-container">{% for badge in all_badges %}<a href="{{ url_for('movies_by_badge', badge_name=badge) }}" class="tag-link">{{ badge }}</a>{% endfor %}</div></div>{% endif %}
+    {% if all_badges %}<div class="tags-section"><div class="tags-container">{% for badge in all_badges %}<a href="{{ url_for('movies_by_badge', badge_name=badge.value) }}" class="tag-link">{{ badge.value }} <span class="tag-count">{{ badge.count }}</span></a>{% endfor %}</div></div>{% endif %}
     
     {% if recently_added %}<div class="hero-section">{% for movie in recently_added %}<div class="hero-slide {% if loop.first %}active{% endif %}" style="background-image: url('{{ movie.poster or '' }}');"><div class="hero-content"><h1 class="hero-title">{{ movie.title }}</h1><p class="hero-overview">{{ movie.overview }}</p><div class="hero-buttons">{% if movie.watch_link and not movie.is_coming_soon %}<a href="{{ url_for('watch_movie', movie_id=movie._id) }}" class="btn btn-primary"><i class="fas fa-play"></i> Watch Now</a>{% endif %}<a href="{{ url_for('movie_detail', movie_id=movie._id) }}" class="btn btn-secondary"><i class="fas fa-info-circle"></i> More Info</a></div></div></div>{% endfor %}</div>{% endif %}
 
@@ -229,7 +833,7 @@ index_html = """
             </div>
             <div class="category-grid">
                 {% for m in movies_list %}
-                    {{ render_movie_card(m) }}
+                    {{ movie_card(m) }}
                 {% endfor %}
             </div>
         </div>
@@ -253,17 +857,25 @@ index_html = """
   {% endif %}
 </main>
 <nav class="bottom-nav"><a href="{{ url_for('home') }}" class="nav-item {% if request.endpoint == 'home' %}active{% endif %}"><i class="fas fa-home"></i><span>Home</span></a><a href="{{ url_for('genres_page') }}" class="nav-item {% if request.endpoint == 'genres_page' %}active{% endif %}"><i class="fas fa-layer-group"></i><span>Genres</span></a><a href="{{ url_for('contact') }}" class="nav-item {% if request.endpoint == 'contact' %}active{% endif %}"><i class="fas fa-envelope"></i><span>Request</span></a></nav>
-<script>
-    const nav = document.querySelector('.main-nav');
-    window.addEventListener('scroll', () => { window.scrollY > 50 ? nav.classList.add('scrolled') : nav.classList.remove('scrolled'); });
-    document.addEventListener('DOMContentLoaded', function() { const slides = document.querySelectorAll('.hero-slide'); if (slides.length > 1) { let currentSlide = 0; const showSlide = (index) => slides.forEach((s, i) => s.classList.toggle('active', i === index)); setInterval(() => { currentSlide = (currentSlide + 1) % slides.length; showSlide(currentSlide); }, 5000); } });
-</script>
+<script src="{{ asset_url('index.js') }}"></script>
 {% if ad_settings.popunder_code %}{{ ad_settings.popunder_code|safe }}{% endif %}
 {% if ad_settings.social_bar_code %}{{ ad_settings.social_bar_code|safe }}{% endif %}
 </body>
 </html>
 """
 
+grid_fragment_html = """
+{% for m in movies %}{{ movie_card(m) }}{% endfor %}
+"""
+
+movie_card_html = """
+<a href="{{ url_for('movie_detail', movie_id=m._id) }}" class="movie-card">
+  {% if m.poster_badge %}<div class="poster-badge">{{ m.poster_badge }}</div>{% endif %}
+  <img class="movie-poster" loading="lazy" src="{{ m.poster or 'https://via.placeholder.com/400x600.png?text=No+Image' }}" alt="{{ m.title }}">
+  {% if not compact %}<div class="card-info-overlay"><h4 class="card-info-title">{{ m.title }}</h4></div>{% endif %}
+</a>
+"""
+
 detail_html = """
 <!DOCTYPE html>
 <html lang="en">
@@ -272,54 +884,10 @@ detail_html = """
 <meta charset="UTF-8" />
 <meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=no" />
 <title>{{ movie.title if movie else "Content Not Found" }} - Moviez Hub</title>
-<style>
-  @import url('https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;500;700&display=swap');
-  :root { --netflix-red: #E50914; --netflix-black: #141414; --text-light: #f5f5f5; --text-dark: #a0a0a0; }
-  * { box-sizing: border-box; margin: 0; padding: 0; }
-  body { font-family: 'Roboto', sans-serif; background: var(--netflix-black); color: var(--text-light); }
-  .detail-header { position: absolute; top: 0; left: 0; right: 0; padding: 20px 50px; z-index: 100; }
-  .back-button { color: var(--text-light); font-size: 1.2rem; font-weight: 700; text-decoration: none; display: flex; align-items: center; gap: 10px; transition: color 0.3s ease; }
-  .back-button:hover { color: var(--netflix-red); }
-  .detail-hero { position: relative; width: 100%; display: flex; align-items: center; justify-content: center; padding: 100px 0; }
-  .detail-hero-background { position: absolute; top: 0; left: 0; right: 0; bottom: 0; background-size: cover; background-position: center; filter: blur(20px) brightness(0.4); transform: scale(1.1); }
-  .detail-hero::after { content: ''; position: absolute; top: 0; left: 0; right: 0; bottom: 0; background: linear-gradient(to top, rgba(20,20,20,1) 0%, rgba(20,20,20,0.6) 50%, rgba(20,20,20,1) 100%); }
-  .detail-content-wrapper { position: relative; z-index: 2; display: flex; gap: 40px; max-width: 1200px; padding: 0 50px; width: 100%; }
-  .detail-poster { width: 300px; height: 450px; flex-shrink: 0; border-radius: 8px; box-shadow: 0 10px 30px rgba(0,0,0,0.5); object-fit: cover; }
-  .detail-info { flex-grow: 1; max-width: 65%; }
-  .detail-title { font-family: 'Bebas Neue', sans-serif; font-size: 4.5rem; font-weight: 700; line-height: 1.1; margin-bottom: 20px; }
-  .detail-meta { display: flex; flex-wrap: wrap; gap: 20px; margin-bottom: 25px; font-size: 1rem; color: var(--text-dark); }
-  .detail-meta span { font-weight: 700; color: var(--text-light); }
-  .detail-meta span i { margin-right: 5px; color: var(--text-dark); }
-  .detail-overview { font-size: 1.1rem; line-height: 1.6; margin-bottom: 30px; }
-  .action-btn { background-color: var(--netflix-red); color: white; padding: 15px 30px; font-size: 1.2rem; font-weight: 700; border: none; border-radius: 5px; cursor: pointer; display: inline-flex; align-items: center; gap: 10px; text-decoration: none; margin-bottom: 15px; transition: all 0.2s ease; }
-  .action-btn:hover { transform: scale(1.05); background-color: #f61f29; }
-  .section-title { font-size: 1.5rem; font-weight: 700; margin-bottom: 20px; padding-bottom: 5px; border-bottom: 2px solid var(--netflix-red); display: inline-block; }
-  .video-container { position: relative; padding-bottom: 56.25%; height: 0; overflow: hidden; max-width: 100%; background: #000; border-radius: 8px; }
-  .video-container iframe { position: absolute; top: 0; left: 0; width: 100%; height: 100%; }
-  .download-section, .episode-section { margin-top: 30px; }
-  .download-button, .episode-button { display: inline-block; padding: 12px 25px; background-color: #444; color: white; text-decoration: none; border-radius: 4px; font-weight: 700; transition: background-color 0.3s ease; margin-right: 10px; margin-bottom: 10px; text-align: center; vertical-align: middle; }
-  .copy-button { background-color: #555; color: white; border: none; padding: 8px 15px; font-size: 0.9rem; cursor: pointer; border-radius: 4px; margin-left: -5px; margin-bottom: 10px; vertical-align: middle; }
-  .episode-item { display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; padding: 15px; border-radius: 5px; background-color: #1a1a1a; border-left: 4px solid var(--netflix-red); }
-  .episode-title { font-size: 1.1rem; font-weight: 500; color: #fff; }
-  .ad-container { margin: 30px 0; text-align: center; }
-  .related-section-container { padding: 40px 0; background-color: #181818; }
-  .related-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 20px 15px; padding: 0 50px; }
-  .movie-card { width: 100%; border-radius: 4px; overflow: hidden; cursor: pointer; transition: transform 0.3s ease; display: block; position: relative; }
-  .movie-poster { width: 100%; aspect-ratio: 2 / 3; object-fit: cover; display: block; }
-  .poster-badge { position: absolute; top: 10px; left: 10px; background-color: var(--netflix-red); color: white; padding: 5px 10px; font-size: 12px; font-weight: 700; border-radius: 4px; z-index: 3; }
-  @keyframes rgb-glow { 0% { box-shadow: 0 0 12px #e50914, 0 0 4px #e50914; } 33% { box-shadow: 0 0 12px #4158D0, 0 0 4px #4158D0; } 66% { box-shadow: 0 0 12px #C850C0, 0 0 4px #C850C0; } 100% { box-shadow: 0 0 12px #e50914, 0 0 4px #e50914; } }
-  @media (hover: hover) { .movie-card:hover { transform: scale(1.05); z-index: 5; animation: rgb-glow 2.5s infinite linear; } }
-  @media (max-width: 992px) { .detail-content-wrapper { flex-direction: column; align-items: center; text-align: center; } .detail-info { max-width: 100%; } .detail-title { font-size: 3.5rem; } }
-  @media (max-width: 768px) { .detail-header { padding: 20px; } .detail-hero { padding: 80px 20px 40px; } .detail-poster { width: 60%; max-width: 220px; height: auto; } .detail-title { font-size: 2.2rem; }
-  .action-btn, .download-button { display: block; width: 100%; max-width: 320px; margin: 0 auto 10px auto; }
-  .episode-item { flex-direction: column; align-items: flex-start; gap: 10px; } .episode-button { width: 100%; }
-  .section-title { margin-left: 15px !important; } .related-section-container { padding: 20px 0; }
-  .related-grid { grid-template-columns: repeat(auto-fill, minmax(110px, 1fr)); gap: 15px 10px; padding: 0 15px; } }
-</style>
+<link rel="stylesheet" href="{{ asset_url('detail.css') }}">
 <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.2.0/css/all.min.css">
 </head>
 <body>
-{% macro render_movie_card(m) %}<a href="{{ url_for('movie_detail', movie_id=m._id) }}" class="movie-card">{% if m.poster_badge %}<div class="poster-badge">{{ m.poster_badge }}</div>{% endif %}<img class="movie-poster" loading="lazy" src="{{ m.poster or 'https://via.placeholder.com/400x600.png?text=No+Image' }}" alt="{{ m.title }}"></a>{% endmacro %}
 <header class="detail-header"><a href="{{ url_for('home') }}" class="back-button"><i class="fas fa-arrow-left"></i> Back to Home</a></header>
 {% if movie %}
 <div class="detail-hero" style="min-height: auto; padding-bottom: 60px;">
@@ -353,7 +921,7 @@ detail_html = """
     </div>
   </div>
 </div>
-{% if related_movies %}<div class="related-section-container"><h3 class="section-title" style="margin-left: 50px; color: white;">You Might Also Like</h3><div class="related-grid">{% for m in related_movies %}{{ render_movie_card(m) }}{% endfor %}</div></div>{% endif %}
+{% if related_movies %}<div class="related-section-container"><h3 class="section-title" style="margin-left: 50px; color: white;">You Might Also Like</h3><div class="related-grid">{% for m in related_movies %}{{ movie_card(m, compact=True) }}{% endfor %}</div></div>{% endif %}
 {% else %}<div style="display:flex; justify-content:center; align-items:center; height:100vh;"><h2>Content not found.</h2></div>{% endif %}
 <script>
 function copyToClipboard(text) { navigator.clipboard.writeText(text).then(() => alert('Link copied!'), () => alert('Copy failed!')); }
@@ -364,10 +932,300 @@ function copyToClipboard(text) { navigator.clipboard.writeText(text).then(() =>
 </html>
 """
 
-genres_html = """
-<!DOCTYPE html>
-<html lang="en"><head><meta charset="UTF-8" /><meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=no" /><title>{{ title }} - Moviez Hub</title>
-<style>
+genres_html = """
+<!DOCTYPE html>
+<html lang="en"><head><meta charset="UTF-8" /><meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=no" /><title>{{ title }} - Moviez Hub</title>
+<link rel="stylesheet" href="{{ asset_url('genres.css') }}"><link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.2.0/css/all.min.css"></head>
+<body>
+<div class="main-container"><a href="{{ url_for('home') }}" class="back-button"><i class="fas fa-arrow-left"></i> Back to Home</a><h1 class="page-title">{{ title }}</h1>
+<div class="genre-grid">{% for genre in genres %}<a href="{{ url_for('movies_by_genre', genre_name=genre.value) }}" class="genre-card"><span>{{ genre.value }}</span><span class="genre-count">{{ genre.count }} titles</span></a>{% endfor %}</div></div>
+{% if ad_settings.popunder_code %}{{ ad_settings.popunder_code|safe }}{% endif %}
+{% if ad_settings.social_bar_code %}{{ ad_settings.social_bar_code|safe }}{% endif %}
+</body></html>
+"""
+
+watch_html = """
+<!DOCTYPE html>
+<html lang="en"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>Watching: {{ title }}</title>
+<style> body, html { margin: 0; padding: 0; height: 100%; overflow: hidden; background-color: #000; } .player-container { width: 100%; height: 100%; } .player-container iframe { width: 100%; height: 100%; border: 0; } </style></head>
+<body><div class="player-container"><iframe src="{{ watch_link }}" allowfullscreen allowtransparency allow="autoplay" scrolling="no" frameborder="0"></iframe></div>
+{% if ad_settings.popunder_code %}{{ ad_settings.popunder_code|safe }}{% endif %}
+{% if ad_settings.social_bar_code %}{{ ad_settings.social_bar_code|safe }}{% endif %}
+</body></html>
+"""
+
+admin_html = """
+<!DOCTYPE html>
+<html><head><title>Admin Panel - Moviez Hub</title><meta name="viewport" content="width=device-width, initial-scale=1" /><link rel="stylesheet" href="{{ asset_url('admin.css') }}"><link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;700&display=swap" rel="stylesheet"></head>
+<body>
+  <h2>বিজ্ঞাপন পরিচালনা (Ad Management)</h2>
+  <form action="{{ url_for('save_ads') }}" method="post"><div class="form-group"><label>Pop-Under / OnClick Ad Code</label><textarea name="popunder_code" rows="4">{{ ad_settings.popunder_code or '' }}</textarea></div><div class="form-group"><label>Social Bar / Sticky Ad Code</label><textarea name="social_bar_code" rows="4">{{ ad_settings.social_bar_code or '' }}</textarea></div><div class="form-group"><label>ব্যানার বিজ্ঞাপন কোড (Banner Ad)</label><textarea name="banner_ad_code" rows="4">{{ ad_settings.banner_ad_code or '' }}</textarea></div><div class="form-group"><label>নেটিভ ব্যানার বিজ্ঞাপন (Native Banner)</label><textarea name="native_banner_code" rows="4">{{ ad_settings.native_banner_code or '' }}</textarea></div><button type="submit">Save Ad Codes</button></form>
+  <hr class="section-divider">
+  <h2>Add New Content (Manual)</h2>
+  <form method="post" action="{{ url_for('admin') }}">
+    <div class="form-group"><label>Title (Required):</label><input type="text" name="title" required /></div>
+    <div class="form-group"><label>Content Type:</label><select name="content_type" id="content_type" onchange="toggleFields()"><option value="movie">Movie</option><option value="series">TV/Web Series</option></select></div>
+    
+    <div id="movie_fields">
+      <div class="form-group"><label>Watch Link (Embed URL):</label><input type="url" name="watch_link" /></div><hr><p><b>OR</b> Download Links (Manual)</p>
+      <div class="form-group"><label>480p Link:</label><input type="url" name="link_480p" /></div>
+      <div class="form-group"><label>720p Link:</label><input type="url" name="link_720p" /></div>
+      <div class="form-group"><label>1080p Link:</label><input type="url" name="link_1080p" /></div>
+      <hr><p><b>OR</b> Get from Telegram</p>
+      <div id="telegram_files_container"></div><button type="button" onclick="addTelegramFileField()" class="add-btn">Add Telegram File</button>
+    </div>
+    
+    <div id="episode_fields" style="display: none;">
+      <h3>Episodes</h3><div id="episodes_container"></div>
+      <button type="button" onclick="addEpisodeField()" class="add-btn">Add Episode</button>
+    </div>
+    
+    <hr style="margin: 20px 0;"><button type="submit">Add Content</button>
+  </form>
+  <hr class="section-divider">
+  <h2>Manage Content</h2>
+  <form method="get" action="{{ url_for('admin') }}" class="admin-search"><input type="text" name="q" value="{{ query }}" placeholder="Search by title or TMDb ID" /><button type="submit">Search</button>{% if query %}<a href="{{ url_for('admin') }}">Clear</a>{% endif %}</form>
+  <p class="table-meta">{% if query %}{{ all_content|length }} result(s) for "{{ query }}"{% else %}{{ content_total }} titles{% endif %}</p>
+  <table><thead><tr><th>Title</th><th>Type</th><th>Actions</th></tr></thead><tbody>{% for movie in all_content %}<tr><td>{{ movie.title }}</td><td>{{ movie.type | title }}</td><td class="action-buttons"><a href="{{ url_for('edit_movie', movie_id=movie._id) }}" class="edit-btn">Edit</a><button class="delete-btn" onclick="confirmDelete('{{ movie._id }}', '{{ movie.title }}')">Delete</button></td></tr>{% endfor %}</tbody></table>
+  <div class="pager">{% if content_after %}<a href="{{ url_for('admin', feedback_after=feedback_after) }}">« Newest</a>{% endif %}{% if content_next %}<a href="{{ url_for('admin', content_after=content_next, feedback_after=feedback_after) }}">Older »</a>{% endif %}</div>
+  <hr class="section-divider">
+  <h2>User Feedback / Reports</h2>
+  <p class="table-meta">{{ feedback_total }} messages</p>
+  {% if feedback_list %}<table><thead><tr><th>Date</th><th>Type</th><th>Title</th><th>Message</th><th>Email</th><th>Action</th></tr></thead><tbody>{% for item in feedback_list %}<tr><td style="min-width: 150px;">{{ item.timestamp.strftime('%Y-%m-%d %H:%M') }}</td><td>{{ item.type }}</td><td>{{ item.content_title }}</td><td style="white-space: pre-wrap; min-width: 300px;">{{ item.message }}</td><td>{{ item.email or 'N/A' }}</td><td><a href="{{ url_for('delete_feedback', feedback_id=item._id) }}" class="delete-btn" onclick="return confirm('Delete this feedback?');">Delete</a></td></tr>{% endfor %}</tbody></table>
+  <div class="pager">{% if feedback_after %}<a href="{{ url_for('admin', content_after=content_after) }}">« Newest</a>{% endif %}{% if feedback_next %}<a href="{{ url_for('admin', content_after=content_after, feedback_after=feedback_next) }}">Older »</a>{% endif %}</div>
+  {% else %}<p>No new feedback or reports.</p>{% endif %}
+  
+  <script src="{{ asset_url('admin.js') }}"></script>
+</body></html>
+"""
+
+edit_html = """
+<!DOCTYPE html>
+<html><head><title>Edit Content - Moviez Hub</title><meta name="viewport" content="width=device-width, initial-scale=1" /><link rel="stylesheet" href="{{ asset_url('edit.css') }}"><link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;700&display=swap" rel="stylesheet"></head>
+<body>
+  <a href="{{ url_for('admin') }}" class="back-to-admin">← Back to Admin</a>
+  <h2>Edit: {{ movie.title }}</h2>
+  <form method="post">
+    <div class="form-group"><label>Title:</label><input type="text" name="title" value="{{ movie.title }}" required /></div>
+    <div class="form-group"><label>Poster URL:</label><input type="url" name="poster" value="{{ movie.poster or '' }}" /></div><div class="form-group"><label>Overview:</label><textarea name="overview">{{ movie.overview or '' }}</textarea></div>
+    <div class="form-group"><label>Genres (comma separated):</label><input type="text" name="genres" value="{{ movie.genres|join(', ') if movie.genres else '' }}" /></div>
+    <div class="form-group"><label>Languages (comma separated):</label><input type="text" name="languages" value="{{ movie.languages|join(', ') if movie.languages else '' }}" placeholder="e.g. Hindi, English, Bangla" /></div>
+    <div class="form-group"><label>Poster Badge:</label><input type="text" name="poster_badge" value="{{ movie.poster_badge or '' }}" /></div>
+    <div class="form-group"><label>Content Type:</label><select name="content_type" id="content_type" onchange="toggleFields()"><option value="movie" {% if movie.type == 'movie' %}selected{% endif %}>Movie</option><option value="series" {% if movie.type == 'series' %}selected{% endif %}>TV/Web Series</option></select></div>
+    
+    <div id="movie_fields">
+        <div class="form-group"><label>Watch Link:</label><input type="url" name="watch_link" value="{{ movie.watch_link or '' }}" /></div><hr><p><b>OR</b> Download Links (Manual)</p>
+        <div class="form-group"><label>480p Link:</label><input type="url" name="link_480p" value="{% for l in movie.links %}{% if l.quality == '480p' %}{{ l.url }}{% endif %}{% endfor %}" /></div>
+        <div class="form-group"><label>720p Link:</label><input type="url" name="link_720p" value="{% for l in movie.links %}{% if l.quality == '720p' %}{{ l.url }}{% endif %}{% endfor %}" /></div>
+        <div class="form-group"><label>1080p Link:</label><input type="url" name="link_1080p" value="{% for l in movie.links %}{% if l.quality == '1080p' %}{{ l.url }}{% endif %}{% endfor %}" /></div>
+        <hr><p><b>OR</b> Get from Telegram</p>
+        <div id="telegram_files_container">
+            {% if movie.type == 'movie' and movie.files %}{% for file in movie.files %}
+            <div class="dynamic-item">
+                <div class="form-group"><label>Quality:</label><input type="text" name="telegram_quality[]" value="{{ file.quality }}" required /></div>
+                <div class="form-group"><label>Message ID:</label><input type="number" name="telegram_message_id[]" value="{{ file.message_id }}" required /></div>
+                <button type="button" onclick="this.parentElement.remove()" class="delete-btn">Remove</button>
+            </div>
+            {% endfor %}{% endif %}
+        </div><button type="button" onclick="addTelegramFileField()" class="add-btn">Add Telegram File</button>
+    </div>
+
+    <div id="episode_fields" style="display: none;">
+      <h3>Episodes</h3><div id="episodes_container">
+      {% if movie.type == 'series' and movie.episodes %}{% for ep in movie.episodes | sort(attribute='episode_number') | sort(attribute='season') %}<div class="dynamic-item">
+        <div class="form-group"><label>Season Number:</label><input type="number" name="episode_season[]" value="{{ ep.season or 1 }}" required /></div>
+        <div class="form-group"><label>Ep Number:</label><input type="number" name="episode_number[]" value="{{ ep.episode_number }}" required /></div>
+        <div class="form-group"><label>Ep Title:</label><input type="text" name="episode_title[]" value="{{ ep.title or '' }}" /></div>
+        <hr><p><b>Provide ONE of the following:</b></p>
+        <div class="form-group"><label>Telegram Message ID:</label><input type="number" name="episode_message_id[]" value="{{ ep.message_id or '' }}" /></div>
+        <p><b>OR</b> Watch Link:</p>
+        <div class="form-group"><label>Watch Link (Embed):</label><input type="url" name="episode_watch_link[]" value="{{ ep.watch_link or '' }}" /></div>
+        <button type="button" onclick="this.parentElement.remove()" class="delete-btn">Remove Episode</button>
+      </div>{% endfor %}{% endif %}</div><button type="button" onclick="addEpisodeField()" class="add-btn">Add Episode</button>
+    </div>
+    
+    <hr style="margin: 20px 0;">
+    <div class="form-group"><input type="checkbox" name="is_trending" value="true" {% if movie.is_trending %}checked{% endif %}><label style="display: inline-block;">Is Trending?</label></div>
+    <div class="form-group"><input type="checkbox" name="is_coming_soon" value="true" {% if movie.is_coming_soon %}checked{% endif %}><label style="display: inline-block;">Is Coming Soon?</label></div>
+    <button type="submit">Update Content</button>
+  </form>
+  
+  <script src="{{ asset_url('edit.js') }}"></script>
+</body></html>
+"""
+
+contact_html = """
+<!DOCTYPE html>
+<html lang="bn"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>Contact Us / Report - Moviez Hub</title><link rel="stylesheet" href="{{ asset_url('contact.css') }}"><link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;700&display=swap" rel="stylesheet"></head>
+<body><div class="contact-container"><h2>Contact Us</h2>
+{% if message_sent %}<div class="success-message"><p>আপনার বার্তা সফলভাবে পাঠানো হয়েছে। ধন্যবাদ!</p></div><a href="{{ url_for('home') }}" class="back-link">← Back to Home</a>
+{% else %}<form method="post"><div class="form-group"><label for="type">বিষয় (Subject):</label><select name="type" id="type"><option value="Movie Request" {% if prefill_type == 'Problem Report' %}disabled{% endif %}>Movie/Series Request</option><option value="Problem Report" {% if prefill_type == 'Problem Report' %}selected{% endif %}>Report a Problem</option><option value="General Feedback">General Feedback</option></select></div><div class="form-group"><label for="content_title">মুভি/সিরিজের নাম (Title):</label><input type="text" name="content_title" id="content_title" value="{{ prefill_title }}" required></div><div class="form-group"><label for="message">আপনার বার্তা (Message):</label><textarea name="message" id="message" required></textarea></div><div class="form-group"><label for="email">আপনার ইমেইল (Optional):</label><input type="email" name="email" id="email"></div><input type="hidden" name="reported_content_id" value="{{ prefill_id }}"><button type="submit">Submit</button></form><a href="{{ url_for('home') }}" class="back-link">← Cancel</a>{% endif %}
+</div></body></html>
+"""
+
+
+# ======================================================================
+# --- স্ট্যাটিক অ্যাসেট (CSS/JS) ---
+# ======================================================================
+# পেজগুলোর স্টাইল ও স্ক্রিপ্ট আলাদা ফাইল হিসেবে /assets থেকে যায় (নিচের অ্যাসেট পাইপলাইন দেখুন)।
+# খুব ছোট ব্লক (watch পেজের স্টাইল, detail পেজের স্ক্রিপ্ট) ইনলাইনেই রাখা হয়েছে; আলাদা রিকোয়েস্টের খরচ তার চেয়ে বেশি।
+index_css = """
+  @import url('https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;500;700&display=swap');
+  :root { --netflix-red: #E50914; --netflix-black: #141414; --text-light: #f5f5f5; --text-dark: #a0a0a0; --nav-height: 60px; }
+  * { box-sizing: border-box; margin: 0; padding: 0; }
+  body { font-family: 'Roboto', sans-serif; background-color: var(--netflix-black); color: var(--text-light); overflow-x: hidden; }
+  a { text-decoration: none; color: inherit; }
+  ::-webkit-scrollbar { width: 8px; } ::-webkit-scrollbar-track { background: #222; } ::-webkit-scrollbar-thumb { background: #555; } ::-webkit-scrollbar-thumb:hover { background: var(--netflix-red); }
+  .main-nav { position: fixed; top: 0; left: 0; width: 100%; padding: 15px 50px; display: flex; justify-content: space-between; align-items: center; z-index: 100; transition: background-color 0.3s ease; background: linear-gradient(to bottom, rgba(0,0,0,0.8) 10%, rgba(0,0,0,0)); }
+  .main-nav.scrolled { background-color: var(--netflix-black); }
+  .logo { font-family: 'Bebas Neue', sans-serif; font-size: 32px; color: var(--netflix-red); font-weight: 700; letter-spacing: 1px; }
+  .search-input { background-color: rgba(0,0,0,0.7); border: 1px solid #777; color: var(--text-light); padding: 8px 15px; border-radius: 4px; transition: width 0.3s ease, background-color 0.3s ease; width: 250px; }
+  .search-input:focus { background-color: rgba(0,0,0,0.9); border-color: var(--text-light); outline: none; }
+  .tags-section { padding: 80px 50px 20px 50px; background-color: var(--netflix-black); }
+  .tags-container { display: flex; flex-wrap: wrap; justify-content: center; gap: 10px; }
+  .tag-link { padding: 6px 16px; background-color: rgba(255, 255, 255, 0.1); border: 1px solid #444; border-radius: 50px; font-weight: 500; font-size: 0.85rem; transition: all 0.3s; }
+  .tag-link:hover { background-color: var(--netflix-red); border-color: var(--netflix-red); color: white; }
+  .tag-count { opacity: 0.6; font-size: 0.8em; margin-left: 4px; }
+  .hero-section { height: 85vh; position: relative; color: white; overflow: hidden; }
+  .hero-slide { position: absolute; top: 0; left: 0; width: 100%; height: 100%; background-size: cover; background-position: center top; display: flex; align-items: flex-end; padding: 50px; opacity: 0; transition: opacity 1.5s ease-in-out; z-index: 1; }
+  .hero-slide.active { opacity: 1; z-index: 2; }
+  .hero-slide::before { content: ''; position: absolute; top: 0; left: 0; right: 0; bottom: 0; background: linear-gradient(to top, var(--netflix-black) 10%, transparent 50%), linear-gradient(to right, rgba(0,0,0,0.8) 0%, transparent 60%); }
+  .hero-content { position: relative; z-index: 3; max-width: 50%; }
+  .hero-title { font-family: 'Bebas Neue', sans-serif; font-size: 5rem; font-weight: 700; margin-bottom: 1rem; line-height: 1; }
+  .hero-overview { font-size: 1.1rem; line-height: 1.5; margin-bottom: 1.5rem; max-width: 600px; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden; }
+  .hero-buttons .btn { padding: 8px 20px; margin-right: 0.8rem; border: none; border-radius: 4px; font-size: 0.9rem; font-weight: 700; cursor: pointer; transition: opacity 0.3s ease; display: inline-flex; align-items: center; gap: 8px; }
+  .btn.btn-primary { background-color: var(--netflix-red); color: white; } .btn.btn-secondary { background-color: rgba(109, 109, 110, 0.7); color: white; } .btn:hover { opacity: 0.8; }
+  main { padding: 0 50px; }
+  .movie-card {
+      width: 100%;
+      cursor: pointer;
+      transition: transform 0.3s ease, box-shadow 0.3s ease;
+      background-color: transparent;
+      display: block;
+      position: relative;
+  }
+  .movie-poster {
+      width: 100%;
+      aspect-ratio: 2 / 3;
+      object-fit: cover;
+      display: block;
+      border-radius: 4px;
+  }
+  .poster-badge {
+      position: absolute; top: 10px; left: 10px; background-color: var(--netflix-red); color: white; padding: 5px 10px; font-size: 12px; font-weight: 700; border-radius: 4px; z-index: 3; box-shadow: 0 2px 5px rgba(0,0,0,0.5);
+  }
+  .card-info-overlay {
+      position: static; background: none; opacity: 1; transform: none; padding: 8px 5px 0 5px; text-align: left;
+  }
+  .card-info-title {
+      font-size: 0.9rem; font-weight: 500; color: var(--text-light); white-space: normal; overflow: hidden; text-overflow: ellipsis; display: -webkit-box; -webkit-line-clamp: 2; -webkit-box-orient: vertical;
+  }
+  @keyframes rgb-glow { 0% { box-shadow: 0 0 12px #e50914, 0 0 4px #e50914; } 33% { box-shadow: 0 0 12px #4158D0, 0 0 4px #4158D0; } 66% { box-shadow: 0 0 12px #C850C0, 0 0 4px #C850C0; } 100% { box-shadow: 0 0 12px #e50914, 0 0 4px #e50914; } }
+  @media (hover: hover) {
+      .movie-card:hover { transform: scale(1.05); z-index: 5; }
+      .movie-card:hover .movie-poster { animation: rgb-glow 2.5s infinite linear; }
+  }
+  .full-page-grid-container { padding-top: 100px; padding-bottom: 50px; }
+  .full-page-grid-title { font-size: 2.5rem; font-weight: 700; margin-bottom: 30px; }
+  .category-grid, .full-page-grid {
+      display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 20px 15px;
+  }
+  .load-more-wrap { display: flex; justify-content: center; margin-top: 30px; }
+  .load-more-btn { padding: 10px 30px; border: 1px solid #444; border-radius: 50px; background-color: rgba(255, 255, 255, 0.1); font-weight: 700; transition: all 0.3s; }
+  .load-more-btn:hover { background-color: var(--netflix-red); border-color: var(--netflix-red); }
+  .category-section { margin: 40px 0; }
+  .category-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; }
+  .category-title { font-family: 'Roboto', sans-serif; font-weight: 700; font-size: 1.6rem; margin: 0; }
+  .see-all-link { color: var(--text-dark); font-weight: 700; font-size: 0.9rem; }
+  .bottom-nav { display: none; position: fixed; bottom: 0; left: 0; right: 0; height: var(--nav-height); background-color: #181818; border-top: 1px solid #282828; justify-content: space-around; align-items: center; z-index: 200; }
+  .nav-item { display: flex; flex-direction: column; align-items: center; color: var(--text-dark); font-size: 10px; flex-grow: 1; padding: 5px 0; transition: color 0.2s ease; }
+  .nav-item i { font-size: 20px; margin-bottom: 4px; } .nav-item.active { color: var(--text-light); } .nav-item.active i { color: var(--netflix-red); }
+  .ad-container { margin: 40px 0; display: flex; justify-content: center; align-items: center; }
+  .telegram-join-section { background-color: #181818; padding: 40px 20px; text-align: center; margin: 50px -50px -50px -50px; }
+  .telegram-join-section .telegram-icon { font-size: 4rem; color: #2AABEE; margin-bottom: 15px; } .telegram-join-section h2 { font-family: 'Bebas Neue', sans-serif; font-size: 2.5rem; color: var(--text-light); margin-bottom: 10px; }
+  .telegram-join-section p { font-size: 1.1rem; color: var(--text-dark); max-width: 600px; margin: 0 auto 25px auto; }
+  .telegram-join-button { display: inline-flex; align-items: center; gap: 10px; background-color: #2AABEE; color: white; padding: 12px 30px; border-radius: 50px; font-size: 1.1rem; font-weight: 700; transition: all 0.2s ease; }
+  .telegram-join-button:hover { transform: scale(1.05); background-color: #1e96d1; } .telegram-join-button i { font-size: 1.3rem; }
+  @media (max-width: 768px) {
+      body { padding-bottom: var(--nav-height); } .main-nav { padding: 10px 15px; } main { padding: 0 15px; } .logo { font-size: 24px; } .search-input { width: 150px; }
+      .tags-section { padding: 80px 15px 15px 15px; } .tag-link { padding: 6px 15px; font-size: 0.8rem; } .hero-section { height: 60vh; margin: 0 -15px;}
+      .hero-slide { padding: 15px; align-items: center; } .hero-content { max-width: 90%; text-align: center; } .hero-title { font-size: 2.8rem; } .hero-overview { display: none; }
+      .category-section { margin: 25px 0; } .category-title { font-size: 1.2rem; }
+      .category-grid, .full-page-grid { grid-template-columns: repeat(auto-fill, minmax(110px, 1fr)); gap: 15px 10px; }
+      .full-page-grid-container { padding-top: 80px; } .full-page-grid-title { font-size: 1.8rem; }
+      .bottom-nav { display: flex; } .ad-container { margin: 25px 0; }
+      .telegram-join-section { margin: 50px -15px -30px -15px; }
+      .telegram-join-section h2 { font-size: 2rem; } .telegram-join-section p { font-size: 1rem; }
+  }
+"""
+
+index_js = """
+    const nav = document.querySelector('.main-nav');
+    window.addEventListener('scroll', () => { window.scrollY > 50 ? nav.classList.add('scrolled') : nav.classList.remove('scrolled'); });
+    const loadMoreBtn = document.getElementById('load-more');
+    if (loadMoreBtn) {
+        const grid = document.querySelector('.full-page-grid'); let loading = false;
+        const loadMore = () => {
+            if (loading || !loadMoreBtn.dataset.next) return; loading = true;
+            const url = new URL(window.location.href); url.searchParams.set('after', loadMoreBtn.dataset.next); url.searchParams.set('fragment', '1');
+            fetch(url).then(r => r.text().then(html => ({ html, next: r.headers.get('X-Next-Cursor') }))).then(({ html, next }) => {
+                grid.insertAdjacentHTML('beforeend', html);
+                if (next) { loadMoreBtn.dataset.next = next; url.searchParams.set('after', next); url.searchParams.delete('fragment'); loadMoreBtn.href = url; } else { loadMoreBtn.parentElement.remove(); }
+                loading = false;
+            }).catch(() => { loading = false; });
+        };
+        loadMoreBtn.addEventListener('click', (e) => { e.preventDefault(); loadMore(); });
+        if ('IntersectionObserver' in window) { new IntersectionObserver((entries) => { if (entries[0].isIntersecting) loadMore(); }, { rootMargin: '600px' }).observe(loadMoreBtn); }
+    }
+    document.addEventListener('DOMContentLoaded', function() { const slides = document.querySelectorAll('.hero-slide'); if (slides.length > 1) { let currentSlide = 0; const showSlide = (index) => slides.forEach((s, i) => s.classList.toggle('active', i === index)); setInterval(() => { currentSlide = (currentSlide + 1) % slides.length; showSlide(currentSlide); }, 5000); } });
+"""
+
+detail_css = """
+  @import url('https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;500;700&display=swap');
+  :root { --netflix-red: #E50914; --netflix-black: #141414; --text-light: #f5f5f5; --text-dark: #a0a0a0; }
+  * { box-sizing: border-box; margin: 0; padding: 0; }
+  body { font-family: 'Roboto', sans-serif; background: var(--netflix-black); color: var(--text-light); }
+  .detail-header { position: absolute; top: 0; left: 0; right: 0; padding: 20px 50px; z-index: 100; }
+  .back-button { color: var(--text-light); font-size: 1.2rem; font-weight: 700; text-decoration: none; display: flex; align-items: center; gap: 10px; transition: color 0.3s ease; }
+  .back-button:hover { color: var(--netflix-red); }
+  .detail-hero { position: relative; width: 100%; display: flex; align-items: center; justify-content: center; padding: 100px 0; }
+  .detail-hero-background { position: absolute; top: 0; left: 0; right: 0; bottom: 0; background-size: cover; background-position: center; filter: blur(20px) brightness(0.4); transform: scale(1.1); }
+  .detail-hero::after { content: ''; position: absolute; top: 0; left: 0; right: 0; bottom: 0; background: linear-gradient(to top, rgba(20,20,20,1) 0%, rgba(20,20,20,0.6) 50%, rgba(20,20,20,1) 100%); }
+  .detail-content-wrapper { position: relative; z-index: 2; display: flex; gap: 40px; max-width: 1200px; padding: 0 50px; width: 100%; }
+  .detail-poster { width: 300px; height: 450px; flex-shrink: 0; border-radius: 8px; box-shadow: 0 10px 30px rgba(0,0,0,0.5); object-fit: cover; }
+  .detail-info { flex-grow: 1; max-width: 65%; }
+  .detail-title { font-family: 'Bebas Neue', sans-serif; font-size: 4.5rem; font-weight: 700; line-height: 1.1; margin-bottom: 20px; }
+  .detail-meta { display: flex; flex-wrap: wrap; gap: 20px; margin-bottom: 25px; font-size: 1rem; color: var(--text-dark); }
+  .detail-meta span { font-weight: 700; color: var(--text-light); }
+  .detail-meta span i { margin-right: 5px; color: var(--text-dark); }
+  .detail-overview { font-size: 1.1rem; line-height: 1.6; margin-bottom: 30px; }
+  .action-btn { background-color: var(--netflix-red); color: white; padding: 15px 30px; font-size: 1.2rem; font-weight: 700; border: none; border-radius: 5px; cursor: pointer; display: inline-flex; align-items: center; gap: 10px; text-decoration: none; margin-bottom: 15px; transition: all 0.2s ease; }
+  .action-btn:hover { transform: scale(1.05); background-color: #f61f29; }
+  .section-title { font-size: 1.5rem; font-weight: 700; margin-bottom: 20px; padding-bottom: 5px; border-bottom: 2px solid var(--netflix-red); display: inline-block; }
+  .video-container { position: relative; padding-bottom: 56.25%; height: 0; overflow: hidden; max-width: 100%; background: #000; border-radius: 8px; }
+  .video-container iframe { position: absolute; top: 0; left: 0; width: 100%; height: 100%; }
+  .download-section, .episode-section { margin-top: 30px; }
+  .download-button, .episode-button { display: inline-block; padding: 12px 25px; background-color: #444; color: white; text-decoration: none; border-radius: 4px; font-weight: 700; transition: background-color 0.3s ease; margin-right: 10px; margin-bottom: 10px; text-align: center; vertical-align: middle; }
+  .copy-button { background-color: #555; color: white; border: none; padding: 8px 15px; font-size: 0.9rem; cursor: pointer; border-radius: 4px; margin-left: -5px; margin-bottom: 10px; vertical-align: middle; }
+  .episode-item { display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; padding: 15px; border-radius: 5px; background-color: #1a1a1a; border-left: 4px solid var(--netflix-red); }
+  .episode-title { font-size: 1.1rem; font-weight: 500; color: #fff; }
+  .ad-container { margin: 30px 0; text-align: center; }
+  .related-section-container { padding: 40px 0; background-color: #181818; }
+  .related-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 20px 15px; padding: 0 50px; }
+  .movie-card { width: 100%; border-radius: 4px; overflow: hidden; cursor: pointer; transition: transform 0.3s ease; display: block; position: relative; }
+  .movie-poster { width: 100%; aspect-ratio: 2 / 3; object-fit: cover; display: block; }
+  .poster-badge { position: absolute; top: 10px; left: 10px; background-color: var(--netflix-red); color: white; padding: 5px 10px; font-size: 12px; font-weight: 700; border-radius: 4px; z-index: 3; }
+  @keyframes rgb-glow { 0% { box-shadow: 0 0 12px #e50914, 0 0 4px #e50914; } 33% { box-shadow: 0 0 12px #4158D0, 0 0 4px #4158D0; } 66% { box-shadow: 0 0 12px #C850C0, 0 0 4px #C850C0; } 100% { box-shadow: 0 0 12px #e50914, 0 0 4px #e50914; } }
+  @media (hover: hover) { .movie-card:hover { transform: scale(1.05); z-index: 5; animation: rgb-glow 2.5s infinite linear; } }
+  @media (max-width: 992px) { .detail-content-wrapper { flex-direction: column; align-items: center; text-align: center; } .detail-info { max-width: 100%; } .detail-title { font-size: 3.5rem; } }
+  @media (max-width: 768px) { .detail-header { padding: 20px; } .detail-hero { padding: 80px 20px 40px; } .detail-poster { width: 60%; max-width: 220px; height: auto; } .detail-title { font-size: 2.2rem; }
+  .action-btn, .download-button { display: block; width: 100%; max-width: 320px; margin: 0 auto 10px auto; }
+  .episode-item { flex-direction: column; align-items: flex-start; gap: 10px; } .episode-button { width: 100%; }
+  .section-title { margin-left: 15px !important; } .related-section-container { padding: 20px 0; }
+  .related-grid { grid-template-columns: repeat(auto-fill, minmax(110px, 1fr)); gap: 15px 10px; padding: 0 15px; } }
+"""
+
+genres_css = """
   @import url('https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;500;700&display=swap');
   :root { --netflix-red: #E50914; --netflix-black: #141414; --text-light: #f5f5f5; }
   * { box-sizing: border-box; margin: 0; padding: 0; } body { font-family: 'Roboto', sans-serif; background-color: var(--netflix-black); color: var(--text-light); } a { text-decoration: none; color: inherit; }
@@ -375,30 +1233,12 @@ genres_html = """
   .back-button { color: var(--text-light); font-size: 1rem; margin-bottom: 20px; display: inline-block; } .back-button:hover { color: var(--netflix-red); }
   .genre-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 20px; }
   .genre-card { background: linear-gradient(45deg, #2c2c2c, #1a1a1a); border-radius: 8px; padding: 30px 20px; text-align: center; font-size: 1.4rem; font-weight: 700; transition: all 0.3s ease; border: 1px solid #444; }
+  .genre-card span { display: block; } .genre-card .genre-count { font-size: 0.8rem; font-weight: 400; color: #a0a0a0; margin-top: 6px; }
   .genre-card:hover { transform: translateY(-5px) scale(1.03); background: linear-gradient(45deg, var(--netflix-red), #b00710); border-color: var(--netflix-red); }
   @media (max-width: 768px) { .main-container { padding: 80px 15px 30px; } .page-title { font-size: 2.2rem; } .genre-grid { grid-template-columns: repeat(2, 1fr); gap: 15px; } .genre-card { font-size: 1.1rem; padding: 25px 15px; } }
-</style><link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.2.0/css/all.min.css"></head>
-<body>
-<div class="main-container"><a href="{{ url_for('home') }}" class="back-button"><i class="fas fa-arrow-left"></i> Back to Home</a><h1 class="page-title">{{ title }}</h1>
-<div class="genre-grid">{% for genre in genres %}<a href="{{ url_for('movies_by_genre', genre_name=genre) }}" class="genre-card"><span>{{ genre }}</span></a>{% endfor %}</div></div>
-{% if ad_settings.popunder_code %}{{ ad_settings.popunder_code|safe }}{% endif %}
-{% if ad_settings.social_bar_code %}{{ ad_settings.social_bar_code|safe }}{% endif %}
-</body></html>
-"""
-
-watch_html = """
-<!DOCTYPE html>
-<html lang="en"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>Watching: {{ title }}</title>
-<style> body, html { margin: 0; padding: 0; height: 100%; overflow: hidden; background-color: #000; } .player-container { width: 100%; height: 100%; } .player-container iframe { width: 100%; height: 100%; border: 0; } </style></head>
-<body><div class="player-container"><iframe src="{{ watch_link }}" allowfullscreen allowtransparency allow="autoplay" scrolling="no" frameborder="0"></iframe></div>
-{% if ad_settings.popunder_code %}{{ ad_settings.popunder_code|safe }}{% endif %}
-{% if ad_settings.social_bar_code %}{{ ad_settings.social_bar_code|safe }}{% endif %}
-</body></html>
 """
 
-admin_html = """
-<!DOCTYPE html>
-<html><head><title>Admin Panel - Moviez Hub</title><meta name="viewport" content="width=device-width, initial-scale=1" /><style>
+admin_css = """
 :root { --netflix-red: #E50914; --netflix-black: #141414; --dark-gray: #222; --light-gray: #333; --text-light: #f5f5f5; }
 body { font-family: 'Roboto', sans-serif; background: var(--netflix-black); color: var(--text-light); padding: 20px; }
 h2, h3 { font-family: 'Bebas Neue', sans-serif; color: var(--netflix-red); } h2 { font-size: 2.5rem; margin-bottom: 20px; } h3 { font-size: 1.5rem; margin: 20px 0 10px 0;}
@@ -414,40 +1254,13 @@ th, td { padding: 12px 15px; text-align: left; border-bottom: 1px solid var(--li
 .edit-btn { background: #007bff; } .delete-btn { background: #dc3545; }
 .dynamic-item { border: 1px solid var(--light-gray); padding: 15px; margin-bottom: 15px; border-radius: 5px; }
 hr.section-divider { border: 0; height: 2px; background-color: var(--light-gray); margin: 40px 0; }
-</style><link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;700&display=swap" rel="stylesheet"></head>
-<body>
-  <h2>বিজ্ঞাপন পরিচালনা (Ad Management)</h2>
-  <form action="{{ url_for('save_ads') }}" method="post"><div class="form-group"><label>Pop-Under / OnClick Ad Code</label><textarea name="popunder_code" rows="4">{{ ad_settings.popunder_code or '' }}</textarea></div><div class="form-group"><label>Social Bar / Sticky Ad Code</label><textarea name="social_bar_code" rows="4">{{ ad_settings.social_bar_code or '' }}</textarea></div><div class="form-group"><label>ব্যানার বিজ্ঞাপন কোড (Banner Ad)</label><textarea name="banner_ad_code" rows="4">{{ ad_settings.banner_ad_code or '' }}</textarea></div><div class="form-group"><label>নেটিভ ব্যানার বিজ্ঞাপন (Native Banner)</label><textarea name="native_banner_code" rows="4">{{ ad_settings.native_banner_code or '' }}</textarea></div><button type="submit">Save Ad Codes</button></form>
-  <hr class="section-divider">
-  <h2>Add New Content (Manual)</h2>
-  <form method="post" action="{{ url_for('admin') }}">
-    <div class="form-group"><label>Title (Required):</label><input type="text" name="title" required /></div>
-    <div class="form-group"><label>Content Type:</label><select name="content_type" id="content_type" onchange="toggleFields()"><option value="movie">Movie</option><option value="series">TV/Web Series</option></select></div>
-    
-    <div id="movie_fields">
-      <div class="form-group"><label>Watch Link (Embed URL):</label><input type="url" name="watch_link" /></div><hr><p><b>OR</b> Download Links (Manual)</p>
-      <div class="form-group"><label>480p Link:</label><input type="url" name="link_480p" /></div>
-      <div class="form-group"><label>720p Link:</label><input type="url" name="link_720p" /></div>
-      <div class="form-group"><label>1080p Link:</label><input type="url" name="link_1080p" /></div>
-      <hr><p><b>OR</b> Get from Telegram</p>
-      <div id="telegram_files_container"></div><button type="button" onclick="addTelegramFileField()" class="add-btn">Add Telegram File</button>
-    </div>
-    
-    <div id="episode_fields" style="display: none;">
-      <h3>Episodes</h3><div id="episodes_container"></div>
-      <button type="button" onclick="addEpisodeField()" class="add-btn">Add Episode</button>
-    </div>
-    
-    <hr style="margin: 20px 0;"><button type="submit">Add Content</button>
-  </form>
-  <hr class="section-divider">
-  <h2>Manage Content</h2>
-  <table><thead><tr><th>Title</th><th>Type</th><th>Actions</th></tr></thead><tbody>{% for movie in all_content %}<tr><td>{{ movie.title }}</td><td>{{ movie.type | title }}</td><td class="action-buttons"><a href="{{ url_for('edit_movie', movie_id=movie._id) }}" class="edit-btn">Edit</a><button class="delete-btn" onclick="confirmDelete('{{ movie._id }}', '{{ movie.title }}')">Delete</button></td></tr>{% endfor %}</tbody></table>
-  <hr class="section-divider">
-  <h2>User Feedback / Reports</h2>
-  {% if feedback_list %}<table><thead><tr><th>Date</th><th>Type</th><th>Title</th><th>Message</th><th>Email</th><th>Action</th></tr></thead><tbody>{% for item in feedback_list %}<tr><td style="min-width: 150px;">{{ item.timestamp.strftime('%Y-%m-%d %H:%M') }}</td><td>{{ item.type }}</td><td>{{ item.content_title }}</td><td style="white-space: pre-wrap; min-width: 300px;">{{ item.message }}</td><td>{{ item.email or 'N/A' }}</td><td><a href="{{ url_for('delete_feedback', feedback_id=item._id) }}" class="delete-btn" onclick="return confirm('Delete this feedback?');">Delete</a></td></tr>{% endfor %}</tbody></table>{% else %}<p>No new feedback or reports.</p>{% endif %}
-  
-  <script>
+form.admin-search { display: flex; gap: 10px; align-items: center; max-width: none; margin: 0 0 10px 0; padding: 15px; }
+form.admin-search a { color: var(--text-light); white-space: nowrap; }
+.table-meta { color: #a0a0a0; margin: 10px 0; }
+.pager { display: flex; justify-content: space-between; margin-top: 15px; } .pager a { color: var(--netflix-red); font-weight: bold; text-decoration: none; }
+"""
+
+admin_js = """
     function confirmDelete(id, title) { if (confirm('Delete "' + title + '"?')) window.location.href = '/delete_movie/' + id; }
     function toggleFields() { var isSeries = document.getElementById('content_type').value === 'series'; document.getElementById('episode_fields').style.display = isSeries ? 'block' : 'none'; document.getElementById('movie_fields').style.display = isSeries ? 'none' : 'block'; }
     
@@ -477,13 +1290,10 @@ hr.section-divider { border: 0; height: 2px; background-color: var(--light-gray)
     }
 
     document.addEventListener('DOMContentLoaded', toggleFields);
-  </script>
-</body></html>
+  
 """
 
-edit_html = """
-<!DOCTYPE html>
-<html><head><title>Edit Content - Moviez Hub</title><meta name="viewport" content="width=device-width, initial-scale=1" /><style>
+edit_css = """
 :root { --netflix-red: #E50914; --netflix-black: #141414; --dark-gray: #222; --light-gray: #333; --text-light: #f5f5f5; }
 body { font-family: 'Roboto', sans-serif; background: var(--netflix-black); color: var(--text-light); padding: 20px; }
 h2, h3 { font-family: 'Bebas Neue', sans-serif; color: var(--netflix-red); } h2 { font-size: 2.5rem; margin-bottom: 20px; } h3 { font-size: 1.5rem; margin: 20px 0 10px 0;}
@@ -494,56 +1304,9 @@ input[type="checkbox"] { width: auto; margin-right: 10px; transform: scale(1.2);
 button[type="submit"], .add-btn { background: var(--netflix-red); color: white; font-weight: 700; cursor: pointer; border: none; padding: 12px 25px; border-radius: 4px; font-size: 1rem; }
 .back-to-admin { display: inline-block; margin-bottom: 20px; color: var(--netflix-red); text-decoration: none; font-weight: bold; }
 .dynamic-item { border: 1px solid var(--light-gray); padding: 15px; margin-bottom: 15px; border-radius: 5px; } .delete-btn { background: #dc3545; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; }
-</style><link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;700&display=swap" rel="stylesheet"></head>
-<body>
-  <a href="{{ url_for('admin') }}" class="back-to-admin">← Back to Admin</a>
-  <h2>Edit: {{ movie.title }}</h2>
-  <form method="post">
-    <div class="form-group"><label>Title:</label><input type="text" name="title" value="{{ movie.title }}" required /></div>
-    <div class="form-group"><label>Poster URL:</label><input type="url" name="poster" value="{{ movie.poster or '' }}" /></div><div class="form-group"><label>Overview:</label><textarea name="overview">{{ movie.overview or '' }}</textarea></div>
-    <div class="form-group"><label>Genres (comma separated):</label><input type="text" name="genres" value="{{ movie.genres|join(', ') if movie.genres else '' }}" /></div>
-    <div class="form-group"><label>Languages (comma separated):</label><input type="text" name="languages" value="{{ movie.languages|join(', ') if movie.languages else '' }}" placeholder="e.g. Hindi, English, Bangla" /></div>
-    <div class="form-group"><label>Poster Badge:</label><input type="text" name="poster_badge" value="{{ movie.poster_badge or '' }}" /></div>
-    <div class="form-group"><label>Content Type:</label><select name="content_type" id="content_type" onchange="toggleFields()"><option value="movie" {% if movie.type == 'movie' %}selected{% endif %}>Movie</option><option value="series" {% if movie.type == 'series' %}selected{% endif %}>TV/Web Series</option></select></div>
-    
-    <div id="movie_fields">
-        <div class="form-group"><label>Watch Link:</label><input type="url" name="watch_link" value="{{ movie.watch_link or '' }}" /></div><hr><p><b>OR</b> Download Links (Manual)</p>
-        <div class="form-group"><label>480p Link:</label><input type="url" name="link_480p" value="{% for l in movie.links %}{% if l.quality == '480p' %}{{ l.url }}{% endif %}{% endfor %}" /></div>
-        <div class="form-group"><label>720p Link:</label><input type="url" name="link_720p" value="{% for l in movie.links %}{% if l.quality == '720p' %}{{ l.url }}{% endif %}{% endfor %}" /></div>
-        <div class="form-group"><label>1080p Link:</label><input type="url" name="link_1080p" value="{% for l in movie.links %}{% if l.quality == '1080p' %}{{ l.url }}{% endif %}{% endfor %}" /></div>
-        <hr><p><b>OR</b> Get from Telegram</p>
-        <div id="telegram_files_container">
-            {% if movie.type == 'movie' and movie.files %}{% for file in movie.files %}
-            <div class="dynamic-item">
-                <div class="form-group"><label>Quality:</label><input type="text" name="telegram_quality[]" value="{{ file.quality }}" required /></div>
-                <div class="form-group"><label>Message ID:</label><input type="number" name="telegram_message_id[]" value="{{ file.message_id }}" required /></div>
-                <button type="button" onclick="this.parentElement.remove()" class="delete-btn">Remove</button>
-            </div>
-            {% endfor %}{% endif %}
-        </div><button type="button" onclick="addTelegramFileField()" class="add-btn">Add Telegram File</button>
-    </div>
+"""
 
-    <div id="episode_fields" style="display: none;">
-      <h3>Episodes</h3><div id="episodes_container">
-      {% if movie.type == 'series' and movie.episodes %}{% for ep in movie.episodes | sort(attribute='episode_number') | sort(attribute='season') %}<div class="dynamic-item">
-        <div class="form-group"><label>Season Number:</label><input type="number" name="episode_season[]" value="{{ ep.season or 1 }}" required /></div>
-        <div class="form-group"><label>Ep Number:</label><input type="number" name="episode_number[]" value="{{ ep.episode_number }}" required /></div>
-        <div class="form-group"><label>Ep Title:</label><input type="text" name="episode_title[]" value="{{ ep.title or '' }}" /></div>
-        <hr><p><b>Provide ONE of the following:</b></p>
-        <div class="form-group"><label>Telegram Message ID:</label><input type="number" name="episode_message_id[]" value="{{ ep.message_id or '' }}" /></div>
-        <p><b>OR</b> Watch Link:</p>
-        <div class="form-group"><label>Watch Link (Embed):</label><input type="url" name="episode_watch_link[]" value="{{ ep.watch_link or '' }}" /></div>
-        <button type="button" onclick="this.parentElement.remove()" class="delete-btn">Remove Episode</button>
-      </div>{% endfor %}{% endif %}</div><button type="button" onclick="addEpisodeField()" class="add-btn">Add Episode</button>
-    </div>
-    
-    <hr style="margin: 20px 0;">
-    <div class="form-group"><input type="checkbox" name="is_trending" value="true" {% if movie.is_trending %}checked{% endif %}><label style="display: inline-block;">Is Trending?</label></div>
-    <div class="form-group"><input type="checkbox" name="is_coming_soon" value="true" {% if movie.is_coming_soon %}checked{% endif %}><label style="display: inline-block;">Is Coming Soon?</label></div>
-    <button type="submit">Update Content</button>
-  </form>
-  
-  <script>
+edit_js = """
     function toggleFields() { var isSeries = document.getElementById('content_type').value === 'series'; document.getElementById('episode_fields').style.display = isSeries ? 'block' : 'none'; document.getElementById('movie_fields').style.display = isSeries ? 'none' : 'block'; }
     
     function addTelegramFileField() {
@@ -571,13 +1334,10 @@ button[type="submit"], .add-btn { background: var(--netflix-red); color: white;
         c.appendChild(d);
     }
     document.addEventListener('DOMContentLoaded', toggleFields);
-  </script>
-</body></html>
+  
 """
 
-contact_html = """
-<!DOCTYPE html>
-<html lang="bn"><head><meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>Contact Us / Report - Moviez Hub</title><style>
+contact_css = """
 :root { --netflix-red: #E50914; --netflix-black: #141414; --dark-gray: #222; --light-gray: #333; --text-light: #f5f5f5; }
 body { font-family: 'Roboto', sans-serif; background: var(--netflix-black); color: var(--text-light); padding: 20px; display: flex; justify-content: center; align-items: center; min-height: 100vh; }
 .contact-container { max-width: 600px; width: 100%; background: var(--dark-gray); padding: 30px; border-radius: 8px; }
@@ -587,123 +1347,977 @@ input, select, textarea { width: 100%; padding: 12px; border-radius: 4px; border
 textarea { resize: vertical; min-height: 120px; } button[type="submit"] { background: var(--netflix-red); color: white; font-weight: 700; cursor: pointer; border: none; padding: 12px 25px; border-radius: 4px; font-size: 1.1rem; width: 100%; }
 .success-message { text-align: center; padding: 20px; background-color: #1f4e2c; color: #d4edda; border-radius: 5px; margin-bottom: 20px; }
 .back-link { display: block; text-align: center; margin-top: 20px; color: var(--netflix-red); text-decoration: none; font-weight: bold; }
-</style><link href="https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Roboto:wght@400;700&display=swap" rel="stylesheet"></head>
-<body><div class="contact-container"><h2>Contact Us</h2>
-{% if message_sent %}<div class="success-message"><p>আপনার বার্তা সফলভাবে পাঠানো হয়েছে। ধন্যবাদ!</p></div><a href="{{ url_for('home') }}" class="back-link">← Back to Home</a>
-{% else %}<form method="post"><div class="form-group"><label for="type">বিষয় (Subject):</label><select name="type" id="type"><option value="Movie Request" {% if prefill_type == 'Problem Report' %}disabled{% endif %}>Movie/Series Request</option><option value="Problem Report" {% if prefill_type == 'Problem Report' %}selected{% endif %}>Report a Problem</option><option value="General Feedback">General Feedback</option></select></div><div class="form-group"><label for="content_title">মুভি/সিরিজের নাম (Title):</label><input type="text" name="content_title" id="content_title" value="{{ prefill_title }}" required></div><div class="form-group"><label for="message">আপনার বার্তা (Message):</label><textarea name="message" id="message" required></textarea></div><div class="form-group"><label for="email">আপনার ইমেইল (Optional):</label><input type="email" name="email" id="email"></div><input type="hidden" name="reported_content_id" value="{{ prefill_id }}"><button type="submit">Submit</button></form><a href="{{ url_for('home') }}" class="back-link">← Cancel</a>{% endif %}
-</div></body></html>
 """
 
 
+# ======================================================================
+# --- টেমপ্লেট রেজিস্ট্রি ---
+# ======================================================================
+# সব টেমপ্লেট স্টার্টআপে একবারই কম্পাইল হয়ে Jinja-র ক্যাশে থাকে; প্রতি রিকোয়েস্টে আর পার্স হয় না।
+TEMPLATES = {
+    "index.html": index_html, "grid_fragment.html": grid_fragment_html, "movie_card.html": movie_card_html,
+    "detail.html": detail_html, "genres.html": genres_html, "watch.html": watch_html,
+    "admin.html": admin_html, "edit.html": edit_html, "contact.html": contact_html,
+}
+app.jinja_loader = DictLoader(TEMPLATES)
+
+def precompile_templates():
+    for name in TEMPLATES:
+        app.jinja_env.get_template(name)
+
+precompile_templates()
+
+# --- অ্যাসেট পাইপলাইন ---
+# স্টার্টআপে (বা --build-assets দিয়ে) প্রতিটি অ্যাসেটের কন্টেন্ট-হ্যাশযুক্ত নাম তৈরি হয় এবং gzip/brotli করে রাখা হয়।
+# নাম কন্টেন্টের উপর নির্ভর করে, তাই ব্রাউজার এক বছর পর্যন্ত যাচাই ছাড়াই ক্যাশ রাখতে পারে (immutable)।
+# brotli মডিউল ইনস্টল না থাকলে শুধু gzip।
+ASSETS = {
+    "index.css": index_css, "index.js": index_js, "detail.css": detail_css, "genres.css": genres_css,
+    "admin.css": admin_css, "admin.js": admin_js, "edit.css": edit_css, "edit.js": edit_js, "contact.css": contact_css,
+}
+ASSET_MIMETYPES = {".css": "text/css", ".js": "application/javascript"}
+# CDN বা nginx থেকে dist/assets সার্ভ করলে সেই বেস URL; খালি থাকলে অ্যাপ নিজেই /assets থেকে দেয়
+ASSET_BASE_URL = os.environ.get("ASSET_BASE_URL", "").rstrip("/")
+ASSET_MAX_AGE = 365 * 24 * 3600
+COMPRESS_MIN_SIZE = 512
+COMPRESS_MIMETYPES = {"text/html", "application/json"}
+
+BuiltAsset = namedtuple("BuiltAsset", ["name", "filename", "mimetype", "digest", "body", "gzip", "br"])
+
+def build_asset(name, source):
+    body = source.strip().encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    base, ext = os.path.splitext(name)
+    return BuiltAsset(name, f"{base}.{digest}{ext}", ASSET_MIMETYPES[ext], digest, body,
+                      gzip.compress(body, compresslevel=9, mtime=0), brotli.compress(body, quality=11) if brotli else None)
+
+_assets = {name: build_asset(name, source) for name, source in ASSETS.items()}
+_assets_by_filename = {asset.filename: asset for asset in _assets.values()}
+# এই বিল্ডের ফিঙ্গারপ্রিন্ট (অ্যাসেটের হ্যাশযুক্ত নাম + টেমপ্লেটের সোর্স)। পেজের ETag এ যোগ হয়, যাতে ডিপ্লয়ে CSS/JS বা
+# টেমপ্লেট বদলালে ব্রাউজার/CDN পুরনো HTML (যা এখন আর না থাকা অ্যাসেট URL দেখায়) 304 দিয়ে রেখে না দেয়।
+BUILD_DIGEST = hashlib.sha1(repr((sorted(_assets_by_filename), sorted(TEMPLATES.items()))).encode()).hexdigest()[:12]
+# Last-Modified কখনো এর আগে যায় না, একই কারণে
+PROCESS_STARTED_AT = datetime.utcnow()
+
+def write_assets(out_dir):
+    """হ্যাশযুক্ত ফাইল, .gz/.br কপি এবং manifest.json লেখে (CDN বা nginx এর gzip_static/brotli_static এর জন্য)।"""
+    os.makedirs(out_dir, exist_ok=True)
+    for asset in _assets.values():
+        for suffix, data in (("", asset.body), (".gz", asset.gzip), (".br", asset.br)):
+            if data is None: continue
+            with open(os.path.join(out_dir, asset.filename + suffix), "wb") as f:
+                f.write(data)
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump({asset.name: asset.filename for asset in _assets.values()}, f, indent=2)
+    return len(_assets)
+
+@app.template_global()
+def asset_url(name):
+    filename = _assets[name].filename
+    return f"{ASSET_BASE_URL}/{filename}" if ASSET_BASE_URL else url_for("static_asset", filename=filename)
+
+def _preferred_encoding(available):
+    for encoding in ("br", "gzip"):
+        if encoding in available and request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+@app.route('/assets/<filename>')
+def static_asset(filename):
+    asset = _assets_by_filename.get(filename)
+    if not asset: return "Not found", 404
+    response = Response(status=304) if request.if_none_match.contains(asset.digest) else None
+    if response is None:
+        encoding = _preferred_encoding([e for e in ("br", "gzip") if getattr(asset, e)])
+        response = Response(getattr(asset, encoding) if encoding else asset.body, mimetype=asset.mimetype)
+        if encoding: response.headers["Content-Encoding"] = encoding
+    response.set_etag(asset.digest)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = ASSET_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+@app.after_request
+def compress_response(response):
+    """ডায়নামিক HTML/JSON রেসপন্স ক্লায়েন্ট সমর্থন করলে brotli বা gzip করে পাঠানো হয়।"""
+    if (response.status_code != 200 or response.direct_passthrough or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE: return response
+    encoding = _preferred_encoding(["br", "gzip"] if brotli else ["gzip"])
+    if not encoding: return response
+    # প্রতি রিকোয়েস্টে কম্প্রেশন হয়, তাই দ্রুত লেভেল; অ্যাসেটগুলো বিল্ডের সময় সর্বোচ্চ লেভেলে করা থাকে
+    response.set_data(brotli.compress(data, quality=5) if encoding == "br" else gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+# --- মুভি কার্ডের ফ্র্যাগমেন্ট ক্যাশ ---
+# একই কার্ড প্রতিটি শেলফ ও পেজে বারবার রেন্ডার না করে (id, version) অনুযায়ী তৈরি HTML রেখে দেওয়া হয়।
+CARD_CACHE_SIZE = int(os.environ.get("CARD_CACHE_SIZE", 4000))
+_card_cache = OrderedDict()
+_card_cache_lock = threading.Lock()
+
+def card_version(m):
+    # প্রতিটি লেখায় updated_at বদলায়; updated_at না থাকা পুরনো ডকুমেন্টের জন্য কার্ডের ফিল্ডগুলোর হ্যাশ
+    return m.updated_at or hash((m.title, m.poster, m.poster_badge))
+
+@app.template_global()
+def movie_card(m, compact=False):
+    key = (m._id, card_version(m), compact)
+    with _card_cache_lock:
+        html = _card_cache.get(key)
+        if html is not None:
+            _card_cache.move_to_end(key)
+            return html
+    html = Markup(app.jinja_env.get_template("movie_card.html").render(m=m, compact=compact))
+    with _card_cache_lock:
+        _card_cache[key] = html
+        while len(_card_cache) > CARD_CACHE_SIZE:
+            _card_cache.popitem(last=False)
+    return html
+
 # ======================================================================
 # --- Helper Functions ---
 # ======================================================================
 
+# ----------------------------------------------------------------------
+# Filename parser engine: সব রেগুলার এক্সপ্রেশন মডিউল লোডের সময় একবারই কম্পাইল হয়।
+# ভাষা, কোয়ালিটি এবং জাঙ্ক ট্যাগ প্রতিটির জন্য একটি করে alternation, তাই প্রতি ফাইলনেমে কয়েকটি মাত্র স্ক্যান।
+# ----------------------------------------------------------------------
+LANGUAGE_MAP = {
+    'hindi': 'Hindi', 'hin': 'Hindi',
+    'english': 'English', 'eng': 'English',
+    'bengali': 'Bengali', 'bangla': 'Bangla', 'ben': 'Bengali',
+    'tamil': 'Tamil', 'tam': 'Tamil',
+    'telugu': 'Telugu', 'tel': 'Telugu',
+    'kannada': 'Kannada', 'kan': 'Kannada',
+    'malayalam': 'Malayalam', 'mal': 'Malayalam',
+    'dual audio': ['Hindi', 'English'],
+    'multi audio': ['Multi Audio']
+}
+PARSE_CACHE_SIZE = int(os.environ.get("PARSE_CACHE_SIZE", 4096))
+
+# লম্বা কীওয়ার্ড আগে, যাতে 'bengali' কখনো 'ben' হিসেবে মিলে না যায়
+LANGUAGE_RE = re.compile(r'\b(' + '|'.join(re.escape(k) for k in sorted(LANGUAGE_MAP, key=len, reverse=True)) + r')\b', re.I)
+QUALITY_RE = re.compile(r'(\d{3,4})p', re.I)
+JUNK_RE = re.compile(
+    r'\b(?:1080p|720p|480p|2160p|4k|uhd|web-?dl|webrip|brrip|bluray|dvdrip|hdrip|hdcam|camrip|x264|x265|hevc|avc|aac|ac3|dts|5\.1|7\.1)\b'
+    r'|\b(?:complete|pack|final|uncut|extended|remastered)\b'
+    r'|\[.*?\]|\(.*?\)', re.I)
+EXTENSION_RE = re.compile(r'\.(?:mkv|mp4|avi|m4v|mov|webm|wmv|flv|ts)$', re.I)
+SERIES_RE = re.compile(r'^(.*?)[\s\._-]*(?:S|Season)[\s\._-]?(\d{1,2})[\s\._-]*(?:E|Episode)[\s\._-]?(\d{1,3})', re.I)
+SEASON_SUFFIX_RE = re.compile(r'\b(season|s)\s*\d+\s*$', re.I)
+BRACKETS_RE = re.compile(r'\[.*?\]|\(.*?\)')
+YEAR_RE = re.compile(r'\(?(19[5-9]\d|20\d{2})\)?')
+WHITESPACE_RE = re.compile(r'\s+')
+
+def _languages_in(text):
+    found = set()
+    for keyword in LANGUAGE_RE.findall(text):
+        lang_name = LANGUAGE_MAP[keyword.lower()]
+        if isinstance(lang_name, list):
+            found.update(lang_name)
+        else:
+            found.add(lang_name)
+    return sorted(found)
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_filename(filename):
+    # এক্সটেনশন বাদ দিয়ে ডট, আন্ডারস্কোরকে স্পেস দিয়ে প্রতিস্থাপন
+    cleaned_name = EXTENSION_RE.sub('', filename).replace('.', ' ').replace('_', ' ').strip()
+    languages = _languages_in(cleaned_name)
+
+    # সিরিজ খোঁজার চেষ্টা (ফরম্যাট: S01E01, s01e01, Season 1 Episode 1)
+    series_match = SERIES_RE.search(cleaned_name)
+    if series_match:
+        title = SEASON_SUFFIX_RE.sub('', series_match.group(1).strip()).strip()
+        title = BRACKETS_RE.sub('', title).strip()
+        return {'type': 'series', 'title': title.title(), 'season': int(series_match.group(2)),
+                'episode': int(series_match.group(3)), 'languages': languages}
+
+    # মুভি: বছরের আগের অংশটুকু শিরোনাম
+    year_match = YEAR_RE.search(cleaned_name)
+    year = year_match.group(1) if year_match else None
+    title = cleaned_name[:year_match.start()] if year_match else cleaned_name
+
+    title = JUNK_RE.sub('', LANGUAGE_RE.sub('', title))
+    title = WHITESPACE_RE.sub(' ', title).strip()
+    return {'type': 'movie', 'title': title.title(), 'year': year, 'languages': languages}
+
 def parse_filename(filename):
     """
-    ফাইলের নাম থেকে মুভি/সিরিজের তথ্য এবং সকল ভাষা পার্স করার জন্য উন্নত ফাংশন।
-    এটি বিভিন্ন ফরম্যাট এবং অপ্রয়োজনীয় ট্যাগ হ্যান্ডেল করতে পারে।
+    ফাইলের নাম থেকে মুভি/সিরিজের তথ্য এবং সকল ভাষা পার্স করে।
+    ফলাফল মেমোইজ করা থাকে; প্রতি কলে নতুন কপি ফেরত দেয়, তাই কলার নিশ্চিন্তে বদলাতে পারে।
     """
-    LANGUAGE_MAP = {
-        'hindi': 'Hindi', 'hin': 'Hindi',
-        'english': 'English', 'eng': 'English',
-        'bengali': 'Bengali', 'bangla': 'Bangla', 'ben': 'Bengali',
-        'tamil': 'Tamil', 'tam': 'Tamil',
-        'telugu': 'Telugu', 'tel': 'Telugu',
-        'kannada': 'Kannada', 'kan': 'Kannada',
-        'malayalam': 'Malayalam', 'mal': 'Malayalam',
-        'dual audio': ['Hindi', 'English'],
-        'multi audio': ['Multi Audio']
-    }
+    parsed = dict(_parse_filename(filename))
+    parsed['languages'] = list(parsed['languages'])
+    return parsed
 
-    # পরিষ্কার করার জন্য ডট, আন্ডারস্কোরকে স্পেস দিয়ে প্রতিস্থাপন
-    cleaned_name = filename.replace('.', ' ').replace('_', ' ').strip()
+def parse_many(filenames):
+    """ব্যাকফিলের জন্য: অনেকগুলো ফাইলনেম একসাথে পার্স করে, ইনপুটের ক্রমেই ফলাফল দেয়।"""
+    return [parse_filename(name) for name in filenames]
 
-    # ভাষা সনাক্তকরণ
-    found_languages = []
-    temp_name_for_lang = cleaned_name.lower()
-    for keyword, lang_name in LANGUAGE_MAP.items():
-        if re.search(r'\b' + re.escape(keyword) + r'\b', temp_name_for_lang):
-            if isinstance(lang_name, list):
-                found_languages.extend(lang_name)
-            else:
-                found_languages.append(lang_name)
-    languages = sorted(list(set(found_languages))) if found_languages else []
+# --- কার্ড প্রজেকশন ---
+# তালিকা ও শেলফে শুধু কার্ডের কয়েকটি ফিল্ড লাগে; এপিসোড/ফাইলের অ্যারে মঙ্গোডিবি থেকেই আসে না।
+# updated_at আসে কার্ড ফ্র্যাগমেন্ট ক্যাশের ভার্সনের জন্য।
+CARD_FIELDS = {"title": 1, "poster": 1, "poster_badge": 1, "updated_at": 1}
+# হিরো স্লাইডারে ওভারভিউ আর Watch Now বাটনও দেখানো হয়
+HERO_FIELDS = {**CARD_FIELDS, "overview": 1, "watch_link": 1, "is_coming_soon": 1}
 
-    # সিরিজ খোঁজার চেষ্টা (বিভিন্ন ফরম্যাটের জন্য)
-    # ফরম্যাট: S01E01, s01e01, Season 1 Episode 1
-    series_match = re.search(r'^(.*?)[\s\._-]*(?:S|Season)[\s\._-]?(\d{1,2})[\s\._-]*(?:E|Episode)[\s\._-]?(\d{1,3})', cleaned_name, re.I)
-    if series_match:
-        title = series_match.group(1).strip()
-        season_num = int(series_match.group(2))
-        episode_num = int(series_match.group(3))
-        
-        # শিরোনাম থেকে সিজন নম্বর বা অন্যান্য অপ্রয়োজনীয় শব্দ বাদ দেওয়া
-        title = re.sub(r'\b(season|s)\s*\d+\s*$', '', title, flags=re.I).strip()
-        # শিরোনাম থেকে অন্যান্য ট্যাগ বাদ দেওয়া
-        title = re.sub(r'\[.*?\]', '', title).strip() # ব্র্যাকেটের ভেতরের সবকিছু
-        title = re.sub(r'\(.*?\)', '', title).strip() # প্রথম বন্ধনীর ভেতরের সবকিছু
-        
-        return {'type': 'series', 'title': title.title(), 'season': season_num, 'episode': episode_num, 'languages': languages}
-
-    # যদি সিরিজ না হয়, তাহলে মুভি হিসেবে পার্স করা হবে
-    # বছরের (সাল) অবস্থান বের করা
-    year_match = re.search(r'\(?(19[5-9]\d|20\d{2})\)?', cleaned_name)
-    year = None
-    title = cleaned_name
-    if year_match:
-        year = year_match.group(1)
-        # বছরের আগের অংশটুকু শিরোনাম হিসেবে নেওয়া
-        title = cleaned_name[:year_match.start()].strip()
-    
-    # অপ্রয়োজনীয় ট্যাগ এবং ভাষার কীওয়ার্ডগুলো বাদ দেওয়া
-    junk_patterns = [
-        r'\b(1080p|720p|480p|2160p|4k|uhd|web-?dl|webrip|brrip|bluray|dvdrip|hdrip|hdcam|camrip|x264|x265|hevc|avc|aac|ac3|dts|5\.1|7\.1)\b',
-        r'\b(complete|pack|final|uncut|extended|remastered)\b',
-        r'\[.*?\]', r'\(.*?\)'
-    ]
-    
-    # শিরোনাম থেকে ভাষার কীওয়ার্ড বাদ দেওয়া
-    for lang_key in LANGUAGE_MAP.keys():
-        title = re.sub(r'\b' + lang_key + r'\b', '', title, flags=re.I)
+class Card:
+    """লিস্টিং টেমপ্লেটের জন্য ছোট, অপরিবর্তনীয় অবজেক্ট; _id আগে থেকেই স্ট্রিং।"""
+    __slots__ = ("_id", "title", "poster", "poster_badge", "updated_at", "overview", "watch_link", "is_coming_soon")
 
-    for pattern in junk_patterns:
-        title = re.sub(pattern, '', title, flags=re.I)
-    
-    # শিরোনাম চূড়ান্তভাবে পরিষ্কার করা
-    title = re.sub(r'\s+', ' ', title).strip() # একাধিক স্পেস থাকলে একটিতে পরিণত করা
+    def __init__(self, doc):
+        for name in self.__slots__:
+            object.__setattr__(self, name, doc.get(name))
+        object.__setattr__(self, "_id", str(doc["_id"]))
 
-    return {'type': 'movie', 'title': title.title(), 'year': year, 'languages': languages}
+    def __setattr__(self, name, value):
+        raise AttributeError("Card is read-only")
+
+    def __repr__(self):
+        return f"Card({self._id!r}, {self.title!r})"
+
+    def as_dict(self):
+        return {"id": self._id, **{name: getattr(self, name) for name in self.__slots__[1:]}}
+
+def to_cards(docs):
+    return [Card(doc) for doc in docs]
 
+# ======================================================================
+# --- TMDb Client ---
+# ======================================================================
+# সব TMDb কল একটি keep-alive সেশন দিয়ে যায়: ব্যাকঅফসহ রিট্রাই, একসাথে কতগুলো কল চলবে তার সীমা,
+# এবং (title, type, year) অনুযায়ী রেসপন্স ক্যাশ (মেমোরিতে LRU + মঙ্গোডিবিতে TTL সহ, নেগেটিভ ফলাফলসহ)।
+TMDB_API_BASE = os.environ.get("TMDB_API_BASE", "https://api.themoviedb.org/3")
+TMDB_MAX_CONCURRENCY = int(os.environ.get("TMDB_MAX_CONCURRENCY", 4))
+TMDB_CACHE_TTL = timedelta(days=int(os.environ.get("TMDB_CACHE_TTL_DAYS", 7)))
+TMDB_NEGATIVE_CACHE_TTL = timedelta(hours=int(os.environ.get("TMDB_NEGATIVE_CACHE_TTL_HOURS", 6)))
+TMDB_MEMORY_CACHE_SIZE = int(os.environ.get("TMDB_MEMORY_CACHE_SIZE", 1024))
+
+tmdb_session = requests.Session()
+_tmdb_adapter = HTTPAdapter(
+    pool_connections=2, pool_maxsize=TMDB_MAX_CONCURRENCY * 2,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET"]), respect_retry_after_header=True),
+)
+tmdb_session.mount("https://", _tmdb_adapter)
+tmdb_session.mount("http://", _tmdb_adapter)
+tmdb_semaphore = threading.BoundedSemaphore(TMDB_MAX_CONCURRENCY)
+
+_tmdb_memory_cache = OrderedDict()
+_tmdb_memory_cache_lock = threading.Lock()
+# একই টাইটেলের একাধিক লুকআপ একসাথে এলে (যেমন একটি সিরিজের অনেক এপিসোড) শুধু একটি TMDb কল যাবে
+_tmdb_key_locks = [threading.Lock() for _ in range(64)]
+
+def tmdb_get(path, **params):
+    # মেট্রিক্সে id বাদ দেওয়া রাউট, যেমন /movie/{id}/videos
+    route = re.sub(r"/\d+", "/{id}", path)
+    with tmdb_semaphore:
+        started_at = time.perf_counter()
+        try:
+            res = tmdb_session.get(f"{TMDB_API_BASE}{path}", params={"api_key": TMDB_API_KEY, **params}, timeout=(3.05, 10))
+        except requests.RequestException as e:
+            tmdb_errors_total.inc(route=route, reason=type(e).__name__)
+            raise
+        finally:
+            tmdb_request_seconds.observe(time.perf_counter() - started_at, route=route)
+            record_span("http", f"TMDb GET {route}", time.perf_counter() - started_at)
+    if not res.ok: tmdb_errors_total.inc(route=route, reason=res.status_code)
+    res.raise_for_status()
+    return res.json()
+
+def tmdb_cache_key(title, content_type, year=None):
+    return f"{content_type}|{' '.join(str(title).lower().split())}|{year or ''}"
+
+def _tmdb_cache_get(key):
+    now = datetime.utcnow()
+    with _tmdb_memory_cache_lock:
+        entry = _tmdb_memory_cache.get(key)
+        if entry and entry[0] > now:
+            _tmdb_memory_cache.move_to_end(key)
+            return True, entry[1]
+    try:
+        doc = tmdb_cache.find_one({"_id": key})
+    except PyMongoError as e:
+        # ক্যাশ না পেলে সরাসরি TMDb থেকে আনা হয়, ইনজেস্ট আটকায় না
+        print(f"Error reading TMDb cache entry '{key}': {e}")
+        return False, None
+    if doc and doc["expires_at"] > now:
+        _tmdb_memory_cache_put(key, doc["expires_at"], doc.get("data"))
+        return True, doc.get("data")
+    return False, None
+
+def _tmdb_memory_cache_put(key, expires_at, data):
+    with _tmdb_memory_cache_lock:
+        _tmdb_memory_cache[key] = (expires_at, data)
+        _tmdb_memory_cache.move_to_end(key)
+        while len(_tmdb_memory_cache) > TMDB_MEMORY_CACHE_SIZE:
+            _tmdb_memory_cache.popitem(last=False)
+
+def _tmdb_cache_put(key, data):
+    expires_at = datetime.utcnow() + (TMDB_CACHE_TTL if data else TMDB_NEGATIVE_CACHE_TTL)
+    _tmdb_memory_cache_put(key, expires_at, data)
+    try:
+        tmdb_cache.replace_one({"_id": key}, {"_id": key, "data": data, "expires_at": expires_at}, upsert=True)
+    except PyMongoError as e:
+        print(f"Error saving TMDb cache entry '{key}': {e}")
+
+def _fetch_tmdb_details(title, content_type, year=None):
+    search_type = "tv" if content_type == "series" else "movie"
+    params = {"query": title}
+    if year and search_type == "movie": params["primary_release_year"] = year
+    search_res = tmdb_get(f"/search/{search_type}", **params)
+    if not search_res.get("results"): return None
+
+    tmdb_id = search_res["results"][0].get("id")
+    res = tmdb_get(f"/{search_type}/{tmdb_id}")
+
+    return {
+        "tmdb_id": tmdb_id, "title": res.get("title") if search_type == "movie" else res.get("name"),
+        "poster": f"https://image.tmdb.org/t/p/w500{res.get('poster_path')}" if res.get('poster_path') else None,
+        "overview": res.get("overview"), "release_date": res.get("release_date") if search_type == "movie" else res.get("first_air_date"),
+        "genres": [g['name'] for g in res.get("genres", [])], "vote_average": res.get("vote_average")
+    }
 
 def get_tmdb_details_from_api(title, content_type, year=None):
     if not TMDB_API_KEY: return None
-    search_type = "tv" if content_type == "series" else "movie"
-    try:
-        search_url = f"https://api.themoviedb.org/3/search/{search_type}?api_key={TMDB_API_KEY}&query={requests.utils.quote(title)}"
-        if year and search_type == "movie": search_url += f"&primary_release_year={year}"
-        search_res = requests.get(search_url, timeout=5).json()
-        if not search_res.get("results"): return None
-
-        tmdb_id = search_res["results"][0].get("id")
-        detail_url = f"https://api.themoviedb.org/3/{search_type}/{tmdb_id}?api_key={TMDB_API_KEY}"
-        res = requests.get(detail_url, timeout=5).json()
-
-        return {
-            "tmdb_id": tmdb_id, "title": res.get("title") if search_type == "movie" else res.get("name"),
-            "poster": f"https://image.tmdb.org/t/p/w500{res.get('poster_path')}" if res.get('poster_path') else None,
-            "overview": res.get("overview"), "release_date": res.get("release_date") if search_type == "movie" else res.get("first_air_date"),
-            "genres": [g['name'] for g in res.get("genres", [])], "vote_average": res.get("vote_average")
-        }
-    except requests.RequestException as e:
-        print(f"TMDb API error for '{title}': {e}")
+    key = tmdb_cache_key(title, content_type, year)
+    with _tmdb_key_locks[hash(key) % len(_tmdb_key_locks)]:
+        hit, data = _tmdb_cache_get(key)
+        if not hit:
+            try:
+                data = _fetch_tmdb_details(title, content_type, year)
+            except (requests.RequestException, ValueError) as e:
+                # নেটওয়ার্ক বা API ত্রুটি ক্যাশ করা হয় না
+                print(f"TMDb API error for '{title}': {e}")
+                return None
+            _tmdb_cache_put(key, data)
+    return dict(data) if data else None
+
+# --- ট্রেলার প্রিফেচার ---
+# ট্রেলারের key মুভি ডকুমেন্টেই রাখা হয় (ট্রেলার না থাকলে None), যাতে ডিটেইল পেজ কখনো TMDb-র জন্য অপেক্ষা না করে।
+# নতুন কন্টেন্ট তৈরি হলে বা সংরক্ষিত ফলাফল পুরনো হলে ব্যাকগ্রাউন্ডে আবার আনা হয়।
+TRAILER_TTL = timedelta(days=int(os.environ.get("TRAILER_TTL_DAYS", 7)))
+TRAILER_NEGATIVE_TTL = timedelta(hours=int(os.environ.get("TRAILER_NEGATIVE_TTL_HOURS", 24)))
+trailer_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="trailer")
+_pending_trailers = set()
+_pending_trailers_lock = threading.Lock()
+
+def fetch_trailer_key(tmdb_id, content_type):
+    tmdb_type = "tv" if content_type == "series" else "movie"
+    video_res = tmdb_get(f"/{tmdb_type}/{tmdb_id}/videos")
+    for v in video_res.get("results", []):
+        if v.get('type') == 'Trailer' and v.get('site') == 'YouTube':
+            return v.get('key')
     return None
 
+def trailer_is_stale(movie):
+    checked_at = movie.get("trailer_checked_at")
+    if not checked_at: return True
+    ttl = TRAILER_TTL if movie.get("trailer_key") else TRAILER_NEGATIVE_TTL
+    return datetime.utcnow() - checked_at > ttl
+
+def refresh_trailer(movie_id):
+    try:
+        movie = movies.find_one({"_id": movie_id}, {"tmdb_id": 1, "type": 1, "trailer_key": 1})
+        if not movie or not movie.get("tmdb_id"): return
+        trailer_key = fetch_trailer_key(movie["tmdb_id"], movie.get("type"))
+        now = datetime.utcnow()
+        update = {"trailer_key": trailer_key, "trailer_checked_at": now}
+        # শুধু ট্রেলার বদলালেই পেজের ETag বদলায়; একই ফলাফলের পুনরায় যাচাই ক্যাশ নষ্ট করে না
+        changed = trailer_key != movie.get("trailer_key")
+        if changed: update["updated_at"] = now
+        movies.update_one({"_id": movie_id}, {"$set": update})
+        if changed: mark_pages_dirty(f"/movie/{movie_id}")
+    except (requests.RequestException, ValueError) as e:
+        # সাময়িক ত্রুটিতে নেগেটিভ ফলাফল সংরক্ষণ করা হয় না, পরের ভিউতে আবার চেষ্টা হবে
+        print(f"TMDb trailer lookup failed for {movie_id}: {e}")
+    except Exception as e:
+        print(f"Error refreshing trailer for {movie_id}: {e}")
+    finally:
+        with _pending_trailers_lock:
+            _pending_trailers.discard(movie_id)
+
+def prefetch_trailer(movie_id):
+    if not TMDB_API_KEY: return
+    with _pending_trailers_lock:
+        if movie_id in _pending_trailers: return
+        _pending_trailers.add(movie_id)
+    trailer_executor.submit(refresh_trailer, movie_id)
+
+# ডিস্ক থেকে সার্ভ হওয়া ডিটেইল পেজ movie_detail এ পৌঁছায় না, তাই সেগুলোর ট্রেলার পর্যায়ক্রমে এখানে হালনাগাদ হয়
+TRAILER_SWEEP_INTERVAL = int(os.environ.get("TRAILER_SWEEP_INTERVAL", 3600))
+TRAILER_SWEEP_BATCH = 200
+
+def stale_trailer_query(now):
+    """trailer_is_stale() এর কোয়েরি রূপ।"""
+    return {"$or": [
+        {"trailer_key": None, "trailer_checked_at": {"$lt": now - TRAILER_NEGATIVE_TTL}},
+        {"trailer_key": {"$ne": None}, "trailer_checked_at": {"$lt": now - TRAILER_TTL}},
+    ]}
+
+def sweep_stale_trailers():
+    stale = movies.find(stale_trailer_query(datetime.utcnow()), {"_id": 1}).sort("trailer_checked_at", ASCENDING).limit(TRAILER_SWEEP_BATCH)
+    count = 0
+    for doc in stale:
+        prefetch_trailer(doc["_id"])
+        count += 1
+    return count
+
+def _trailer_sweeper():
+    while True:
+        try:
+            count = sweep_stale_trailers()
+            if count: print(f"Trailers: refreshing {count} stale trailers.")
+        except Exception as e:
+            print(f"Trailers: sweep failed: {e}")
+        time.sleep(TRAILER_SWEEP_INTERVAL)
+
 def process_movie_list(movie_list):
     for item in movie_list:
         if '_id' in item: item['_id'] = str(item['_id'])
     return movie_list
 
+# ======================================================================
+# --- Home Page Snapshot ---
+# ======================================================================
+# হোম পেজের প্রতিটি শেলফ নিজের ইনডেক্সড find().limit() কোয়েরিতে তৈরি হয় (প্রতিটি QUERY_SHAPES এ যাচাই করা) এবং
+# স্ন্যাপশট TTL পর্যন্ত মেমোরিতে থাকে। TTL পার হলে বা catalog ভার্সন বদলালে পুরনো স্ন্যাপশটই দেখানো হয় এবং
+# ব্যাকগ্রাউন্ডে নতুনটি তৈরি হয়; ইনজেস্টের টানা ব্যাচে প্রতিটি ভার্সন বদলে নয়, HOME_REBUILD_INTERVAL এ সর্বোচ্চ একবার।
+HOME_SHELF_LIMIT = 12
+HOME_HERO_LIMIT = 6
+HOME_CACHE_TTL = int(os.environ.get("HOME_CACHE_TTL", 60))
+HOME_REBUILD_INTERVAL = float(os.environ.get("HOME_REBUILD_INTERVAL", 5))
+
+# পূর্ণ তালিকার পেজ, হোমের শেলফ আর /api/v1/titles?list= একই ফিল্টার ব্যবহার করে
+LIST_FILTERS = {
+    "trending": {"is_trending": True, "is_coming_soon": {"$ne": True}},
+    "movies": {"type": "movie", "is_coming_soon": {"$ne": True}},
+    "series": {"type": "series", "is_coming_soon": {"$ne": True}},
+    "coming_soon": {"is_coming_soon": True},
+    "recent": {"is_coming_soon": {"$ne": True}},
+}
+# শেলফ -> (LIST_FILTERS এর কী, প্রজেকশন)
+HOME_SHELVES = {
+    "trending_movies": ("trending", CARD_FIELDS),
+    "latest_movies": ("movies", CARD_FIELDS),
+    "latest_series": ("series", CARD_FIELDS),
+    "coming_soon_movies": ("coming_soon", CARD_FIELDS),
+    "recently_added_full": ("recent", HERO_FIELDS),
+}
+
+_home_snapshot = {"data": None, "built_at": 0.0, "refreshing": False, "invalidated": False}
+_home_snapshot_lock = threading.Lock()
+
+def build_home_snapshot():
+    """হোম পেজের সব শেলফ তৈরি করে, প্রতিটি একটি ছোট ইনডেক্সড কোয়েরিতে।"""
+    # ভার্সন আগে পড়া হয়, যাতে কোয়েরিগুলোর মাঝে হওয়া পরিবর্তন পরের চেকে ধরা পড়ে
+    catalog_version, catalog_updated_at = catalog_cache.version, catalog_cache.get()
+    shelves = {name: to_cards(movies.find(LIST_FILTERS[list_name], projection).sort("_id", DESCENDING).limit(HOME_SHELF_LIMIT))
+               for name, (list_name, projection) in HOME_SHELVES.items()}
+    # হিরো স্লাইডার আলাদা কোয়েরি না করে recently_added_full থেকেই নেওয়া হয়
+    shelves["recently_added"] = shelves["recently_added_full"][:HOME_HERO_LIMIT]
+    shelves["all_badges"] = get_facets("badge")
+    shelves["catalog_version"], shelves["catalog_updated_at"] = catalog_version, catalog_updated_at
+    return shelves
+
+def refresh_home_snapshot():
+    try:
+        data = build_home_snapshot()
+        with _home_snapshot_lock:
+            _home_snapshot["data"], _home_snapshot["built_at"], _home_snapshot["invalidated"] = data, time.monotonic(), False
+    except Exception as e:
+        print(f"Error refreshing home snapshot: {e}")
+    finally:
+        with _home_snapshot_lock:
+            _home_snapshot["refreshing"] = False
+
+def get_home_snapshot():
+    catalog_version = catalog_cache.version
+    with _home_snapshot_lock:
+        data = _home_snapshot["data"]
+        age = time.monotonic() - _home_snapshot["built_at"]
+        # অন্য ওয়ার্কারে কন্টেন্ট বদলালেও catalog ভার্সন দেখে স্ন্যাপশট নতুন করে তৈরি হয়
+        is_stale = (age > HOME_CACHE_TTL or _home_snapshot["invalidated"]
+                    or (data is not None and data["catalog_version"] != catalog_version))
+        start_refresh = data is not None and is_stale and age >= HOME_REBUILD_INTERVAL and not _home_snapshot["refreshing"]
+        if start_refresh:
+            _home_snapshot["refreshing"] = True
+
+    if data is None:
+        # প্রথম রিকোয়েস্টে স্ন্যাপশট না থাকলে সরাসরি তৈরি করা হয়
+        data = build_home_snapshot()
+        with _home_snapshot_lock:
+            _home_snapshot["data"], _home_snapshot["built_at"], _home_snapshot["invalidated"] = data, time.monotonic(), False
+    elif start_refresh:
+        threading.Thread(target=refresh_home_snapshot, daemon=True).start()
+    return data
+
+def invalidate_home_snapshot():
+    """কন্টেন্ট পরিবর্তনের পর পরবর্তী রিকোয়েস্টে ব্যাকগ্রাউন্ড রিফ্রেশ চালু করার জন্য।"""
+    with _home_snapshot_lock:
+        _home_snapshot["invalidated"] = True
+
+# ======================================================================
+# --- Search Engine ---
+# ======================================================================
+# টাইটেল, জনরা ও ভাষার উপর ইন-প্রসেস ট্রাইগ্রাম ইনভার্টেড ইনডেক্স। বাংলা লেখা ল্যাটিনে
+# ট্রান্সলিটারেট করে এবং সাধারণ বানান-ভিন্নতা (ph/f, oo/u, ডাবল অক্ষর) একই রূপে এনে মেলানো হয়।
+SEARCH_RESULT_LIMIT = 48
+SEARCH_MAX_QUERY_LENGTH = 100
+SEARCH_MIN_SCORE = 0.35
+SEARCH_INDEX_REFRESH = int(os.environ.get("SEARCH_INDEX_REFRESH", 300))
+
+BENGALI_TO_LATIN = {
+    'অ': 'o', 'আ': 'a', 'ই': 'i', 'ঈ': 'i', 'উ': 'u', 'ঊ': 'u', 'ঋ': 'ri', 'এ': 'e', 'ঐ': 'oi', 'ও': 'o', 'ঔ': 'ou',
+    'া': 'a', 'ি': 'i', 'ী': 'i', 'ু': 'u', 'ূ': 'u', 'ৃ': 'ri', 'ে': 'e', 'ৈ': 'oi', 'ো': 'o', 'ৌ': 'ou',
+    'ক': 'k', 'খ': 'kh', 'গ': 'g', 'ঘ': 'gh', 'ঙ': 'ng', 'চ': 'ch', 'ছ': 'chh', 'জ': 'j', 'ঝ': 'jh', 'ঞ': 'n',
+    'ট': 't', 'ঠ': 'th', 'ড': 'd', 'ঢ': 'dh', 'ণ': 'n', 'ত': 't', 'থ': 'th', 'দ': 'd', 'ধ': 'dh', 'ন': 'n',
+    'প': 'p', 'ফ': 'ph', 'ব': 'b', 'ভ': 'bh', 'ম': 'm', 'য': 'j', 'র': 'r', 'ল': 'l', 'শ': 'sh', 'ষ': 'sh',
+    'স': 's', 'হ': 'h', 'ৎ': 't', 'ং': 'ng', 'ঃ': 'h', 'ঁ': 'n', '্': '',
+    '০': '0', '১': '1', '২': '2', '৩': '3', '৪': '4', '৫': '5', '৬': '6', '৭': '7', '৮': '8', '৯': '9',
+}
+# ড়, ঢ়, য় NFC-তে দুই অক্ষরে (ব্যঞ্জন + নুক্তা) ভেঙে যায়, তাই এগুলো আগে আলাদাভাবে বদলানো হয়
+BENGALI_NUKTA_LETTERS = {'\u09a1\u09bc': 'r', '\u09a2\u09bc': 'rh', '\u09af\u09bc': 'y'}
+BENGALI_TRANSLATION_TABLE = str.maketrans(BENGALI_TO_LATIN)
+PHONETIC_RULES = [
+    (re.compile(r'ph'), 'f'), (re.compile(r'([bdgjkt])h'), r'\1'), (re.compile(r'[sc]h+'), 's'),
+    (re.compile(r'z'), 'j'), (re.compile(r'w'), 'v'), (re.compile(r'q'), 'k'), (re.compile(r'ck'), 'k'),
+    (re.compile(r'ee|ea|ie'), 'i'), (re.compile(r'oo|ou'), 'u'), (re.compile(r'y\b'), 'i'),
+    (re.compile(r'([a-z])\1+'), r'\1'),
+]
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+def normalize_search_text(text):
+    text = unicodedata.normalize('NFC', str(text or '').lower())
+    for letter, latin in BENGALI_NUKTA_LETTERS.items():
+        text = text.replace(letter, latin)
+    text = text.translate(BENGALI_TRANSLATION_TABLE)
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    text = NON_ALNUM_RE.sub(' ', text)
+    for pattern, replacement in PHONETIC_RULES:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+def trigrams(normalized_text):
+    grams = set()
+    for word in normalized_text.split():
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+_search_index = {"docs": {}, "postings": defaultdict(set), "built": False}
+_search_index_lock = threading.Lock()
+# চলমান প্রতিটি পুরো রিবিল্ডের জন্য একটি সেট: রিবিল্ডের মাঝে update_search_index এ আসা id-গুলো এখানে জমে
+# এবং নতুন ইনডেক্স বসানোর পর আবার প্রয়োগ হয়, নইলে ওই সময়ের যোগ/এডিট পুরনো স্ন্যাপশটে হারিয়ে যায়
+_search_index_rebuilds = []
+
+def _index_entry(doc):
+    title = normalize_search_text(doc.get('title'))
+    tags = set()
+    for value in (doc.get('genres') or []) + (doc.get('languages') or []):
+        tags.update(normalize_search_text(value).split())
+    return {"title": title, "grams": trigrams(title), "tags": tags}
+
+def _add_to_index(index, doc_id, entry):
+    index["docs"][doc_id] = entry
+    for gram in entry["grams"]: index["postings"][gram].add(doc_id)
+    for tag in entry["tags"]: index["postings"]["#" + tag].add(doc_id)
+
+def _remove_from_index(index, doc_id):
+    entry = index["docs"].pop(doc_id, None)
+    if not entry: return
+    for key in list(entry["grams"]) + ["#" + tag for tag in entry["tags"]]:
+        ids = index["postings"].get(key)
+        if ids is not None:
+            ids.discard(doc_id)
+            if not ids: del index["postings"][key]
+
+def rebuild_search_index():
+    index = {"docs": {}, "postings": defaultdict(set), "built": True}
+    touched = set()
+    with _search_index_lock:
+        _search_index_rebuilds.append(touched)
+    try:
+        for doc in cooperative(movies.find({}, {"title": 1, "genres": 1, "languages": 1})):
+            _add_to_index(index, doc['_id'], _index_entry(doc))
+    except Exception:
+        with _search_index_lock: _search_index_rebuilds.remove(touched)
+        raise
+    with _search_index_lock:
+        _search_index_rebuilds.remove(touched)
+        _search_index.update(index)
+    for doc_id in touched:
+        update_search_index(doc_id)
+
+def update_search_index(doc_id):
+    """একটি ডকুমেন্ট যোগ/এডিট/ডিলিট হলে শুধু সেটির এন্ট্রি আপডেট করা হয়।"""
+    doc = movies.find_one({"_id": doc_id}, {"title": 1, "genres": 1, "languages": 1})
+    with _search_index_lock:
+        for touched in _search_index_rebuilds: touched.add(doc_id)
+        _remove_from_index(_search_index, doc_id)
+        if doc: _add_to_index(_search_index, doc_id, _index_entry(doc))
+
+def _search_index_refresher():
+    # অন্য ওয়ার্কারে হওয়া পরিবর্তনগুলো ধরার জন্য নির্দিষ্ট সময় পরপর পুরো ইনডেক্স আবার তৈরি করা হয়
+    while True:
+        try: rebuild_search_index()
+        except Exception as e: print(f"Error rebuilding search index: {e}")
+        time.sleep(SEARCH_INDEX_REFRESH)
+
+def search_ids(query, limit=SEARCH_RESULT_LIMIT):
+    normalized = normalize_search_text(query[:SEARCH_MAX_QUERY_LENGTH])
+    if not normalized: return []
+    query_grams, query_tokens = trigrams(normalized), set(normalized.split())
+    if not _search_index["built"]: rebuild_search_index()
+
+    with _search_index_lock:
+        docs, postings = _search_index["docs"], _search_index["postings"]
+        candidates = set()
+        for key in list(query_grams) + ["#" + token for token in query_tokens]:
+            candidates.update(postings.get(key, ()))
+
+        scored = []
+        for doc_id in candidates:
+            entry = docs[doc_id]
+            shared = len(query_grams & entry["grams"])
+            # কোয়েরির কতটা টাইটেলে আছে (containment) এবং টাইটেল কতটা কোয়েরির মতো (dice)
+            containment = shared / len(query_grams)
+            dice = 2 * shared / (len(query_grams) + len(entry["grams"]))
+            score = 0.7 * containment + 0.3 * dice
+            score += 0.5 * len(query_tokens & entry["tags"]) / len(query_tokens)
+            if entry["title"] == normalized: score += 0.5
+            elif entry["title"].startswith(normalized): score += 0.25
+            if score >= SEARCH_MIN_SCORE: scored.append((score, doc_id))
+
+    # সমান স্কোরে নতুন কন্টেন্ট আগে দেখানো হয়
+    scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return [doc_id for _, doc_id in scored[:limit]]
+
+def search_movies(query, limit=SEARCH_RESULT_LIMIT):
+    ranked_ids = search_ids(query, limit)
+    if not ranked_ids: return []
+    found = {doc['_id']: doc for doc in movies.find({"_id": {"$in": ranked_ids}}, CARD_FIELDS)}
+    return [found[doc_id] for doc_id in ranked_ids if doc_id in found]
+
+threading.Thread(target=_search_index_refresher, daemon=True).start()
+
+# ======================================================================
+# --- Related Titles ---
+# ======================================================================
+# "You Might Also Like" তালিকা প্রতিটি টাইটেলের ডকুমেন্টে related_ids হিসেবে আগেই হিসাব করে রাখা হয়।
+# স্কোর = জনরা মিল (টাইটেলের জনরার কত অংশ মিলেছে) + ভাষা মিল + নতুনত্ব। প্রতি জনরার সবচেয়ে নতুন
+# RELATED_CANDIDATES_PER_GENRE টি টাইটেলই ক্যান্ডিডেট, তাই বড় ক্যাটালগেও হিসাব সীমিত থাকে।
+RELATED_LIMIT = 12
+RELATED_CANDIDATES_PER_GENRE = int(os.environ.get("RELATED_CANDIDATES_PER_GENRE", 500))
+RELATED_GENRE_WEIGHT = 3.0
+RELATED_LANGUAGE_WEIGHT = 1.5
+RELATED_RECENCY_WEIGHT = 1.0
+RELATED_RECENCY_YEARS = 15
+RELATED_FEATURE_FIELDS = {"genres": 1, "languages": 1, "release_date": 1}
+# আগের তালিকাসহ, যাতে তালিকা না বদলালে লেখা (এবং updated_at/ETag বদল) এড়ানো যায়
+RELATED_UPDATE_FIELDS = {**RELATED_FEATURE_FIELDS, "related_ids": 1}
+related_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="related")
+_pending_related = set()
+_pending_related_lock = threading.Lock()
+
+def _release_year(doc):
+    release_date = doc.get("release_date")
+    if release_date and str(release_date)[:4].isdigit():
+        return int(str(release_date)[:4])
+    return doc["_id"].generation_time.year if isinstance(doc.get("_id"), ObjectId) else None
+
+def _related_score(doc, candidate, this_year):
+    genres = doc.get("genres") or []
+    overlap = len(set(genres) & set(candidate.get("genres") or []))
+    if not overlap: return 0
+    score = RELATED_GENRE_WEIGHT * overlap / len(genres)
+    if set(doc.get("languages") or []) & set(candidate.get("languages") or []):
+        score += RELATED_LANGUAGE_WEIGHT
+    year = _release_year(candidate)
+    if year:
+        score += RELATED_RECENCY_WEIGHT * max(0.0, 1 - (this_year - year) / RELATED_RECENCY_YEARS)
+    return score
+
+def rank_related(doc, candidates):
+    """ক্যান্ডিডেটদের স্কোর অনুযায়ী সাজিয়ে সেরা RELATED_LIMIT টির _id ফেরত দেয়।"""
+    this_year = datetime.utcnow().year
+    scored = []
+    for candidate in candidates:
+        if candidate["_id"] == doc["_id"]: continue
+        score = _related_score(doc, candidate, this_year)
+        if score: scored.append((score, candidate["_id"]))
+    # সমান স্কোরে নতুন কন্টেন্ট আগে
+    scored.sort(reverse=True)
+    return [doc_id for _, doc_id in scored[:RELATED_LIMIT]]
+
+def compute_related_ids(doc):
+    candidates = {}
+    for genre in doc.get("genres") or []:
+        for candidate in movies.find({"genres": genre}, RELATED_FEATURE_FIELDS).sort("_id", DESCENDING).limit(RELATED_CANDIDATES_PER_GENRE):
+            candidates[candidate["_id"]] = candidate
+    return rank_related(doc, candidates.values())
+
+def update_related(movie_id):
+    """একটি টাইটেলের তালিকা আবার হিসাব করে, সাথে তার তালিকার টাইটেলগুলোরও (সম্পর্ক প্রায় সবসময় দুদিকেই)।"""
+    doc = movies.find_one({"_id": movie_id}, RELATED_UPDATE_FIELDS)
+    if not doc:
+        # ডিলিট হওয়া টাইটেল অন্যদের তালিকা থেকে সরানো
+        backrefs = [d["_id"] for d in movies.find({"related_ids": movie_id}, {"_id": 1})]
+        movies.update_many({"_id": {"$in": backrefs}}, {"$pull": {"related_ids": movie_id}, "$set": {"updated_at": datetime.utcnow()}})
+        mark_pages_dirty(*[f"/movie/{i}" for i in backrefs])
+        return []
+    related_ids, now = compute_related_ids(doc), datetime.utcnow()
+    changed = {movie_id: related_ids} if related_ids != doc.get("related_ids") else {}
+    for neighbour in movies.find({"_id": {"$in": related_ids}}, RELATED_UPDATE_FIELDS):
+        neighbour_ids = compute_related_ids(neighbour)
+        if neighbour_ids != neighbour.get("related_ids"): changed[neighbour["_id"]] = neighbour_ids
+    if changed:
+        movies.bulk_write([UpdateOne({"_id": doc_id}, {"$set": {"related_ids": ids, "updated_at": now}})
+                           for doc_id, ids in changed.items()], ordered=False)
+        mark_pages_dirty(*[f"/movie/{doc_id}" for doc_id in changed])
+    return related_ids
+
+def _run_related_update(movie_id):
+    try:
+        update_related(movie_id)
+    except Exception as e:
+        print(f"Error updating related titles for {movie_id}: {e}")
+    finally:
+        with _pending_related_lock:
+            _pending_related.discard(movie_id)
+
+def schedule_related_update(movie_id):
+    with _pending_related_lock:
+        if movie_id in _pending_related: return
+        _pending_related.add(movie_id)
+    related_executor.submit(_run_related_update, movie_id)
+
+def rebuild_related_index():
+    """পুরো ক্যাটালগের related_ids একবারে হিসাব করে (প্রথম ডিপ্লয় বা স্কোরিং বদলালে)।"""
+    docs = list(movies.find({}, RELATED_UPDATE_FIELDS).sort("_id", DESCENDING))
+    by_genre = defaultdict(list)
+    for doc in docs:
+        for genre in doc.get("genres") or []:
+            if len(by_genre[genre]) < RELATED_CANDIDATES_PER_GENRE:
+                by_genre[genre].append(doc)
+    writes, changed, now = [], 0, datetime.utcnow()
+    for doc in cooperative(docs):
+        candidates = {c["_id"]: c for genre in doc.get("genres") or [] for c in by_genre[genre]}
+        related_ids = rank_related(doc, candidates.values())
+        # তালিকা না বদলালে ডকুমেন্ট ছোঁয়া হয় না, ফলে পুরো ক্যাটালগের ETag একসাথে বাতিল হয় না
+        if related_ids == doc.get("related_ids"): continue
+        writes.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"related_ids": related_ids, "updated_at": now}}))
+        changed += 1
+        if len(writes) >= 500:
+            movies.bulk_write(writes, ordered=False)
+            writes = []
+    if writes:
+        movies.bulk_write(writes, ordered=False)
+    print(f"Related titles: rebuilt lists for {len(docs)} titles ({changed} changed).")
+    if changed: catalog_rebuilt()
+    return len(docs)
+
+def get_related_movies(movie):
+    """ডিটেইল পেজের জন্য: সংরক্ষিত তালিকা একটি $in কোয়েরিতে আনে। তালিকা না থাকলে (পুরনো ডকুমেন্ট) এখনই হিসাব হয়।"""
+    related_ids = movie.get("related_ids")
+    if related_ids is None:
+        if not movie.get("genres"): return []
+        related_ids = compute_related_ids(movie)
+        # updated_at বদলানো হয় না: এইমাত্র রেন্ডার হওয়া পেজের ETag এই তালিকার সাথেই মেলে
+        movies.update_one({"_id": movie["_id"]}, {"$set": {"related_ids": related_ids}})
+    if not related_ids: return []
+    found = {doc["_id"]: doc for doc in movies.find({"_id": {"$in": related_ids}}, CARD_FIELDS)}
+    return [found[doc_id] for doc_id in related_ids if doc_id in found]
+
+# ======================================================================
+# --- Facets (genre / badge / language) ---
+# ======================================================================
+# প্রতিটি জনরা, ব্যাজ ও ভাষার টাইটেল সংখ্যা facets কালেকশনে জমা থাকে ({_id: "genre:Action", kind, value, count})।
+# কন্টেন্ট বদলালে শুধু প্রভাবিত ভ্যালুগুলোর সংখ্যা ইনডেক্সড count_documents দিয়ে আবার গোনা হয়;
+# টাগ ক্লাউড আর জনরা পেজ তাই পুরো কালেকশন স্ক্যান না করে একটি ছোট কোয়েরি পড়ে। সংখ্যা 0 হলে ডকুমেন্ট মুছে যায়।
+FACET_FIELDS = {"genre": "genres", "badge": "poster_badge", "language": "languages"}
+FACET_PROJECTION = {field: 1 for field in FACET_FIELDS.values()}
+
+def _facet_values(doc):
+    pairs = set()
+    for kind, field in FACET_FIELDS.items():
+        values = doc.get(field)
+        for value in values if isinstance(values, list) else [values]:
+            if value: pairs.add((kind, value))
+    return pairs
+
+def _facet_write(kind, value, count):
+    facet_id = f"{kind}:{value}"
+    if not count: return DeleteOne({"_id": facet_id})
+    return UpdateOne({"_id": facet_id}, {"$set": {"kind": kind, "value": value, "count": count}}, upsert=True)
+
+def refresh_facets(pairs):
+    """(kind, value) জোড়াগুলোর সংখ্যা নতুন করে গোনে।"""
+    writes = [_facet_write(kind, value, movies.count_documents({FACET_FIELDS[kind]: value})) for kind, value in pairs]
+    if writes: facets.bulk_write(writes, ordered=False)
+
+def rebuild_facets():
+    """সব facet শুরু থেকে তৈরি করে (প্রথম চালু বা --rebuild-facets)।"""
+    counts = {}
+    for kind, field in FACET_FIELDS.items():
+        pipeline = [{"$unwind": f"${field}"}, {"$match": {field: {"$nin": [None, ""]}}},
+                    {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+        for row in movies.aggregate(pipeline):
+            counts[(kind, row["_id"])] = row["count"]
+    stale = [(doc["kind"], doc["value"]) for doc in facets.find({}, {"kind": 1, "value": 1})]
+    writes = [_facet_write(kind, value, count) for (kind, value), count in counts.items()]
+    writes += [_facet_write(kind, value, 0) for kind, value in stale if (kind, value) not in counts]
+    if writes: facets.bulk_write(writes, ordered=False)
+    print(f"Facets: rebuilt {len(counts)} facets.")
+    catalog_rebuilt()
+    return len(counts)
+
+def get_facets(kind):
+    """[{value, count}, ...] নাম অনুযায়ী সাজানো; খালি facet থাকে না।"""
+    return list(facets.find({"kind": kind, "count": {"$gt": 0}}, {"_id": 0, "value": 1, "count": 1}).sort("value", ASCENDING))
+
+# --- কন্টেন্ট পরিবর্তনের হুক ---
+def on_content_changed(*movie_ids, previous=()):
+    """ওয়েবহুক বা অ্যাডমিন থেকে কোনো কন্টেন্ট লেখা/ডিলিট হওয়ার পর ক্যাশ ও ইনডেক্স হালনাগাদ করে।
+    previous: এডিট/ডিলিটের আগের ডকুমেন্ট, যাতে সরিয়ে ফেলা জনরা/ব্যাজের সংখ্যাও কমে।"""
+    # facet আগে হালনাগাদ হয়, যাতে নতুন catalog ভার্সনে তৈরি হোম স্ন্যাপশট সঠিক সংখ্যা পায়
+    pairs = set()
+    try:
+        pairs = set().union(*[_facet_values(doc) for doc in previous])
+        for doc in movies.find({"_id": {"$in": list(movie_ids)}}, FACET_PROJECTION): pairs |= _facet_values(doc)
+        refresh_facets(pairs)
+    except Exception as e: print(f"Error updating facets: {e}")
+    try: bump_version("catalog")
+    except Exception as e: print(f"Error bumping catalog version: {e}")
+    catalog_cache.invalidate()
+    invalidate_home_snapshot()
+    for movie_id in movie_ids:
+        try: update_search_index(movie_id)
+        except Exception as e: print(f"Error updating search index for {movie_id}: {e}")
+        schedule_related_update(movie_id)
+    if PRERENDER_DIR:
+        try: mark_pages_dirty(*affected_page_paths(movie_ids, pairs))
+        except Exception as e: print(f"Error marking pre-rendered pages dirty: {e}")
+
+def catalog_rebuilt():
+    """পুরো ক্যাটালগ জুড়ে রিবিল্ডের (related, facets) পর: কোন পেজ বদলেছে আলাদা করে জানা নেই, তাই সব
+    ক্যাশ, ETag ও প্রি-রেন্ডার করা পেজ একসাথে বাতিল হয়।"""
+    try: bump_version("catalog")
+    except Exception as e: print(f"Error bumping catalog version: {e}")
+    catalog_cache.invalidate()
+    invalidate_home_snapshot()
+    try: clear_prerendered()
+    except Exception as e: print(f"Error clearing pre-rendered pages: {e}")
+
+# --- HTTP কন্ডিশনাল ক্যাশিং ---
+# পাবলিক পেজগুলো ETag ও Last-Modified পাঠায়। ETag তৈরি হয় URL, BUILD_DIGEST, বিজ্ঞাপন ভার্সন এবং পেজের ডেটার ভার্সন
+# (catalog ভার্সন, ডিটেইল পেজে ডকুমেন্টের updated_at) থেকে, তাই DB কোয়েরি বা রেন্ডারিং ছাড়াই হিসাব হয়।
+# ক্লায়েন্টের কপি হালনাগাদ থাকলে render() না ডেকেই 304 ফেরত যায়।
+PAGE_MAX_AGE = int(os.environ.get("PAGE_MAX_AGE", 60))
+
+def _http_date(dt):
+    # HTTP তারিখে সেকেন্ডের ভগ্নাংশ থাকে না
+    return dt.replace(microsecond=0, tzinfo=timezone.utc) if dt else None
+
+def cached_page(render, *version_parts, last_modified=None, max_age=PAGE_MAX_AGE):
+    etag = hashlib.sha1(repr((request.full_path, BUILD_DIGEST, ads_cache.version) + version_parts).encode()).hexdigest()[:24]
+    last_modified = _http_date(max(last_modified, PROCESS_STARTED_AT) if last_modified else None)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+
+    if not_modified:
+        response = Response(status=304)
+    else:
+        with trace_span("render", request.endpoint):
+            response = make_response(render())
+    response.set_etag(etag, weak=True)
+    if last_modified: response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+# ======================================================================
+# --- Query Plan Verification ---
+# ======================================================================
+# রাউটগুলোর প্রতিটি কোয়েরি শেপ এখানে তালিকাভুক্ত। `python info.py --check-indexes`
+# প্রতিটির explain() চালায় এবং কোনোটি COLLSCAN হলে ব্যর্থ হয়।
+QUERY_SHAPES = [
+    # (নাম, কালেকশন, ফিল্টার, সর্ট)
+    ("movie_by_id", "movies", {"_id": ObjectId()}, None),
+    ("webhook_tmdb_lookup", "movies", {"tmdb_id": 0}, None),
+    ("trending_movies", "movies", {"is_trending": True, "is_coming_soon": {"$ne": True}}, {"_id": -1}),
+    ("movies_only", "movies", {"type": "movie", "is_coming_soon": {"$ne": True}}, {"_id": -1}),
+    ("webseries", "movies", {"type": "series", "is_coming_soon": {"$ne": True}}, {"_id": -1}),
+    ("coming_soon", "movies", {"is_coming_soon": True}, {"_id": -1}),
+    ("recently_added", "movies", {"is_coming_soon": {"$ne": True}}, {"_id": -1}),
+    ("genre", "movies", {"genres": "Action"}, {"_id": -1}),
+    ("genre_next_page", "movies", {"genres": "Action", "_id": {"$lt": ObjectId()}}, {"_id": -1}),
+    ("badge", "movies", {"poster_badge": "HD"}, {"_id": -1}),
+    ("related_by_ids", "movies", {"_id": {"$in": [ObjectId()]}}, None),
+    ("related_backrefs", "movies", {"related_ids": ObjectId()}, None),
+    ("admin_content", "movies", {}, {"_id": -1}),
+    ("admin_content_next_page", "movies", {"_id": {"$lt": ObjectId()}}, {"_id": -1}),
+    ("admin_feedback", "feedback", {}, {"_id": -1}),
+    ("facet_count_language", "movies", {"languages": "Hindi"}, None),
+    ("facets_by_kind", "facets", {"kind": "genre", "count": {"$gt": 0}}, {"value": 1}),
+    ("facets_for_prerender", "facets", {"kind": {"$in": ["genre", "badge"]}}, None),
+    ("trailer_sweep", "movies", stale_trailer_query(datetime.utcnow()), {"trailer_checked_at": 1}),
+    # কিউ ক্লেইম: কিউ বড় হলেও প্রতিটি ক্লেইম ইনডেক্স দিয়েই পরের জব খুঁজে পায় কিনা
+    ("ingest_claim", "ingest_queue", {"$or": [
+        {"status": "pending", "available_at": {"$lte": datetime.utcnow()}},
+        {"status": "processing", "lease_expires_at": {"$lt": datetime.utcnow()}},
+    ]}, {"_id": 1}),
+    ("ingest_oldest_pending", "ingest_queue", {"status": "pending"}, {"available_at": 1}),
+    ("deletion_claim", "scheduled_deletions", {"$or": [
+        {"status": "pending", "run_at": {"$lte": datetime.utcnow()}},
+        {"status": "processing", "lease_expires_at": {"$lt": datetime.utcnow()}},
+    ]}, {"run_at": 1}),
+    ("deletion_due", "scheduled_deletions", {"status": "pending", "run_at": {"$lte": datetime.utcnow()}}, None),
+]
+# (নাম, কালেকশন, পাইপলাইন)
+QUERY_PIPELINES = []
+
+def _winning_plans(node):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "winningPlan": yield value
+            else: yield from _winning_plans(value)
+    elif isinstance(node, list):
+        for item in node: yield from _winning_plans(item)
+
+def _plan_stages(node):
+    if isinstance(node, dict):
+        if "stage" in node: yield node["stage"]
+        for value in node.values(): yield from _plan_stages(value)
+    elif isinstance(node, list):
+        for item in node: yield from _plan_stages(item)
+
+def verify_query_plans():
+    """প্রতিটি কোয়েরি শেপের explain() চালিয়ে যেগুলো COLLSCAN করে তাদের নামের তালিকা ফেরত দেয়।"""
+    explains = []
+    for name, collection_name, query_filter, sort in QUERY_SHAPES:
+        command = {"find": collection_name, "filter": query_filter}
+        if sort: command["sort"] = sort
+        explains.append((name, db.command("explain", command, verbosity="queryPlanner")))
+    for name, collection_name, pipeline in QUERY_PIPELINES:
+        command = {"aggregate": collection_name, "pipeline": pipeline, "cursor": {}}
+        explains.append((name, db.command("explain", command, verbosity="queryPlanner")))
+
+    failures = []
+    for name, explain in explains:
+        stages = [stage for plan in _winning_plans(explain) for stage in _plan_stages(plan)]
+        print(f"{'FAIL' if 'COLLSCAN' in stages else 'OK  '} {name}: {' <- '.join(stages)}")
+        if "COLLSCAN" in stages: failures.append(name)
+    return failures
+
 # ======================================================================
 # --- Main Flask Routes ---
 # ======================================================================
@@ -712,21 +2326,14 @@ def process_movie_list(movie_list):
 def home():
     query = request.args.get('q')
     if query:
-        movies_list = list(movies.find({"title": {"$regex": query, "$options": "i"}}).sort('_id', -1))
-        return render_template_string(index_html, movies=process_movie_list(movies_list), query=f'Results for "{query}"', is_full_page_list=True)
-
-    all_badges = sorted([badge for badge in movies.distinct("poster_badge") if badge])
-    limit = 12
-    context = {
-        "trending_movies": process_movie_list(list(movies.find({"is_trending": True, "is_coming_soon": {"$ne": True}}).sort('_id', -1).limit(limit))),
-        "latest_movies": process_movie_list(list(movies.find({"type": "movie", "is_coming_soon": {"$ne": True}}).sort('_id', -1).limit(limit))),
-        "latest_series": process_movie_list(list(movies.find({"type": "series", "is_coming_soon": {"$ne": True}}).sort('_id', -1).limit(limit))),
-        "coming_soon_movies": process_movie_list(list(movies.find({"is_coming_soon": True}).sort('_id', -1).limit(limit))),
-        "recently_added": process_movie_list(list(movies.find({"is_coming_soon": {"$ne": True}}).sort('_id', -1).limit(6))),
-        "recently_added_full": process_movie_list(list(movies.find({"is_coming_soon": {"$ne": True}}).sort('_id', -1).limit(limit))),
-        "is_full_page_list": False, "query": "", "all_badges": all_badges
-    }
-    return render_template_string(index_html, **context)
+        return cached_page(
+            lambda: render_template("index.html", movies=to_cards(search_movies(query)), query=f'Results for "{query}"', is_full_page_list=True),
+            catalog_cache.version, last_modified=catalog_cache.get())
+
+    snapshot = get_home_snapshot()
+    context = {**snapshot, "is_full_page_list": False, "query": ""}
+    return cached_page(lambda: render_template("index.html", **context),
+                       snapshot["catalog_version"], last_modified=snapshot["catalog_updated_at"])
 
 @app.route('/movie/<movie_id>')
 def movie_detail(movie_id):
@@ -734,56 +2341,391 @@ def movie_detail(movie_id):
         movie = movies.find_one({"_id": ObjectId(movie_id)})
         if not movie: return "Content not found", 404
 
-        related_movies = []
-        if movie.get("genres"):
-            related_movies = list(movies.find({"genres": {"$in": movie["genres"]}, "_id": {"$ne": ObjectId(movie_id)}}).limit(12))
-
-        trailer_key = None
-        if movie.get("tmdb_id") and TMDB_API_KEY:
-            tmdb_type = "tv" if movie.get("type") == "series" else "movie"
-            video_url = f"https://api.themoviedb.org/3/{tmdb_type}/{movie['tmdb_id']}/videos?api_key={TMDB_API_KEY}"
-            try:
-                video_res = requests.get(video_url, timeout=3).json()
-                for v in video_res.get("results", []):
-                    if v.get('type') == 'Trailer' and v.get('site') == 'YouTube':
-                        trailer_key = v.get('key'); break
-            except requests.RequestException: pass
+        if movie.get("tmdb_id") and trailer_is_stale(movie):
+            prefetch_trailer(movie["_id"])
 
-        return render_template_string(detail_html, movie=movie, trailer_key=trailer_key, related_movies=process_movie_list(related_movies))
+        # রিলেটেড কার্ডগুলো অন্য টাইটেল থেকে আসে, তাই catalog ভার্সনও ETag এ থাকে
+        catalog_updated_at = catalog_cache.get()
+        last_modified = max(filter(None, [movie.get("updated_at"), catalog_updated_at]), default=None)
+        return cached_page(
+            lambda: render_template("detail.html", movie=movie, trailer_key=movie.get("trailer_key"),
+                                    related_movies=to_cards(get_related_movies(movie))),
+            movie.get("updated_at"), catalog_cache.version, last_modified=last_modified)
     except Exception as e: return f"An error occurred: {e}", 500
 
 @app.route('/watch/<movie_id>')
 def watch_movie(movie_id):
     try:
-        movie = movies.find_one({"_id": ObjectId(movie_id)})
+        movie = movies.find_one({"_id": ObjectId(movie_id)}, {"title": 1, "watch_link": 1})
         if not movie or not movie.get("watch_link"): return "Content not found.", 404
-        return render_template_string(watch_html, watch_link=movie["watch_link"], title=movie["title"])
+        return render_template("watch.html", watch_link=movie["watch_link"], title=movie["title"])
     except Exception as e: return "An error occurred.", 500
 
-def render_full_list(content_list, title):
-    return render_template_string(index_html, movies=process_movie_list(content_list), query=title, is_full_page_list=True)
+FULL_LIST_PAGE_SIZE = 24
+
+def paginate(query_filter, after=None, page_size=FULL_LIST_PAGE_SIZE, projection=CARD_FIELDS, collection=movies):
+    """_id এর উপর কীসেট পেজিনেশন। after হলো আগের পেজের শেষ আইটেমের _id।"""
+    if after:
+        try: query_filter = {**query_filter, "_id": {"$lt": ObjectId(after)}}
+        except (InvalidId, TypeError): pass
+    items = list(collection.find(query_filter, projection).sort('_id', -1).limit(page_size + 1))
+    next_cursor = str(items[page_size - 1]['_id']) if len(items) > page_size else None
+    return items[:page_size], next_cursor
+
+def render_full_list(query_filter, title):
+    def render():
+        content_list, next_cursor = paginate(query_filter, request.args.get('after'))
+        if request.args.get('fragment'):
+            # "Load More" বাটনের জন্য শুধু কার্ডগুলো পাঠানো হয়, পরের কার্সর হেডারে থাকে
+            response = Response(render_template("grid_fragment.html", movies=to_cards(content_list)))
+            if next_cursor: response.headers['X-Next-Cursor'] = next_cursor
+            return response
+        return render_template("index.html", movies=to_cards(content_list), query=title, is_full_page_list=True, next_cursor=next_cursor)
+    return cached_page(render, catalog_cache.version, last_modified=catalog_cache.get())
 
 @app.route('/badge/<badge_name>')
-def movies_by_badge(badge_name): return render_full_list(list(movies.find({"poster_badge": badge_name}).sort('_id', -1)), f'Tag: {badge_name}')
+def movies_by_badge(badge_name): return render_full_list({"poster_badge": badge_name}, f'Tag: {badge_name}')
 @app.route('/genres')
-def genres_page(): return render_template_string(genres_html, genres=sorted([g for g in movies.distinct("genres") if g]), title="Browse by Genre")
+def genres_page():
+    return cached_page(lambda: render_template("genres.html", genres=get_facets("genre"), title="Browse by Genre"),
+                       catalog_cache.version, last_modified=catalog_cache.get())
 @app.route('/genre/<genre_name>')
-def movies_by_genre(genre_name): return render_full_list(list(movies.find({"genres": genre_name}).sort('_id', -1)), f'Genre: {genre_name}')
+def movies_by_genre(genre_name): return render_full_list({"genres": genre_name}, f'Genre: {genre_name}')
 @app.route('/trending_movies')
-def trending_movies(): return render_full_list(list(movies.find({"is_trending": True, "is_coming_soon": {"$ne": True}}).sort('_id', -1)), "Trending Now")
+def trending_movies(): return render_full_list(LIST_FILTERS["trending"], "Trending Now")
 @app.route('/movies_only')
-def movies_only(): return render_full_list(list(movies.find({"type": "movie", "is_coming_soon": {"$ne": True}}).sort('_id', -1)), "All Movies")
+def movies_only(): return render_full_list(LIST_FILTERS["movies"], "All Movies")
 @app.route('/webseries')
-def webseries(): return render_full_list(list(movies.find({"type": "series", "is_coming_soon": {"$ne": True}}).sort('_id', -1)), "All Web Series")
+def webseries(): return render_full_list(LIST_FILTERS["series"], "All Web Series")
 @app.route('/coming_soon')
-def coming_soon(): return render_full_list(list(movies.find({"is_coming_soon": True}).sort('_id', -1)), "Coming Soon")
+def coming_soon(): return render_full_list(LIST_FILTERS["coming_soon"], "Coming Soon")
 @app.route('/recently_added')
-def recently_added_all(): return render_full_list(list(movies.find({"is_coming_soon": {"$ne": True}}).sort('_id', -1)), "Recently Added")
+def recently_added_all(): return render_full_list(LIST_FILTERS["recent"], "Recently Added")
+
+# ======================================================================
+# --- JSON Read API (/api/v1) ---
+# ======================================================================
+# অ্যাপ ও বট ক্লায়েন্টের জন্য, যাতে HTML স্ক্র্যাপ করতে না হয়। তালিকাগুলো _id কীসেট কার্সরে পেজ হয়
+# (?after=<next_cursor>), ?fields=title,poster দিলে মঙ্গোডিবি থেকে শুধু সেই ফিল্ডগুলো আসে,
+# আর HTML পেজের মতোই ETag/Last-Modified দিয়ে 304 পাওয়া যায়।
+API_PAGE_SIZE = 24
+API_MAX_PAGE_SIZE = 100
+# ক্লায়েন্টকে দেখানো যায় এমন ফিল্ড; টেলিগ্রাম message_id বা related_ids বাইরে থাকে
+API_TITLE_FIELDS = ("title", "type", "poster", "poster_badge", "overview", "genres", "languages", "release_date",
+                    "vote_average", "tmdb_id", "is_trending", "is_coming_soon", "watch_link", "trailer_key", "updated_at")
+API_LIST_DEFAULT_FIELDS = ("title", "type", "poster", "poster_badge", "updated_at")
+API_FACET_KINDS = {"genres": "genre", "badges": "badge", "languages": "language"}
+
+class CatalogJSONProvider(DefaultJSONProvider):
+    """ObjectId স্ট্রিং হিসেবে, datetime ISO-8601 (UTC) হিসেবে; ইউনিকোড টাইটেল এস্কেপ ছাড়াই।"""
+    ensure_ascii = False
+    sort_keys = False
+    compact = True
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId): return str(o)
+        if isinstance(o, datetime): return (o if o.tzinfo else o.replace(tzinfo=timezone.utc)).isoformat()
+        return DefaultJSONProvider.default(o)
+
+app.json = CatalogJSONProvider(app)
+
+def api_error(status, message):
+    response = jsonify(error=message)
+    response.status_code = status
+    return response
+
+def _api_fields(default, allowed=API_TITLE_FIELDS):
+    requested = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    return [f for f in requested if f in allowed] or list(default)
+
+def _api_limit(default=API_PAGE_SIZE):
+    try: return max(1, min(int(request.args.get('limit', default)), API_MAX_PAGE_SIZE))
+    except ValueError: return default
+
+def _api_doc(doc):
+    doc = dict(doc)
+    return {"id": str(doc.pop("_id")), **doc}
+
+def _telegram_start_url(payload):
+    return f"https://t.me/{BOT_USERNAME}?start={payload}"
+
+@app.route('/api/v1/titles')
+def api_titles():
+    """?list=trending|movies|series|coming_soon|recent এবং/অথবা ?genre= ?badge= ?language= দিয়ে ফিল্টার।"""
+    list_name = request.args.get('list')
+    if list_name and list_name not in LIST_FILTERS: return api_error(400, f"unknown list '{list_name}'")
+    query_filter = dict(LIST_FILTERS.get(list_name, {}))
+    for param, field in (("genre", "genres"), ("badge", "poster_badge"), ("language", "languages")):
+        if request.args.get(param): query_filter[field] = request.args[param]
+    fields = _api_fields(API_LIST_DEFAULT_FIELDS)
+
+    def render():
+        items, next_cursor = paginate(query_filter, request.args.get('after'), _api_limit(), {f: 1 for f in fields})
+        return jsonify(items=[_api_doc(doc) for doc in items], next_cursor=next_cursor)
+    return cached_page(render, catalog_cache.version, last_modified=catalog_cache.get())
+
+@app.route('/api/v1/titles/<movie_id>')
+def api_title(movie_id):
+    # "downloads" ডকুমেন্টের ফিল্ড নয়: links আর files থেকে তৈরি হয়
+    fields = _api_fields(API_TITLE_FIELDS + ("downloads",), API_TITLE_FIELDS + ("downloads",))
+    projection = {f: 1 for f in fields if f != "downloads"}
+    if "downloads" in fields: projection.update({"links": 1, "files.quality": 1})
+    try: movie = movies.find_one({"_id": ObjectId(movie_id)}, {**projection, "updated_at": 1})
+    except InvalidId: movie = None
+    if not movie: return api_error(404, "title not found")
+
+    def render():
+        doc = _api_doc({k: v for k, v in movie.items() if k in fields or k == "_id"})
+        if "downloads" in fields:
+            doc["downloads"] = [{"quality": l.get("quality"), "url": l.get("url")} for l in movie.get("links") or []]
+            doc["downloads"] += [{"quality": f.get("quality"), "telegram_url": _telegram_start_url(f"{movie_id}_{f.get('quality')}")}
+                                 for f in movie.get("files") or []]
+        return jsonify(doc)
+    return cached_page(render, movie.get("updated_at"), last_modified=movie.get("updated_at"))
+
+@app.route('/api/v1/titles/<movie_id>/episodes')
+def api_episodes(movie_id):
+    """সিজন/এপিসোড ক্রমে; ?season= দিয়ে ফিল্টার, কার্সর হলো "<season>-<episode>"।"""
+    try: series = movies.find_one({"_id": ObjectId(movie_id), "type": "series"}, {"episodes": 1, "updated_at": 1})
+    except InvalidId: series = None
+    if not series: return api_error(404, "series not found")
+
+    def render():
+        episodes = sorted(series.get("episodes") or [], key=lambda ep: (ep.get("season") or 0, ep.get("episode_number") or 0))
+        season = request.args.get('season', type=int)
+        if season is not None: episodes = [ep for ep in episodes if ep.get("season") == season]
+        after = request.args.get('after', '')
+        if re.fullmatch(r"\d+-\d+", after):
+            after_key = tuple(map(int, after.split('-')))
+            episodes = [ep for ep in episodes if (ep.get("season") or 0, ep.get("episode_number") or 0) > after_key]
+        limit = _api_limit()
+        page = episodes[:limit]
+        items = [{"season": ep.get("season"), "episode_number": ep.get("episode_number"), "title": ep.get("title"),
+                  "watch_link": ep.get("watch_link"),
+                  "telegram_url": _telegram_start_url(f"{movie_id}_{ep.get('season')}_{ep.get('episode_number')}")} for ep in page]
+        next_cursor = f"{page[-1].get('season') or 0}-{page[-1].get('episode_number') or 0}" if len(episodes) > limit else None
+        return jsonify(items=items, next_cursor=next_cursor)
+    return cached_page(render, series.get("updated_at"), last_modified=series.get("updated_at"))
+
+@app.route('/api/v1/shelves')
+def api_shelves():
+    """হোম পেজের শেলফগুলো, একই মেমোরি স্ন্যাপশট থেকে।"""
+    snapshot = get_home_snapshot()
+    shelves = {"hero": "recently_added", "trending": "trending_movies", "movies": "latest_movies",
+               "series": "latest_series", "coming_soon": "coming_soon_movies", "recent": "recently_added_full"}
+    return cached_page(lambda: jsonify({name: [card.as_dict() for card in snapshot[key]] for name, key in shelves.items()}),
+                       snapshot["catalog_version"], last_modified=snapshot["catalog_updated_at"])
+
+@app.route('/api/v1/<any(genres, badges, languages):facet_name>')
+def api_facets(facet_name):
+    return cached_page(lambda: jsonify(items=get_facets(API_FACET_KINDS[facet_name])),
+                       catalog_cache.version, last_modified=catalog_cache.get())
+
+@app.route('/api/v1/search')
+def api_search():
+    query = request.args.get('q', '').strip()
+    if not query: return api_error(400, "missing 'q'")
+    fields = _api_fields(API_LIST_DEFAULT_FIELDS)
+
+    def render():
+        ranked_ids = search_ids(query, _api_limit(SEARCH_RESULT_LIMIT))
+        found = {doc["_id"]: doc for doc in movies.find({"_id": {"$in": ranked_ids}}, {f: 1 for f in fields})} if ranked_ids else {}
+        return jsonify(items=[_api_doc(found[doc_id]) for doc_id in ranked_ids if doc_id in found])
+    return cached_page(render, catalog_cache.version, last_modified=catalog_cache.get())
+
+# ======================================================================
+# --- Static Pre-rendering ---
+# ======================================================================
+# PRERENDER_DIR সেট থাকলে পাবলিক পেজগুলো (হোম, /genres, তালিকা/জনরা/ব্যাজের প্রথম পেজ এবং প্রতিটি /movie/<id>)
+# ডিস্কে HTML (+ .gz/.br) হিসেবে থাকে, আর কোয়েরি স্ট্রিং ছাড়া GET সরাসরি ফাইল থেকে সার্ভ হয়।
+# কোনো লেখার পর শুধু প্রভাবিত পেজগুলোর ফাইল সাথে সাথে মুছে (dirty) ব্যাকগ্রাউন্ডে আবার রেন্ডার হয়; ফাইল না থাকলে
+# সাধারণ রাউট রেন্ডার করে এবং পেজটি রেন্ডারের কিউতে যায়। ফাইল os.replace দিয়ে লেখা হয়, তাই আধা-লেখা পেজ সার্ভ হয় না।
+# একাধিক সার্ভারে চালালে PRERENDER_DIR শেয়ার্ড ভলিউমে থাকতে হবে, নইলে এক সার্ভারের লেখায় অন্যটির পেজ dirty হয় না।
+# ফাইলগুলো BUILD_DIGEST নামের সাব-ডিরেক্টরিতে থাকে, তাই ডিপ্লয়ে টেমপ্লেট/অ্যাসেট বদলালে পুরনো পেজ আর সার্ভ হয় না।
+PRERENDER_DIR = os.environ.get("PRERENDER_DIR", "")
+PRERENDER_BUILD_DIR = os.path.join(PRERENDER_DIR, BUILD_DIGEST) if PRERENDER_DIR else ""
+PRERENDER_ENDPOINTS = {"home", "genres_page", "trending_movies", "movies_only", "webseries", "coming_soon",
+                       "recently_added_all", "movies_by_genre", "movies_by_badge", "movie_detail"}
+PRERENDER_LIST_PATHS = ("/", "/genres", "/trending_movies", "/movies_only", "/webseries", "/coming_soon", "/recently_added")
+PRERENDER_FACET_PATHS = {"genre": "/genre/", "badge": "/badge/"}
+# রেন্ডার করার সময় রিকোয়েস্টটি ডিস্কের পুরনো ফাইল না পড়ে রাউটে যায়
+PRERENDER_BYPASS = "moviezhub.prerender"
+_prerender_queue = queue.Queue()
+_prerender_pending = set()
+_prerender_lock = threading.Lock()
+
+def _prerender_target(path):
+    try: endpoint, args = app.url_map.bind("localhost").match(path, method="GET")
+    except HTTPException: return None
+    if endpoint not in PRERENDER_ENDPOINTS: return None
+    if endpoint == "movie_detail" and not ObjectId.is_valid(args["movie_id"]): return None
+    return endpoint, args
+
+def prerender_file(path):
+    """পাথের ডিস্ক ফাইল; প্রি-রেন্ডারযোগ্য পেজ না হলে None।"""
+    target = _prerender_target(path)
+    if not target: return None
+    endpoint, args = target
+    return os.path.join(PRERENDER_BUILD_DIR, *[endpoint] + [quote(str(v), safe="") for v in args.values()]) + ".html"
+
+def _write_atomic(file_path, data):
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, file_path)
+
+def _remove_prerendered(file_path):
+    # .html আগে মোছা হয়, কারণ সার্ভ করার সময় সেটির উপস্থিতিই দেখা হয়
+    for suffix in ("", ".gz", ".br"):
+        try: os.remove(file_path + suffix)
+        except FileNotFoundError: pass
+
+def render_prerendered(path):
+    """পেজটি তার রাউট দিয়েই রেন্ডার করে ডিস্কে লেখে। পেজ আর না থাকলে (404, খালি জনরা) ফাইল মুছে দেয়।"""
+    file_path = prerender_file(path)
+    if not file_path: return False
+    endpoint, args = _prerender_target(path)
+    if endpoint in ("movies_by_genre", "movies_by_badge"):
+        kind = "genre" if endpoint == "movies_by_genre" else "badge"
+        # যেকোনো URL থেকে ফাইল তৈরি না হয়ে শুধু ক্যাটালগে থাকা জনরা/ব্যাজের পেজ লেখা হয়
+        if not facets.find_one({"_id": f"{kind}:{next(iter(args.values()))}"}, {"_id": 1}):
+            _remove_prerendered(file_path)
+            return False
+    if endpoint == "home":
+        # হোম স্ন্যাপশট সাধারণত পুরনোটি দেখিয়ে ব্যাকগ্রাউন্ডে রিফ্রেশ হয়; এখানে নতুনটিই লাগবে
+        refresh_home_snapshot()
+    with app.test_request_context(quote(path), environ_overrides={PRERENDER_BYPASS: True}):
+        response = app.full_dispatch_request()
+        body = response.get_data() if response.status_code == 200 else None
+    if body is None:
+        _remove_prerendered(file_path)
+        return False
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    if brotli: _write_atomic(file_path + ".br", run_off_hub(brotli.compress, body, quality=11))
+    _write_atomic(file_path + ".gz", run_off_hub(gzip.compress, body, compresslevel=9, mtime=0))
+    _write_atomic(file_path, body)
+    return True
+
+def _prerender_worker():
+    while True:
+        path = _prerender_queue.get()
+        # রেন্ডারের মাঝে আবার dirty হলে পাথটি নতুন করে কিউতে ঢোকে
+        with _prerender_lock: _prerender_pending.discard(path)
+        try: render_prerendered(path)
+        except Exception as e: print(f"Prerender: error rendering {path}: {e}")
+
+def schedule_prerender(*paths):
+    if not PRERENDER_DIR: return
+    for path in paths:
+        with _prerender_lock:
+            if path in _prerender_pending: continue
+            _prerender_pending.add(path)
+        _prerender_queue.put(path)
+
+def mark_pages_dirty(*paths):
+    """পেজগুলোর ফাইল এখনই মুছে দেয় (পুরনো পেজ আর সার্ভ হয় না) এবং ব্যাকগ্রাউন্ডে আবার রেন্ডার করায়।"""
+    if not PRERENDER_DIR: return
+    for path in paths:
+        file_path = prerender_file(path)
+        if file_path: _remove_prerendered(file_path)
+    schedule_prerender(*paths)
+
+def affected_page_paths(movie_ids, facet_pairs):
+    """কন্টেন্ট বদলালে যেসব পেজ বদলায়: তালিকা পেজ, টাইটেলগুলোর নিজের পেজ, যেসব পেজে এগুলো রিলেটেড কার্ড হিসেবে আছে,
+    এবং প্রভাবিত জনরা/ব্যাজের পেজ।"""
+    backrefs = [d["_id"] for d in movies.find({"related_ids": {"$in": list(movie_ids)}}, {"_id": 1})]
+    paths = list(PRERENDER_LIST_PATHS)
+    paths += [f"/movie/{movie_id}" for movie_id in list(movie_ids) + backrefs]
+    paths += [PRERENDER_FACET_PATHS[kind] + value for kind, value in facet_pairs if kind in PRERENDER_FACET_PATHS]
+    return paths
+
+def clear_prerendered():
+    """সব পেজ মুছে দেয় (যেমন বিজ্ঞাপন বদলালে); তালিকা পেজগুলো সাথে সাথে, বাকিগুলো প্রথম ভিজিটে আবার তৈরি হয়।"""
+    if not PRERENDER_DIR: return
+    for endpoint in PRERENDER_ENDPOINTS:
+        shutil.rmtree(os.path.join(PRERENDER_BUILD_DIR, endpoint), ignore_errors=True)
+        _remove_prerendered(os.path.join(PRERENDER_BUILD_DIR, endpoint) + ".html")
+    schedule_prerender(*PRERENDER_LIST_PATHS)
+
+def prune_old_prerender_builds():
+    """আগের বিল্ডগুলোর ডিরেক্টরি (এবং সাব-ডিরেক্টরি ছাড়া পুরনো লেআউটের ফাইল) মুছে দেয়।"""
+    try: entries = os.listdir(PRERENDER_DIR)
+    except FileNotFoundError: return
+    for entry in entries:
+        if entry == BUILD_DIGEST: continue
+        path = os.path.join(PRERENDER_DIR, entry)
+        # শুধু নিজের তৈরি নামগুলো; PRERENDER_DIR এ অন্য কিছু থাকলে তা মোছা হয় না
+        if re.fullmatch(r"[0-9a-f]{12}", entry) or entry in PRERENDER_ENDPOINTS:
+            shutil.rmtree(path, ignore_errors=True)
+        elif entry.split(".")[0] in PRERENDER_ENDPOINTS and entry.endswith((".html", ".gz", ".br")):
+            _remove_prerendered(path)
+
+def prerender_all():
+    """সব পেজ এখনই রেন্ডার করে (প্রথম ডিপ্লয় বা --prerender)।"""
+    paths = list(PRERENDER_LIST_PATHS)
+    paths += [PRERENDER_FACET_PATHS[doc["kind"]] + doc["value"] for doc in facets.find({"kind": {"$in": list(PRERENDER_FACET_PATHS)}})]
+    paths += [f"/movie/{doc['_id']}" for doc in movies.find({}, {"_id": 1})]
+    written = sum(1 for path in paths if render_prerendered(path))
+    print(f"Prerender: wrote {written} of {len(paths)} pages to {PRERENDER_DIR}.")
+    return written
+
+@app.before_request
+def serve_prerendered():
+    if (not PRERENDER_DIR or request.method not in ("GET", "HEAD") or request.query_string
+            or request.environ.get(PRERENDER_BYPASS)):
+        return None
+    file_path = prerender_file(request.path)
+    if not file_path: return None
+    try:
+        stat = os.stat(file_path)
+        encoding = _preferred_encoding([e for e, suffix in (("br", ".br"), ("gzip", ".gz")) if os.path.exists(file_path + suffix)])
+        with open(file_path + {"br": ".br", "gzip": ".gz"}.get(encoding, ""), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        # এই রিকোয়েস্ট রাউটে যায়; পরেরগুলোর জন্য পেজটি ব্যাকগ্রাউন্ডে লেখা হয়
+        schedule_prerender(request.path)
+        return None
+    response = Response(data, mimetype="text/html")
+    if encoding: response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}", weak=True)
+    response.last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.max_age = PAGE_MAX_AGE
+    return response.make_conditional(request)
+
+if PRERENDER_DIR:
+    # রোলিং ডিপ্লয়ে পুরনো সার্ভারগুলো এরপর ফাইল না পেয়ে রাউট থেকে রেন্ডার করে, ভুল পেজ দেখায় না
+    prune_old_prerender_builds()
+    threading.Thread(target=_prerender_worker, daemon=True, name="prerender").start()
+    schedule_prerender(*PRERENDER_LIST_PATHS)
+    if TMDB_API_KEY: threading.Thread(target=_trailer_sweeper, daemon=True, name="trailer-sweeper").start()
+
+# প্রথম চালুতে facets খালি থাকলে তৈরি হয়; এখানে, কারণ রিবিল্ড প্রি-রেন্ডার করা পেজগুলোও বাতিল করে
+try:
+    if not facets.estimated_document_count() and movies.estimated_document_count(): rebuild_facets()
+except Exception as e: print(f"Error building facets: {e}")
 
 # ======================================================================
 # --- Admin and Webhook Routes ---
 # ======================================================================
 
+# অ্যাডমিন পেজ শুধু টেবিলের কলামগুলো পেজ ধরে আনে, তাই ক্যাটালগ যত বড়ই হোক লোড টাইম একই থাকে
+ADMIN_PAGE_SIZE = 50
+FEEDBACK_PAGE_SIZE = 20
+ADMIN_CONTENT_FIELDS = {"title": 1, "type": 1}
+
+def admin_search(query):
+    """টাইটেল সার্চ ইঞ্জিনের ইনডেক্স দিয়ে; শুধু সংখ্যা দিলে tmdb_id দিয়েও খোঁজে।"""
+    ranked_ids = search_ids(query, ADMIN_PAGE_SIZE)
+    if query.isdigit():
+        by_tmdb = movies.find_one({"tmdb_id": int(query)}, {"_id": 1})
+        if by_tmdb: ranked_ids = [by_tmdb["_id"]] + [i for i in ranked_ids if i != by_tmdb["_id"]]
+    if not ranked_ids: return []
+    found = {doc["_id"]: doc for doc in movies.find({"_id": {"$in": ranked_ids}}, ADMIN_CONTENT_FIELDS)}
+    return [found[doc_id] for doc_id in ranked_ids if doc_id in found]
+
 @app.route('/admin', methods=["GET", "POST"])
 @requires_auth
 def admin():
@@ -799,7 +2741,8 @@ def admin():
             "links": [],
             "files": [],
             "episodes": [],
-            "languages": []
+            "languages": [],
+            "updated_at": datetime.utcnow()
         }
 
         if content_type == "movie":
@@ -830,12 +2773,29 @@ def admin():
                 episodes.append(episode_doc)
             movie_data["episodes"] = episodes
 
-        movies.insert_one(movie_data)
+        try:
+            result = movies.insert_one(movie_data)
+        except DuplicateKeyError:
+            # TMDb একই টাইটেলে মিলেছে যা আগেই আছে (যেমন ওয়েবহুক তৈরি করেছে); নতুন না বানিয়ে সেটির এডিট পেজে
+            existing = movies.find_one({"tmdb_id": movie_data.get("tmdb_id")}, {"_id": 1})
+            if not existing: raise
+            return redirect(url_for('edit_movie', movie_id=str(existing['_id'])))
+        on_content_changed(result.inserted_id)
+        prefetch_trailer(result.inserted_id)
         return redirect(url_for('admin'))
 
-    all_content = process_movie_list(list(movies.find().sort('_id', -1)))
-    feedback_list = process_movie_list(list(feedback.find().sort('timestamp', -1)))
-    return render_template_string(admin_html, all_content=all_content, feedback_list=feedback_list)
+    query = request.args.get('q', '').strip()[:SEARCH_MAX_QUERY_LENGTH]
+    content_after, feedback_after = request.args.get('content_after'), request.args.get('feedback_after')
+    if query:
+        all_content, content_next = admin_search(query), None
+    else:
+        all_content, content_next = paginate({}, content_after, ADMIN_PAGE_SIZE, ADMIN_CONTENT_FIELDS)
+    feedback_list, feedback_next = paginate({}, feedback_after, FEEDBACK_PAGE_SIZE, None, collection=feedback)
+    return render_template(
+        "admin.html", all_content=process_movie_list(all_content), feedback_list=process_movie_list(feedback_list), query=query,
+        content_after=content_after, content_next=content_next, feedback_after=feedback_after, feedback_next=feedback_next,
+        # estimated_document_count কালেকশনের মেটাডেটা থেকে আসে, স্ক্যান করে না
+        content_total=movies.estimated_document_count(), feedback_total=feedback.estimated_document_count())
 
 @app.route('/admin/save_ads', methods=['POST'])
 @requires_auth
@@ -847,6 +2807,10 @@ def save_ads():
         "native_banner_code": request.form.get("native_banner_code", "")
     }
     settings.update_one({}, {"$set": ad_codes}, upsert=True)
+    bump_version("ads")
+    ads_cache.invalidate()
+    # বিজ্ঞাপনের কোড প্রতিটি পেজে থাকে
+    clear_prerendered()
     return redirect(url_for('admin'))
 
 @app.route('/edit_movie/<movie_id>', methods=["GET", "POST"])
@@ -865,7 +2829,8 @@ def edit_movie(movie_id):
             "overview": request.form.get("overview", "").strip(),
             "genres": [g.strip() for g in request.form.get("genres", "").split(',') if g.strip()],
             "languages": [lang.strip() for lang in request.form.get("languages", "").split(',') if lang.strip()],
-            "poster_badge": request.form.get("poster_badge", "").strip() or None
+            "poster_badge": request.form.get("poster_badge", "").strip() or None,
+            "updated_at": datetime.utcnow()
         }
 
         if content_type == "movie":
@@ -900,14 +2865,16 @@ def edit_movie(movie_id):
             movies.update_one({"_id": ObjectId(movie_id)}, {"$unset": {"links": "", "watch_link": "", "files": ""}})
 
         movies.update_one({"_id": ObjectId(movie_id)}, {"$set": update_data})
+        on_content_changed(ObjectId(movie_id), previous=[movie_obj])
         return redirect(url_for('admin'))
 
-    return render_template_string(edit_html, movie=movie_obj)
+    return render_template("edit.html", movie=movie_obj)
 
 @app.route('/delete_movie/<movie_id>')
 @requires_auth
 def delete_movie(movie_id):
-    movies.delete_one({"_id": ObjectId(movie_id)})
+    previous = movies.find_one_and_delete({"_id": ObjectId(movie_id)}, projection=FACET_PROJECTION)
+    on_content_changed(ObjectId(movie_id), previous=[previous] if previous else [])
     return redirect(url_for('admin'))
 
 @app.route('/contact', methods=['GET', 'POST'])
@@ -919,10 +2886,10 @@ def contact():
             "reported_content_id": request.form.get("reported_content_id"), "timestamp": datetime.utcnow()
         }
         feedback.insert_one(feedback_data)
-        return render_template_string(contact_html, message_sent=True)
+        return render_template("contact.html", message_sent=True)
     prefill_title, prefill_id = request.args.get('title', ''), request.args.get('report_id', '')
     prefill_type = 'Problem Report' if prefill_id else 'Movie Request'
-    return render_template_string(contact_html, message_sent=False, prefill_title=prefill_title, prefill_id=prefill_id, prefill_type=prefill_type)
+    return render_template("contact.html", message_sent=False, prefill_title=prefill_title, prefill_id=prefill_id, prefill_type=prefill_type)
 
 @app.route('/delete_feedback/<feedback_id>')
 @requires_auth
@@ -930,17 +2897,227 @@ def delete_feedback(feedback_id):
     feedback.delete_one({"_id": ObjectId(feedback_id)})
     return redirect(url_for('admin'))
 
+# ======================================================================
+# --- Webhook Ingest Queue ---
+# ======================================================================
+# /webhook শুধু আপডেটটি ingest_queue-তে update_id কে _id করে রেখে সাথে সাথে 200 ফেরত দেয়।
+# প্রতিটি প্রসেসের কয়েকটি ওয়ার্কার থ্রেড কিউ থেকে আপডেট নিয়ে প্যারালেলে প্রসেস করে।
+# একই update_id দ্বিতীয়বার এলে ডুপ্লিকেট কী হিসেবে বাদ পড়ে।
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", 4))
+INGEST_POLL_INTERVAL = 2
+INGEST_LEASE = timedelta(minutes=2)
+INGEST_MAX_ATTEMPTS = 3
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", 50))
+# একটি ব্যাচ কত সেকেন্ড খোলা থাকবে; ব্যাচের প্রথম জবের লিজ (INGEST_LEASE) এই সময় + একটি জবের সবচেয়ে ধীর
+# TMDb লুকআপের চেয়ে বড় হতে হবে, নইলে লেখার আগেই অন্য ওয়ার্কার জবটি আবার নিয়ে নেয়
+INGEST_BATCH_WINDOW = float(os.environ.get("INGEST_BATCH_WINDOW", 5))
+_ingest_wakeup = threading.Event()
+
+def enqueue_update(data):
+    """আপডেট কিউতে রাখে। আগে একই update_id এসে থাকলে False ফেরত দেয়।"""
+    now = datetime.utcnow()
+    try:
+        ingest_queue.insert_one({
+            "_id": data['update_id'], "update": data, "status": "pending", "attempts": 0,
+            "enqueued_at": now, "available_at": now
+        })
+    except DuplicateKeyError:
+        return False
+    _ingest_wakeup.set()
+    return True
+
+def claim_next_update():
+    now = datetime.utcnow()
+    return ingest_queue.find_one_and_update(
+        {"$or": [
+            {"status": "pending", "available_at": {"$lte": now}},
+            # লিজ শেষ হয়ে যাওয়া আপডেট (যেমন ওয়ার্কার রিস্টার্ট হলে) আবার নেওয়া হয়
+            {"status": "processing", "lease_expires_at": {"$lt": now}},
+        ]},
+        {"$set": {"status": "processing", "lease_expires_at": now + INGEST_LEASE, "started_at": now}, "$inc": {"attempts": 1}},
+        sort=[("_id", ASCENDING)], return_document=ReturnDocument.AFTER
+    )
+
+def _ingest_failed(job, error):
+    print(f"Ingest: Error processing update {job['_id']} (attempt {job['attempts']}): {error}")
+    if job['attempts'] >= INGEST_MAX_ATTEMPTS:
+        update = {"status": "failed", "error": str(error), "done_at": datetime.utcnow()}
+    else:
+        update = {"status": "pending", "error": str(error), "available_at": datetime.utcnow() + timedelta(seconds=10 * job['attempts'])}
+    ingest_outcomes_total.inc(outcome="failed" if update["status"] == "failed" else "retry")
+    return UpdateOne({"_id": job['_id']}, {"$set": update})
+
+def _ingest_done(job, result):
+    # result হলো process_update এর reason ('parsing_failed', 'no_tmdb_data_or_id', ...) বা 'ingested'
+    ingest_outcomes_total.inc(outcome=result)
+    return UpdateOne({"_id": job['_id']}, {"$set": {"status": "done", "result": result, "done_at": datetime.utcnow()}})
+
+def run_ingest_job(job, queue_updates, writes):
+    try:
+        outcome = process_update(job['update'])
+    except Exception as e:
+        queue_updates.append(_ingest_failed(job, e))
+        return
+    if isinstance(outcome, IngestWrite): writes.append((job, outcome))
+    else: queue_updates.append(_ingest_done(job, outcome))
+
+def flush_ingest_batch(queue_updates, writes):
+    if writes:
+        try:
+            apply_ingest_writes([write for _, write in writes])
+            queue_updates.extend(_ingest_done(job, 'ingested') for job, _ in writes)
+        except Exception as e:
+            queue_updates.extend(_ingest_failed(job, e) for job, _ in writes)
+    if queue_updates: ingest_queue.bulk_write(queue_updates, ordered=False)
+
+def _ingest_worker():
+    while True:
+        queue_updates, writes = [], []
+        batch_started = time.monotonic()
+        try:
+            # জব একটা একটা করে ঠিক প্রসেসের আগে নেওয়া হয়: প্রতিটির TMDb লুকআপ নিজের লিজে চলে এবং বার্স্ট (যেমন পুরো
+            # সিজন আপলোড) সব ওয়ার্কারে ভাগ হয়ে যায়। শুধু মঙ্গোতে লেখাগুলো ব্যাচ হয়ে একসাথে যায়।
+            while len(queue_updates) + len(writes) < INGEST_BATCH_SIZE and time.monotonic() - batch_started < INGEST_BATCH_WINDOW:
+                job = claim_next_update()
+                if not job: break
+                run_ingest_job(job, queue_updates, writes)
+        except Exception as e:
+            print(f"Ingest: Error claiming update: {e}")
+        if queue_updates or writes:
+            try:
+                flush_ingest_batch(queue_updates, writes)
+            except Exception as e:
+                # কিউ আপডেট ব্যর্থ হলেও থ্রেড চালু থাকে; লিজ শেষ হলে আপডেটগুলো আবার নেওয়া হবে
+                print(f"Ingest: Error finishing batch: {e}")
+        else:
+            _ingest_wakeup.wait(INGEST_POLL_INTERVAL)
+            _ingest_wakeup.clear()
+
+@scrape_once
+def ingest_queue_stats():
+    oldest = ingest_queue.find_one({"status": "pending"}, {"enqueued_at": 1}, sort=[("available_at", ASCENDING)])
+    return {
+        "pending": ingest_queue.count_documents({"status": "pending"}),
+        "processing": ingest_queue.count_documents({"status": "processing"}),
+        "failed": ingest_queue.count_documents({"status": "failed"}),
+        "lag_seconds": round((datetime.utcnow() - oldest["enqueued_at"]).total_seconds(), 1) if oldest else 0,
+    }
+
+Gauge("ingest_queue_jobs", "Webhook updates in the ingest queue by status.", ("status",),
+      lambda: [((status,), count) for status, count in ingest_queue_stats().items() if status != "lag_seconds"])
+Gauge("ingest_queue_lag_seconds", "Age of the oldest pending webhook update.", (),
+      lambda: [((), ingest_queue_stats()["lag_seconds"])])
+Gauge("deletion_queue_jobs", "Scheduled message deletions by status.", ("status",),
+      lambda: [((status,), count) for status, count in deletion_queue_stats().items() if status != "leader"])
+Gauge("telegram_send_queue_depth", "Bot API calls waiting for a sender thread in this process.", (),
+      lambda: [((), telegram.pending())])
+Gauge("prerender_queue_depth", "Pages waiting to be pre-rendered in this process.", (),
+      lambda: [((), _prerender_queue.qsize())])
+
+for i in range(INGEST_WORKERS):
+    threading.Thread(target=_ingest_worker, daemon=True, name=f"ingest-{i}").start()
+
 @app.route('/webhook', methods=['POST'])
 def telegram_webhook():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
+    if 'update_id' not in data: reason = 'no_update_id'
+    elif not enqueue_update(data): reason = 'duplicate_update'
+    else: reason = 'queued'
+    webhook_updates_total.inc(reason=reason)
+    return jsonify(status='ok', reason=reason)
+
+@app.route('/admin/ingest_status')
+@requires_auth
+def ingest_status():
+    return jsonify(ingest_queue_stats())
+
+@app.route('/admin/deletion_status')
+@requires_auth
+def deletion_status():
+    return jsonify(deletion_queue_stats())
+
+# --- চ্যানেল পোস্টের অ্যাটমিক আপসার্ট ---
+# প্রতিটি ফাইলের জন্য tmdb_id-র উপর একটি মাত্র পাইপলাইন আপডেট (upsert): ডকুমেন্ট না থাকলে তৈরি হয়,
+# থাকলে একই এপিসোড/কোয়ালিটির পুরনো এন্ট্রি বাদ দিয়ে নতুনটি যোগ হয়। find_one -> $pull -> $push এর রেস আর থাকে না।
+IngestWrite = namedtuple("IngestWrite", ["tmdb_id", "operation"])
+
+def _insert_defaults(tmdb_data, content_type):
+    # শুধু যে ফিল্ডগুলো এখনো নেই সেগুলোই TMDb ডেটা দিয়ে পূরণ হয়; বিদ্যমান কন্টেন্ট অপরিবর্তিত থাকে
+    defaults = {**tmdb_data, "type": content_type, "is_trending": False, "is_coming_soon": False}
+    defaults.pop("tmdb_id", None)
+    return {field: {"$ifNull": [f"${field}", {"$literal": value}]} for field, value in defaults.items()}
+
+def _merged_languages(languages):
+    existing = {"$ifNull": ["$languages", []]}
+    new_only = {"$filter": {"input": {"$literal": languages}, "as": "lang", "cond": {"$eq": [{"$in": ["$$lang", existing]}, False]}}}
+    return {"$concatArrays": [existing, new_only]}
+
+def series_episode_upsert(tmdb_data, new_episode, languages):
+    other_episode = {"$or": [{"$ne": ["$$ep.season", new_episode['season']]}, {"$ne": ["$$ep.episode_number", new_episode['episode_number']]}]}
+    return IngestWrite(tmdb_data['tmdb_id'], UpdateOne({"tmdb_id": tmdb_data['tmdb_id']}, [{"$set": {
+        **_insert_defaults(tmdb_data, "series"),
+        "episodes": {"$concatArrays": [
+            {"$filter": {"input": {"$ifNull": ["$episodes", []]}, "as": "ep", "cond": other_episode}},
+            {"$literal": [new_episode]},
+        ]},
+        "languages": _merged_languages(languages),
+        "updated_at": datetime.utcnow(),
+    }}], upsert=True))
+
+def movie_file_upsert(tmdb_data, new_file, languages):
+    return IngestWrite(tmdb_data['tmdb_id'], UpdateOne({"tmdb_id": tmdb_data['tmdb_id']}, [{"$set": {
+        **_insert_defaults(tmdb_data, "movie"),
+        "files": {"$concatArrays": [
+            {"$filter": {"input": {"$ifNull": ["$files", []]}, "as": "file", "cond": {"$ne": ["$$file.quality", new_file['quality']]}}},
+            {"$literal": [new_file]},
+        ]},
+        "languages": _merged_languages(languages),
+        "updated_at": datetime.utcnow(),
+    }}], upsert=True))
+
+def apply_ingest_writes(writes):
+    """একসাথে আসা পোস্টগুলোর আপসার্ট একটি bulk_write ব্যাচে চালায় এবং পরিবর্তিত ডকুমেন্টগুলোর হুক ডাকে।"""
+    pending = [write.operation for write in writes]
+    for _ in range(3):
+        try:
+            # ordered: একই সিরিজের একাধিক এপিসোড ক্রমানুসারে প্রয়োগ হয়
+            movies.bulk_write(pending, ordered=True)
+            break
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            # একই tmdb_id-তে দুটি ওয়ার্কার একসাথে upsert করলে একটি duplicate key পায়; বাকিগুলো আবার চালানো হয়
+            if not errors or errors[0].get('code') != 11000: raise
+            pending = pending[errors[0]['index']:]
+    else:
+        raise RuntimeError("Ingest: bulk write kept hitting duplicate keys")
+
+    tmdb_ids = list({write.tmdb_id for write in writes})
+    changed = list(movies.find({"tmdb_id": {"$in": tmdb_ids}}, {"title": 1, "trailer_checked_at": 1}))
+    on_content_changed(*[doc['_id'] for doc in changed])
+    for doc in changed:
+        if not doc.get('trailer_checked_at'): prefetch_trailer(doc['_id'])
+        print(f"Webhook: Saved '{doc.get('title')}'.")
+
+def _file_delivered(chat_id):
+    def callback(result, error):
+        if error:
+            telegram.send_message(chat_id, "Error sending file. It might have been deleted from the channel.")
+            return
+        run_time = schedule_message_deletion(chat_id, result['message_id'])
+        print(f"Scheduled message {result['message_id']} for deletion in chat {chat_id} at {run_time}")
+    return callback
+
+def process_update(data):
+    """কিউ থেকে নেওয়া একটি টেলিগ্রাম আপডেট প্রসেস করে। চ্যানেল পোস্টের জন্য মঙ্গোডিবিতে লেখার IngestWrite
+    ফেরত দেয় (যা ব্যাচে চালানো হয়), অন্য সব ক্ষেত্রে ফলাফলের কারণ (reason)।"""
     if 'channel_post' in data:
         post = data['channel_post']
         if str(post.get('chat', {}).get('id')) != ADMIN_CHANNEL_ID:
-            return jsonify(status='ok', reason='not_admin_channel')
+            return 'not_admin_channel'
 
         file = post.get('video') or post.get('document')
         if not (file and file.get('file_name')):
-            return jsonify(status='ok', reason='no_file_in_post')
+            return 'no_file_in_post'
 
         filename = file.get('file_name')
         print(f"Webhook: Received file: {filename}")
@@ -948,11 +3125,11 @@ def telegram_webhook():
         parsed_info = parse_filename(filename)
         if not parsed_info or not parsed_info.get('title'):
             print(f"Webhook FATAL: Could not parse title from filename '{filename}'. Skipping.")
-            return jsonify(status='ok', reason='parsing_failed')
+            return 'parsing_failed'
             
         print(f"Webhook: Parsed Info: {parsed_info}")
 
-        quality_match = re.search(r'(\d{3,4})p', filename, re.IGNORECASE)
+        quality_match = QUALITY_RE.search(filename)
         quality = quality_match.group(1) + "p" if quality_match else "HD"
         print(f"Webhook: Detected Quality: {quality}")
 
@@ -960,69 +3137,21 @@ def telegram_webhook():
 
         if not tmdb_data or not tmdb_data.get("tmdb_id"):
             print(f"Webhook FATAL: Could not find TMDb data or tmdb_id for '{parsed_info['title']}'. Skipping.")
-            return jsonify(status='ok', reason='no_tmdb_data_or_id')
+            return 'no_tmdb_data_or_id'
 
         tmdb_id = tmdb_data.get("tmdb_id")
         print(f"Webhook: Found TMDb Data: {tmdb_data.get('title')} (ID: {tmdb_id})")
-        
-        new_languages_from_file = parsed_info.get('languages', [])
 
+        new_languages_from_file = parsed_info.get('languages', [])
         if parsed_info['type'] == 'series':
-            existing_series = movies.find_one({"tmdb_id": tmdb_id})
             new_episode = {
                 "season": parsed_info['season'], "episode_number": parsed_info['episode'],
                 "message_id": post['message_id'], "quality": quality
             }
-            if existing_series:
-                movies.update_one(
-                    {"_id": existing_series['_id']}, 
-                    {"$pull": {"episodes": {"season": new_episode['season'], "episode_number": new_episode['episode_number']}}}
-                )
-                
-                update_query = {"$push": {"episodes": new_episode}}
-                if new_languages_from_file:
-                    update_query["$addToSet"] = {"languages": {"$each": new_languages_from_file}}
-
-                movies.update_one({"_id": existing_series['_id']}, update_query)
-                print(f"Webhook: Updated series '{existing_series['title']}' with new episode and languages.")
-            else:
-                series_doc = {
-                    **tmdb_data, 
-                    "type": "series", 
-                    "is_trending": False, 
-                    "is_coming_soon": False, 
-                    "episodes": [new_episode],
-                    "languages": new_languages_from_file
-                }
-                movies.insert_one(series_doc)
-                print(f"Webhook: Created new series '{tmdb_data.get('title')}'.")
-
+            return series_episode_upsert(tmdb_data, new_episode, new_languages_from_file)
         else: # type == 'movie'
-            existing_movie = movies.find_one({"tmdb_id": tmdb_id})
             new_file = {"quality": quality, "message_id": post['message_id']}
-            if existing_movie:
-                movies.update_one(
-                    {"_id": existing_movie['_id']}, 
-                    {"$pull": {"files": {"quality": new_file['quality']}}}
-                )
-                
-                update_query = {"$push": {"files": new_file}}
-                if new_languages_from_file:
-                    update_query["$addToSet"] = {"languages": {"$each": new_languages_from_file}}
-                
-                movies.update_one({"_id": existing_movie['_id']}, update_query)
-                print(f"Webhook: Updated movie '{existing_movie['title']}' with new file and languages.")
-            else:
-                movie_doc = {
-                    **tmdb_data,
-                    "type": "movie",
-                    "is_trending": False, 
-                    "is_coming_soon": False,
-                    "files": [new_file],
-                    "languages": new_languages_from_file
-                }
-                movies.insert_one(movie_doc)
-                print(f"Webhook: Created new movie '{tmdb_data.get('title')}'.")
+            return movie_file_upsert(tmdb_data, new_file, new_languages_from_file)
 
     elif 'message' in data:
         message = data['message']
@@ -1036,8 +3165,8 @@ def telegram_webhook():
                     doc_id_str = payload_parts[0]
                     content = movies.find_one({"_id": ObjectId(doc_id_str)})
                     if not content:
-                        requests.get(f"{TELEGRAM_API_URL}/sendMessage", params={'chat_id': chat_id, 'text': "Content not found."})
-                        return jsonify(status='ok')
+                        telegram.send_message(chat_id, "Content not found.")
+                        return 'content_not_found'
 
                     message_to_copy_id = None
                     if content.get('type') == 'series' and len(payload_parts) == 3:
@@ -1050,36 +3179,37 @@ def telegram_webhook():
                         if target_file: message_to_copy_id = target_file.get('message_id')
 
                     if message_to_copy_id:
-                        payload = {'chat_id': chat_id, 'from_chat_id': ADMIN_CHANNEL_ID, 'message_id': message_to_copy_id}
-                        res = requests.post(f"{TELEGRAM_API_URL}/copyMessage", json=payload)
-                        res_json = res.json()
-
-                        if res_json.get('ok'):
-                            new_message_id = res_json['result']['message_id']
-                            run_time = datetime.now() + timedelta(minutes=30)
-
-                            scheduler.add_job(
-                                func=delete_message_after_delay,
-                                trigger='date',
-                                run_date=run_time,
-                                args=[chat_id, new_message_id],
-                                id=f'delete_{chat_id}_{new_message_id}',
-                                replace_existing=True
-                            )
-                            print(f"Scheduled message {new_message_id} for deletion in chat {chat_id} at {run_time}")
-                        else:
-                             print(f"Failed to copy message: {res.text}")
-                             requests.get(f"{TELEGRAM_API_URL}/sendMessage", params={'chat_id': chat_id, 'text': "Error sending file. It might have been deleted from the channel."})
+                        # কপি সেন্ডার থ্রেডে হয়; সফল হলে কলব্যাক ডিলিট শিডিউল করে
+                        telegram.submit("copyMessage", callback=_file_delivered(chat_id),
+                                        chat_id=chat_id, from_chat_id=ADMIN_CHANNEL_ID, message_id=message_to_copy_id)
                     else:
-                        requests.get(f"{TELEGRAM_API_URL}/sendMessage", params={'chat_id': chat_id, 'text': "Requested file or episode not found."})
+                        telegram.send_message(chat_id, "Requested file or episode not found.")
                 except Exception as e:
                     print(f"Error processing /start command: {e}")
-                    requests.get(f"{TELEGRAM_API_URL}/sendMessage", params={'chat_id': chat_id, 'text': "An unexpected error occurred while processing your request."})
+                    telegram.send_message(chat_id, "An unexpected error occurred while processing your request.")
             else:
-                requests.get(f"{TELEGRAM_API_URL}/sendMessage", params={'chat_id': chat_id, 'text': "আমাদের moviezhub.onrender.com ওয়েবসাইটে আপনাকে স্বাগতম.                                                                                                                                                                          আমাদের অপিসিয়াল চ্যানেলে জয়েন করুন @Moviez_Hub_Official  আমাদের অপিসিয়াল গ্রুপে জয়েন করুন @moviez_hub_discussion  আমাদের অপিসিয়াল চ্যানেলে ও গ্রুপে জয়েন করার জন্য আপনাকে ধন্যবাদ.                                                                                                                                                                          Develooper By:@YABOTZ ."})
+                telegram.send_message(chat_id, "আমাদের moviezhub.onrender.com ওয়েবসাইটে আপনাকে স্বাগতম.                                                                                                                                                                          আমাদের অপিসিয়াল চ্যানেলে জয়েন করুন @Moviez_Hub_Official  আমাদের অপিসিয়াল গ্রুপে জয়েন করুন @moviez_hub_discussion  আমাদের অপিসিয়াল চ্যানেলে ও গ্রুপে জয়েন করার জন্য আপনাকে ধন্যবাদ.                                                                                                                                                                          Develooper By:@YABOTZ .")
                 
-    return jsonify(status='ok')
+    return 'ok'
 
 if __name__ == "__main__":
+    if "--check-indexes" in sys.argv:
+        failed = verify_query_plans()
+        if failed: print(f"COLLSCAN detected in: {', '.join(failed)}")
+        sys.exit(1 if failed else 0)
+    if "--build-assets" in sys.argv:
+        out_dir = os.environ.get("ASSET_BUILD_DIR", "dist/assets")
+        print(f"Wrote {write_assets(out_dir)} assets to {out_dir}")
+        sys.exit(0)
+    if "--rebuild-related" in sys.argv:
+        rebuild_related_index()
+        sys.exit(0)
+    if "--rebuild-facets" in sys.argv:
+        rebuild_facets()
+        sys.exit(0)
+    if "--prerender" in sys.argv:
+        if not PRERENDER_DIR: sys.exit("PRERENDER_DIR is not set")
+        prerender_all()
+        sys.exit(0)
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port, debug=False)